@@ -228,6 +228,25 @@ RESULTS_FORMAT = 'PICKLE'
 # This is necessary for extracting confidence interval of selected metrics
 N_REPLICATIONS = 1
 
+# Directory where the state of caches and strategies at the end of the warmup
+# phase is saved. Experiments sharing topology, workload, placements, strategy
+# and cache policy resume from the saved state instead of replaying the warmup.
+# Each replication of an experiment saves and resumes its own warmup.
+# Uncomment to enable
+#WARMUP_CACHE_DIR = 'warmup'
+
+# Number of events that workloads supporting it generate and strategies
+# process at once. Batched workloads draw events from different random streams
+# than unbatched ones, so results differ from those of unbatched runs.
+# Uncomment to enable
+#BATCH_SIZE = 2**14
+
+# Directory where topologies and their shortest paths are cached. Experiments
+# of the same replication using the same topology read it from there instead
+# of building it and computing its shortest paths again
+# Uncomment to enable
+#TOPOLOGY_CACHE_DIR = 'topologies'
+
 # List of metrics to be measured in the experiments
 # The implementation of data collectors are located in ./icaurs/execution/collectors.py
 # Remove collectors not needed
@@ -12,9 +12,11 @@ inheriting from the `DataCollector` class and override all required methods.
 from __future__ import division
 import collections
 
+import numpy as np
+
 from icarus.registry import register_data_collector
-from icarus.tools import cdf
-from icarus.util import Tree, inheritdoc
+from icarus.tools import cdf, LogHistogram
+from icarus.util import Tree, inheritdoc, path_links
 
 
 __all__ = [
@@ -27,6 +29,10 @@ __all__ = [
     'TestCollector'
            ]
 
+# Hop event into which each path event is expanded by default
+_PATH_HOP_EVENTS = {'request_path': 'request_hop',
+                    'content_path': 'content_hop'}
+
 
 class DataCollector(object):
     """Object collecting notifications about simulation events and measuring
@@ -126,6 +132,50 @@ class DataCollector(object):
             calculate latency correctly in multicast cases
         """
         pass
+
+    def request_path(self, u, v, n_hops, main_path=True):
+        """Reports that a request has traversed the shortest path from *u* to
+        *v*.
+
+        By default, this is reported as a *request_hop* for each link of the
+        path. Collectors only needing aggregate properties of the path, e.g.
+        its delay or length, can override this method to avoid per-hop
+        notifications.
+
+        Parameters
+        ----------
+        u : any hashable type
+            Origin node
+        v : any hashable type
+            Destination node
+        n_hops : int
+            The number of links of the path
+        main_path : bool
+            As in *request_hop*
+        """
+        for x, y in path_links(self.view.shortest_path(u, v)):
+            self.request_hop(x, y, main_path)
+
+    def content_path(self, u, v, n_hops, main_path=True):
+        """Reports that a content has traversed the shortest path from *u* to
+        *v*.
+
+        By default, this is reported as a *content_hop* for each link of the
+        path, as in *request_path*.
+
+        Parameters
+        ----------
+        u : any hashable type
+            Origin node
+        v : any hashable type
+            Destination node
+        n_hops : int
+            The number of links of the path
+        main_path : bool
+            As in *content_hop*
+        """
+        for x, y in path_links(self.view.shortest_path(u, v)):
+            self.content_hop(x, y, main_path)
     
     def end_session(self, success=True):
         """Reports that the session is closed, i.e. the content has been
@@ -149,6 +199,46 @@ class DataCollector(object):
         """
         pass
 
+    def overrides(self, event):
+        """Return whether the class of this collector overrides the handler
+        of an event inherited from *DataCollector*.
+
+        Parameters
+        ----------
+        event : str
+            The name of the event, e.g. *request_hop*
+
+        Returns
+        -------
+        overrides : bool
+            *True* if the handler is overridden, *False* otherwise
+        """
+        return getattr(type(self), event).__func__ is not \
+               getattr(DataCollector, event).__func__
+
+    def listens(self, event):
+        """Return whether this collector needs to be notified of an event.
+
+        The network controller does not report events nobody listens to.
+        Shortest paths are listened to by collectors overriding either the
+        path or the hop handler, since paths are expanded into hops by
+        default.
+
+        Parameters
+        ----------
+        event : str
+            The name of the event, e.g. *request_hop*
+
+        Returns
+        -------
+        listens : bool
+            *True* if the collector needs to be notified, *False* otherwise
+        """
+        if event in _PATH_HOP_EVENTS:
+            return self.overrides(event) or \
+                   self.overrides(_PATH_HOP_EVENTS[event])
+        return self.overrides(event)
+
 # Note: The implementation of CollectorProxy could be improved to avoid having
 # to rewrite almost identical methods, for example by playing with __dict__
 # attribute. However, it was implemented this way to make it more readable and 
@@ -163,7 +253,8 @@ class CollectorProxy(DataCollector):
     """
     
     EVENTS = ('start_session', 'end_session', 'cache_hit', 'cache_miss', 'server_hit',
-              'request_hop', 'content_hop', 'results')
+              'request_hop', 'content_hop', 'request_path', 'content_path',
+              'results')
     
     def __init__(self, view, collectors):
         """Constructor
@@ -176,8 +267,23 @@ class CollectorProxy(DataCollector):
             List of instances of DataCollector that will be notified of events
         """
         self.view = view
-        self.collectors = {e: [c for c in collectors if e in type(c).__dict__]
+        # Each event is only dispatched to the collectors overriding its
+        # handler
+        self.collectors = {e: [c for c in collectors if c.overrides(e)]
                            for e in self.EVENTS}
+        # Collectors notified of hops but not of paths, which receive paths
+        # hop by hop
+        self.request_path_hops = [c for c in self.collectors['request_hop']
+                                  if c not in self.collectors['request_path']]
+        self.content_path_hops = [c for c in self.collectors['content_hop']
+                                  if c not in self.collectors['content_path']]
+
+    @inheritdoc(DataCollector)
+    def listens(self, event):
+        if event in _PATH_HOP_EVENTS:
+            return bool(self.collectors[event] or
+                        self.collectors[_PATH_HOP_EVENTS[event]])
+        return bool(self.collectors[event])
     
     @inheritdoc(DataCollector)
     def start_session(self, timestamp, receiver, content):
@@ -209,6 +315,24 @@ class CollectorProxy(DataCollector):
         for c in self.collectors['content_hop']:
             c.content_hop(u, v, main_path)
     
+    @inheritdoc(DataCollector)
+    def request_path(self, u, v, n_hops, main_path=True):
+        for c in self.collectors['request_path']:
+            c.request_path(u, v, n_hops, main_path)
+        if self.request_path_hops:
+            for x, y in path_links(self.view.shortest_path(u, v)):
+                for c in self.request_path_hops:
+                    c.request_hop(x, y, main_path)
+
+    @inheritdoc(DataCollector)
+    def content_path(self, u, v, n_hops, main_path=True):
+        for c in self.collectors['content_path']:
+            c.content_path(u, v, n_hops, main_path)
+        if self.content_path_hops:
+            for x, y in path_links(self.view.shortest_path(u, v)):
+                for c in self.content_path_hops:
+                    c.content_hop(x, y, main_path)
+    
     @inheritdoc(DataCollector)
     def end_session(self, success=True):
         for c in self.collectors['end_session']:
@@ -224,7 +348,7 @@ class LinkLoadCollector(DataCollector):
     """Data collector measuring the link load
     """
     
-    def __init__(self, view, sr=10):
+    def __init__(self, view, sr=10, interval=None):
         """Constructor
         
         Parameters
@@ -235,47 +359,101 @@ class LinkLoadCollector(DataCollector):
             Size ratio. The average ratio between the size of the content data
             and the request data. For example, if sr = x, then it means that
             the average size of a content is x times the size of a request.
+        interval : float, optional
+            If specified, the load of each link is also measured over
+            consecutive time intervals of this duration, starting from the
+            first session, and returned as a series
         """
         self.view = view
-        self.req_count = collections.defaultdict(int)
-        self.cont_count = collections.defaultdict(int)
         if sr <= 0:
             raise ValueError('sr must be positive')
+        if interval is not None and interval <= 0:
+            raise ValueError('interval must be positive')
         self.sr = sr
+        self.interval = interval
         self.t_start = -1
         self.t_end = 1
+        # Number of each directed link, used to index the counters, keyed by
+        # origin and destination nodes
+        topology = view.topology()
+        self.links = []
+        for u, v in topology.edges_iter():
+            self.links.append((u, v))
+            if not topology.is_directed():
+                self.links.append((v, u))
+        self.link_index = collections.defaultdict(dict)
+        for i, (u, v) in enumerate(self.links):
+            self.link_index[u][v] = i
+        self.link_type = np.array([self._link_type(u, v) for u, v in self.links],
+                                  dtype=object)
+        # Request and content counters of each link, one pair of arrays per
+        # time interval. Hops only increment the arrays of the last interval
+        self.req_series = []
+        self.cont_series = []
+        self._new_interval()
+
+    def _link_type(self, u, v):
+        """Return the type of a link or None if it has no type"""
+        try:
+            return self.view.link_type(u, v)
+        except KeyError:
+            return None
+
+    def _new_interval(self):
+        """Append the counters of a new time interval"""
+        self.req_count = np.zeros(len(self.links), dtype=np.int64)
+        self.cont_count = np.zeros(len(self.links), dtype=np.int64)
+        self.req_series.append(self.req_count)
+        self.cont_series.append(self.cont_count)
     
     @inheritdoc(DataCollector)
     def start_session(self, timestamp, receiver, content):
         if self.t_start < 0:
             self.t_start = timestamp
         self.t_end = timestamp
+        if self.interval is not None:
+            while (timestamp - self.t_start) >= len(self.req_series)*self.interval:
+                self._new_interval()
     
     @inheritdoc(DataCollector)
     def request_hop(self, u, v, main_path=True):
-        self.req_count[(u, v)] += 1
+        self.req_count[self.link_index[u][v]] += 1
     
     @inheritdoc(DataCollector)
     def content_hop(self, u, v, main_path=True):
-        self.cont_count[(u, v)] += 1
+        self.cont_count[self.link_index[u][v]] += 1
     
     @inheritdoc(DataCollector)
     def results(self):
         duration = self.t_end - self.t_start
-        link_loads = dict((link, (self.req_count[link] + self.sr*self.cont_count[link])/duration) 
-                          for link in self.req_count)
-        link_loads_int = dict((link, load)
-                              for link, load in link_loads.items()
-                              if self.view.link_type(*link) == 'internal')
-        link_loads_ext = dict((link, load)
-                              for link, load in link_loads.items()
-                              if self.view.link_type(*link) == 'external')
-        mean_load_int = sum(link_loads_int.values())/len(link_loads_int)
-        mean_load_ext = sum(link_loads_ext.values())/len(link_loads_ext)
-        return Tree({'MEAN_INTERNAL':     mean_load_int, 
-                     'MEAN_EXTERNAL':     mean_load_ext,
-                     'PER_LINK_INTERNAL': link_loads_int,
-                     'PER_LINK_EXTERNAL': link_loads_ext})
+        req_count = np.sum(self.req_series, axis=0)
+        cont_count = np.sum(self.cont_series, axis=0)
+        loads = (req_count + self.sr*cont_count)/duration
+        # Only links traversed by at least one request are reported
+        used = req_count > 0
+        internal = np.flatnonzero(used & (self.link_type == 'internal'))
+        external = np.flatnonzero(used & (self.link_type == 'external'))
+        link_loads_int = dict((self.links[i], load) for i, load
+                              in zip(internal, loads[internal].tolist()))
+        link_loads_ext = dict((self.links[i], load) for i, load
+                              in zip(external, loads[external].tolist()))
+        mean_load_int = sum(link_loads_int.values())/len(link_loads_int) \
+                        if len(link_loads_int) > 0 else 0
+        mean_load_ext = sum(link_loads_ext.values())/len(link_loads_ext) \
+                        if len(link_loads_ext) > 0 else 0
+        results = Tree({'MEAN_INTERNAL':     mean_load_int,
+                        'MEAN_EXTERNAL':     mean_load_ext,
+                        'PER_LINK_INTERNAL': link_loads_int,
+                        'PER_LINK_EXTERNAL': link_loads_ext})
+        if self.interval is not None:
+            # Loads of each interval, one row per interval
+            series = (np.array(self.req_series) +
+                      self.sr*np.array(self.cont_series))/self.interval
+            results['INTERVAL'] = self.interval
+            results['PER_LINK_SERIES'] = dict(
+                    (self.links[i], series[:, i].tolist())
+                    for i in np.flatnonzero(used))
+        return results
 
 
 @register_data_collector('LATENCY')
@@ -284,7 +462,7 @@ class LatencyCollector(DataCollector):
     content.
     """
     
-    def __init__(self, view, cdf=False):
+    def __init__(self, view, cdf=False, sketch=False, precision=0.01):
         """Constructor
         
         Parameters
@@ -293,15 +471,26 @@ class LatencyCollector(DataCollector):
             The network view instance
         cdf : bool, optional
             If *True*, also collects a cdf of the latency
+        sketch : bool, optional
+            If *True*, latencies are collected in a *LogHistogram*, which is
+            returned along with the 50th, 95th and 99th percentiles. The cdf,
+            if collected, is then computed from the histogram, so that memory
+            usage does not depend on the number of sessions
+        precision : float, optional
+            The maximum relative error of the percentiles and cdf computed
+            from the histogram
         """##
         self.receiver = 0
         self.content = 0##
         self.cdf = cdf
+        self.sketch = sketch
         self.view = view
         self.req_latency = 0.0
         self.sess_count = 0
         self.latency = 0.0
-        if cdf:
+        if sketch:
+            self.latency_data = LogHistogram(precision)
+        elif cdf:
             self.latency_data = collections.deque()
     
     @inheritdoc(DataCollector)
@@ -323,12 +512,24 @@ class LatencyCollector(DataCollector):
         if main_path:
             #print "CH u: %d, v: %d, Delay: %d, Sess: %f, Recv: %d, Cont: %d" % (u,v,self.view.link_delay(u, v),self.sess_latency, self.receiver, self.content)
             self.sess_latency += self.view.link_delay(u, v)
+
+    @inheritdoc(DataCollector)
+    def request_path(self, u, v, n_hops, main_path=True):
+        if main_path:
+            self.sess_latency += self.view.path_delay(u, v)
+
+    @inheritdoc(DataCollector)
+    def content_path(self, u, v, n_hops, main_path=True):
+        if main_path:
+            self.sess_latency += self.view.path_delay(u, v)
     
     @inheritdoc(DataCollector)
     def end_session(self, success=True):
         if not success:
             return
-        if self.cdf:
+        if self.sketch:
+            self.latency_data.add(self.sess_latency)
+        elif self.cdf:
             self.latency_data.append(self.sess_latency)
         self.latency += self.sess_latency
         #print "End sess lat: ",self.latency
@@ -339,8 +540,11 @@ class LatencyCollector(DataCollector):
         print "Lat:", self.latency
         print "Sess cnt:", self.sess_count
         print "Sess lat:", self.latency/self.sess_count
+        if self.sketch:
+            results.update(_histogram_results(self.latency_data))
         if self.cdf:
-            results['CDF'] = cdf(self.latency_data) 
+            results['CDF'] = self.latency_data.cdf() if self.sketch \
+                             else cdf(self.latency_data)
         return results
 
 
@@ -437,7 +641,7 @@ class PathStretchCollector(DataCollector):
     path length and the shortest path length.
     """
     
-    def __init__(self, view, cdf=False):
+    def __init__(self, view, cdf=False, sketch=False, precision=0.01):
         """Constructor
         
         Parameters
@@ -446,16 +650,27 @@ class PathStretchCollector(DataCollector):
             The network view instance
         cdf : bool, optional
             If *True*, also collects a cdf of the path stretch
+        sketch : bool, optional
+            If *True*, path stretches are collected in *LogHistogram* objects,
+            as in *LatencyCollector*
+        precision : float, optional
+            The maximum relative error of the percentiles and cdf computed
+            from the histograms
         """
         self.view = view
         self.cdf = cdf
+        self.sketch = sketch
         self.req_path_len = collections.defaultdict(int)
         self.cont_path_len = collections.defaultdict(int)
         self.sess_count = 0
         self.mean_req_stretch = 0.0
         self.mean_cont_stretch = 0.0
         self.mean_stretch = 0.0
-        if self.cdf:
+        if self.sketch:
+            self.req_stretch_data = LogHistogram(precision)
+            self.cont_stretch_data = LogHistogram(precision)
+            self.stretch_data = LogHistogram(precision)
+        elif self.cdf:
             self.req_stretch_data = collections.deque()
             self.cont_stretch_data = collections.deque()
             self.stretch_data = collections.deque()
@@ -475,6 +690,14 @@ class PathStretchCollector(DataCollector):
     @inheritdoc(DataCollector)
     def content_hop(self, u, v, main_path=True):
         self.cont_path_len += 1
+
+    @inheritdoc(DataCollector)
+    def request_path(self, u, v, n_hops, main_path=True):
+        self.req_path_len += n_hops
+
+    @inheritdoc(DataCollector)
+    def content_path(self, u, v, n_hops, main_path=True):
+        self.cont_path_len += n_hops
     
     @inheritdoc(DataCollector)
     def end_session(self, success=True):
@@ -488,7 +711,11 @@ class PathStretchCollector(DataCollector):
         self.mean_req_stretch += req_stretch
         self.mean_cont_stretch += cont_stretch
         self.mean_stretch += stretch
-        if self.cdf:
+        if self.sketch:
+            self.req_stretch_data.add(req_stretch)
+            self.cont_stretch_data.add(cont_stretch)
+            self.stretch_data.add(stretch)
+        elif self.cdf:
             self.req_stretch_data.append(req_stretch)
             self.cont_stretch_data.append(cont_stretch)
             self.stretch_data.append(stretch)
@@ -498,10 +725,18 @@ class PathStretchCollector(DataCollector):
         results = Tree({'MEAN': self.mean_stretch/self.sess_count,
                         'MEAN_REQUEST': self.mean_req_stretch/self.sess_count,
                         'MEAN_CONTENT': self.mean_cont_stretch/self.sess_count})
-        if self.cdf:
-            results['CDF'] = cdf(self.stretch_data)
-            results['CDF_REQUEST'] = cdf(self.req_stretch_data)
-            results['CDF_CONTENT'] = cdf(self.cont_stretch_data)
+        if not (self.sketch or self.cdf):
+            return results
+        data = {'': self.stretch_data,
+                '_REQUEST': self.req_stretch_data,
+                '_CONTENT': self.cont_stretch_data}
+        for suffix, values in data.items():
+            if self.sketch:
+                for k, v in _histogram_results(values).items():
+                    results[k + suffix] = v
+            if self.cdf:
+                results['CDF' + suffix] = values.cdf() if self.sketch \
+                                          else cdf(values)
         return results
        
 
@@ -562,4 +797,22 @@ class TestCollector(DataCollector):
         """
         return self.session
 
-    
+
+def _histogram_results(histogram):
+    """Return the results summarizing a histogram collected by a data collector
+
+    Parameters
+    ----------
+    histogram : LogHistogram
+        The histogram
+
+    Returns
+    -------
+    results : dict
+        Dictionary with the histogram itself, which can be merged with those of
+        other replications, and its 50th, 95th and 99th percentiles
+    """
+    return {'HISTOGRAM': histogram,
+            'P50': histogram.quantile(0.5),
+            'P95': histogram.quantile(0.95),
+            'P99': histogram.quantile(0.99)}
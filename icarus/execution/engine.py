@@ -5,6 +5,11 @@ experiments needs to be run, instantiates all the required classes and executes
 the experiment by iterating through the event provided by an event generator
 and providing them to a strategy instance. 
 """
+import os
+import cPickle as pickle
+
+import numpy as np
+
 from icarus.execution import NetworkModel, NetworkView, NetworkController, CollectorProxy
 from icarus.registry import DATA_COLLECTOR, STRATEGY
 
@@ -12,7 +17,8 @@ from icarus.registry import DATA_COLLECTOR, STRATEGY
 __all__ = ['exec_experiment']
 
 
-def exec_experiment(topology, workload, netconf, strategy, cache_policy, collectors):
+def exec_experiment(topology, workload, netconf, strategy, cache_policy,
+                    collectors, warmup_snapshot=None, batch_size=None):
     """Execute the simulation of a specific scenario.
     
     Parameters
@@ -24,7 +30,9 @@ def exec_experiment(topology, workload, netconf, strategy, cache_policy, collect
         An iterable object whose elements are (time, event) tuples, where time
         is a float type indicating the timestamp of the event to be executed
         and event is a dictionary storing all the attributes of the event to
-        execute
+        execute. If *batch_size* is specified and the workload has an
+        *iter_batches* method, events are instead read and processed in
+        batches of parallel arrays
     netconf : dict
         Dictionary of attributes to inizialize the network model
     strategy : tree
@@ -37,6 +45,16 @@ def exec_experiment(topology, workload, netconf, strategy, cache_policy, collect
         The collectors to be used. It is a dictionary in which keys are the
         names of collectors to use and values are dictionaries of attributes
         for the collector they refer to.
+    warmup_snapshot : str, optional
+        Path of the warmup snapshot file. If the file exists, warmup events are
+        not processed and the state of caches and strategy saved in it is
+        restored at the first measured event. Otherwise, that state is saved
+        into it when the first measured event is reached.
+    batch_size : int, optional
+        The maximum number of events per batch, if events are to be processed
+        in batches. Note that workloads draw batches from different random
+        streams than single events, so that the events of a batched run differ
+        from those of an unbatched run with the same seed
          
     Returns
     -------
@@ -56,6 +74,91 @@ def exec_experiment(topology, workload, netconf, strategy, cache_policy, collect
     strategy_args = {k: v for k, v in strategy.items() if k != 'name'}
     strategy_inst = STRATEGY[strategy_name](view, controller, **strategy_args)
     
-    for time, event in workload:
-        strategy_inst.process_event(time, **event)
+    resume = warmup_snapshot is not None and os.path.isfile(warmup_snapshot)
+
+    def end_warmup():
+        if resume:
+            _load_warmup_snapshot(warmup_snapshot, model, strategy_inst)
+        elif warmup_snapshot is not None:
+            _save_warmup_snapshot(warmup_snapshot, model, strategy_inst)
+
+    warmup = True
+    if batch_size is not None and hasattr(workload, 'iter_batches'):
+        for batch in workload.iter_batches(batch_size):
+            if warmup:
+                log = batch[-1]
+                # Index of the first measured event of the batch, if any
+                i = int(np.argmax(log)) if log.any() else len(log)
+                if i > 0 and not resume:
+                    strategy_inst.process_batch(*[a[:i] for a in batch])
+                if i == len(log):
+                    continue
+                warmup = False
+                end_warmup()
+                batch = [a[i:] for a in batch]
+            strategy_inst.process_batch(*batch)
+    else:
+        for time, event in workload:
+            if warmup:
+                if not event['log']:
+                    if resume:
+                        continue
+                else:
+                    warmup = False
+                    end_warmup()
+            strategy_inst.process_event(time, **event)
     return collector.results()
+
+
+def _save_warmup_snapshot(path, model, strategy):
+    """Save the state of caches and strategy at the end of the warmup phase.
+
+    The state of the strategy is the one returned by its *snapshot_state*
+    method.
+
+    The state of the random number generators is not saved. On resume, the
+    workload still generates the warmup events, so that the random streams of
+    the workload are unchanged, and randomized strategies draw from the
+    random number generators in the state they find them. The state is written
+    to a temporary file first and then renamed, so that concurrent experiments
+    never read a partially written snapshot.
+
+    Parameters
+    ----------
+    path : str
+        Path of the snapshot file
+    model : NetworkModel
+        The network model
+    strategy : Strategy
+        The strategy instance
+    """
+    state = {'cache': model.cache,
+             'static_cache': model.static_cache,
+             'dynamic_cache': model.dynamic_cache,
+             'strategy': strategy.snapshot_state()}
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.rename(tmp_path, path)
+
+
+def _load_warmup_snapshot(path, model, strategy):
+    """Restore the state of caches and strategy saved by
+    *_save_warmup_snapshot*.
+
+    Parameters
+    ----------
+    path : str
+        Path of the snapshot file
+    model : NetworkModel
+        The network model
+    strategy : Strategy
+        The strategy instance
+    """
+    with open(path, 'rb') as f:
+        state = pickle.load(f)
+    model.cache = state['cache']
+    model.static_cache = state['static_cache']
+    model.dynamic_cache = state['dynamic_cache']
+    model.index_content_locations()
+    strategy.restore_state(state['strategy'])
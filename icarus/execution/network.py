@@ -12,18 +12,26 @@ about the network status by calling methods of the `NetworkView` instance.
 The `NetworkController` is also responsible to notify a `DataCollectorProxy`
 of all relevant events.
 """
+import collections
 import logging
+import numbers
 
 import networkx as nx
+import numpy as np
 import fnss
 
 from icarus.registry import CACHE_POLICY
-from icarus.util import path_links, iround
+from icarus.util import inheritdoc, path_links, iround
 
 __all__ = [
+    'build_shortest_paths',
+    'LazyShortestPaths',
+    'NextHopShortestPaths',
+    'Route',
     'NetworkModel',
     'NetworkView',
-    'NetworkController'
+    'NetworkController',
+    'Session'
           ]
 
 logger = logging.getLogger('orchestration')
@@ -54,6 +62,344 @@ def symmetrify_paths(shortest_paths):
     return shortest_paths
 
 
+def build_shortest_paths(topology, routing='ALL_PAIRS', max_trees=None):
+    """Return the shortest paths of a topology, as used by *NetworkModel*
+
+    Parameters
+    ----------
+    topology : Topology
+        The topology
+    routing : str, optional
+        How shortest paths are computed. If *ALL_PAIRS*, the paths of all
+        pairs of nodes are computed upfront. If *LAZY*, the paths from a node
+        are computed when first requested (see *LazyShortestPaths*). If
+        *NEXT_HOP*, paths are stored as a next-hop matrix (see
+        *NextHopShortestPaths*). All yield the same symmetric paths
+    max_trees : int, optional
+        With *LAZY* routing, the maximum number of shortest path trees kept in
+        memory
+
+    Returns
+    -------
+    shortest_path : dict of dict or shortest path provider
+        The shortest paths, indexed as *shortest_path[s][t]*
+    """
+    if routing == 'ALL_PAIRS':
+        return symmetrify_paths(nx.all_pairs_dijkstra_path(topology))
+    elif routing == 'LAZY':
+        return LazyShortestPaths(topology, max_trees)
+    elif routing == 'NEXT_HOP':
+        return NextHopShortestPaths(topology)
+    raise ValueError('routing must be one of ALL_PAIRS, LAZY or NEXT_HOP')
+
+
+class _SymmetricShortestPaths(object):
+    """Base class of shortest path providers returning the same paths as
+    *symmetrify_paths*, without storing the paths of all pairs of nodes.
+
+    Providers can be indexed as the dictionary of all-pairs shortest paths
+    returned by *symmetrify_paths*, i.e. *paths[s][t]* is the shortest path
+    from *s* to *t*. That function keeps, for each pair of nodes, the path of
+    the Dijkstra tree of the node that comes later in the iteration order of
+    the all-pairs dictionary, hence subclasses must do the same, using the
+    node ranks computed here.
+    """
+
+    def __init__(self, topology, weight='weight'):
+        """Constructor
+
+        Parameters
+        ----------
+        topology : Topology
+            The topology
+        weight : str, optional
+            The link attribute used as link weight
+        """
+        self.topology = topology
+        self.weight = weight
+        # A dictionary built inserting nodes in the same order as
+        # nx.all_pairs_dijkstra_path, which then has the same iteration order
+        order = {}
+        for v in topology:
+            order[v] = None
+        self._rank = dict((v, i) for i, v in enumerate(order))
+
+    def path(self, s, t):
+        """Return the shortest path from *s* to *t*
+
+        Parameters
+        ----------
+        s : any hashable type
+            Origin node
+        t : any hashable type
+            Destination node
+
+        Returns
+        -------
+        shortest_path : list
+            List of nodes of the shortest path (origin and destination
+            included)
+        """
+        raise NotImplementedError('This method must be implemented by subclasses')
+
+    def __getitem__(self, s):
+        if s not in self._rank:
+            raise KeyError(s)
+        return _ShortestPathsRow(self, s)
+
+    def __contains__(self, s):
+        return s in self._rank
+
+    def __iter__(self):
+        return iter(self._rank)
+
+    def __len__(self):
+        return len(self._rank)
+
+
+class _ShortestPathsRow(object):
+    """Shortest paths from a node, as returned by a provider indexed by the
+    node"""
+
+    def __init__(self, paths, s):
+        self._paths = paths
+        self._s = s
+
+    def __getitem__(self, t):
+        if t not in self._paths:
+            raise KeyError(t)
+        return self._paths.path(self._s, t)
+
+    def __contains__(self, t):
+        return t in self._paths
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+
+class LazyShortestPaths(_SymmetricShortestPaths):
+    """Shortest paths of a topology, computed on demand.
+
+    Instead of computing and storing the paths of all pairs of nodes, this
+    provider computes the Dijkstra shortest path tree of a node only when a
+    path from or to that node is requested and it keeps the most recently
+    used trees only. It returns exactly the same paths as *symmetrify_paths*.
+    """
+
+    def __init__(self, topology, max_trees=None, weight='weight'):
+        """Constructor
+
+        Parameters
+        ----------
+        topology : Topology
+            The topology
+        max_trees : int, optional
+            The maximum number of shortest path trees kept in memory. If not
+            specified, all computed trees are kept
+        weight : str, optional
+            The link attribute used as link weight
+        """
+        if max_trees is not None and max_trees < 1:
+            raise ValueError('max_trees must be positive')
+        super(LazyShortestPaths, self).__init__(topology, weight)
+        self.max_trees = max_trees
+        self._trees = collections.OrderedDict()
+
+    def _tree(self, v):
+        """Return the shortest path tree rooted at a node"""
+        trees = self._trees
+        if v in trees:
+            tree = trees.pop(v)
+        else:
+            tree = nx.single_source_dijkstra_path(self.topology, v,
+                                                  weight=self.weight)
+            if self.max_trees is not None and len(trees) >= self.max_trees:
+                trees.popitem(last=False)
+        trees[v] = tree
+        return tree
+
+    @inheritdoc(_SymmetricShortestPaths)
+    def path(self, s, t):
+        if self._rank[s] >= self._rank[t]:
+            return self._tree(s)[t]
+        return list(reversed(self._tree(t)[s]))
+
+
+class NextHopShortestPaths(_SymmetricShortestPaths):
+    """Shortest paths of a topology, stored as a next-hop matrix.
+
+    Nodes are mapped to dense indices and, for each node *r*, the Dijkstra
+    shortest path tree rooted at *r* is stored as a column of an N x N
+    integer matrix whose element (x, r) is the index of the node following
+    *x* on the path from *x* to *r*. Paths are rebuilt on demand by following
+    next hops, hence memory usage is 4 N^2 bytes regardless of path lengths.
+    It returns exactly the same paths as *symmetrify_paths*.
+    """
+
+    def __init__(self, topology, weight='weight'):
+        """Constructor
+
+        Parameters
+        ----------
+        topology : Topology
+            The topology
+        weight : str, optional
+            The link attribute used as link weight
+        """
+        super(NextHopShortestPaths, self).__init__(topology, weight)
+        # The index of a node is its rank, so that comparing the ranks of two
+        # nodes does not need any lookup
+        self.nodes = sorted(self._rank, key=self._rank.get)
+        n = len(self.nodes)
+        # -1 marks nodes not reachable from the root
+        self.next_hop = np.empty((n, n), dtype=np.int32)
+        self.next_hop.fill(-1)
+        for r, root in enumerate(self.nodes):
+            col = self.next_hop[:, r]
+            for v, path in nx.single_source_dijkstra_path(topology, root,
+                                                          weight=weight).items():
+                col[self._rank[v]] = self._rank[path[-2]] if len(path) > 1 else r
+
+    def _walk(self, x, r):
+        """Return the indices of the nodes of the path from node index x to
+        node index r, following next hops"""
+        next_hop = self.next_hop
+        if next_hop[x, r] < 0:
+            raise KeyError(self.nodes[r])
+        walk = [x]
+        while x != r:
+            x = int(next_hop[x, r])
+            walk.append(x)
+        return walk
+
+    def iter_path(self, s, t):
+        """Return an iterator over the nodes of the shortest path from *s* to
+        *t*
+
+        Parameters
+        ----------
+        s : any hashable type
+            Origin node
+        t : any hashable type
+            Destination node
+
+        Returns
+        -------
+        shortest_path : iterator
+            Iterator over the nodes of the shortest path (origin and
+            destination included)
+        """
+        i, j = self._rank[s], self._rank[t]
+        nodes = self.nodes
+        if i < j:
+            # The path comes from the tree of t, hence it can be streamed
+            next_hop = self.next_hop
+            if next_hop[i, j] < 0:
+                raise KeyError(t)
+            return self._iter_walk(i, j)
+        return (nodes[x] for x in reversed(self._walk(j, i)))
+
+    def _iter_walk(self, x, r):
+        """Yield the nodes of the path from node index x to node index r"""
+        next_hop = self.next_hop
+        nodes = self.nodes
+        yield nodes[x]
+        while x != r:
+            x = int(next_hop[x, r])
+            yield nodes[x]
+
+    @inheritdoc(_SymmetricShortestPaths)
+    def path(self, s, t):
+        i, j = self._rank[s], self._rank[t]
+        nodes = self.nodes
+        if i < j:
+            return [nodes[x] for x in self._walk(i, j)]
+        return [nodes[x] for x in reversed(self._walk(j, i))]
+
+
+class Route(object):
+    """Precomputed properties of the path between two nodes.
+
+    Routes are built by *NetworkView.route* and shared by all requests
+    travelling between the same pair of nodes, so that strategies do not
+    need to rebuild the list of links of a path and to look up which of its
+    nodes have a cache at every request. Routes must not be modified.
+    """
+
+    def __init__(self, path, cache_nodes, link_delay):
+        """Constructor
+
+        Parameters
+        ----------
+        path : list
+            List of nodes of the path (origin and destination included)
+        cache_nodes : dict or set
+            Container of the nodes which have a cache. If it is a dictionary
+            mapping each of them to the size of its cache, *cache_space* can
+            be used
+        link_delay : callable
+            Function returning the delay of link *(u, v)* given *u* and *v*
+        """
+        self.path = tuple(path)
+        # Links of the path, each with a flag telling whether its
+        # destination node has a cache
+        self.hops = tuple((u, v, v in cache_nodes)
+                          for u, v in zip(self.path[:-1], self.path[1:]))
+        # Indices in hops of the links whose destination has a cache
+        self.cache_hops = tuple(i for i, (_, _, c) in enumerate(self.hops) if c)
+        self._cache_nodes = cache_nodes
+        self._link_delay = link_delay
+        self._delays = None
+        self._cache_space = None
+        self._reverse = None
+
+    def __len__(self):
+        """Return the number of nodes of the path"""
+        return len(self.path)
+
+    @property
+    def links(self):
+        """Return the list of links of the path, as (u, v) tuples"""
+        return [(u, v) for u, v, _ in self.hops]
+
+    @property
+    def delays(self):
+        """Return the cumulative delays of the path, i.e. a tuple whose item i
+        is the sum of the delays of the links from the origin to the node i of
+        the path"""
+        if self._delays is None:
+            delays = [0]
+            for u, v, _ in self.hops:
+                delays.append(delays[-1] + self._link_delay(u, v))
+            self._delays = tuple(delays)
+        return self._delays
+
+    @property
+    def cache_space(self):
+        """Return the cache space available along the path, i.e. a tuple
+        whose item i is the total size of the caches of the nodes of the path
+        from node i to the destination"""
+        if self._cache_space is None:
+            space = [0]
+            for v in reversed(self.path):
+                space.append(space[-1] + self._cache_nodes.get(v, 0))
+            self._cache_space = tuple(reversed(space[1:]))
+        return self._cache_space
+
+    @property
+    def reverse(self):
+        """Return the route traversing the same path in the opposite
+        direction"""
+        if self._reverse is None:
+            self._reverse = Route(reversed(self.path), self._cache_nodes,
+                                  self._link_delay)
+            self._reverse._reverse = self
+        return self._reverse
+
+
 class NetworkView(object):
     """Network view
     
@@ -91,7 +437,17 @@ class NetworkView(object):
         nodes : set
             A set of all nodes currently storing the given content
         """
-        loc = set(v for v in self.model.cache if self.model.cache[v].has(k))
+        loc = set()
+        nodes = self.model.content_locations.get(k)
+        if nodes:
+            # The index may still list caches whose copy expired without being
+            # reported as evicted (e.g. TTL caches), hence hits are verified
+            # and stale entries dropped
+            cache = self.model.cache
+            stale = [v for v in nodes if not cache[v].has(k)]
+            for v in stale:
+                self.model.index_remove(v, k)
+            loc.update(nodes)
         loc.add(self.content_source(k))
         return loc
     
@@ -108,7 +464,10 @@ class NetworkView(object):
         node : any hashable type
             The node persistently storing the given content
         """
-        return self.model.content_source[k]
+        source = self.model.content_source_index(k)
+        if source < 0:
+            raise KeyError(k)
+        return self.model.nodes[source]
         
     def shortest_path(self, s, t):
         """Return the shortest path from *s* to *t*
@@ -122,11 +481,44 @@ class NetworkView(object):
         
         Returns
         -------
-        shortest_path : list
-            List of nodes of the shortest path (origin and destination
-            included)
+        shortest_path : list or tuple
+            Sequence of nodes of the shortest path (origin and destination
+            included). It may be shared with other callers, hence it must be
+            copied before being modified
         """
         return self.model.shortest_path[s][t]
+
+    def route(self, s, t):
+        """Return the route from *s* to *t*, i.e. the shortest path from *s* to
+        *t* with its precomputed links, caching nodes and delays.
+
+        Routes are built the first time they are requested and then reused.
+        Since shortest paths are symmetric, the route from *s* to *t* is the
+        reverse of the route from *t* to *s*, if that was built before.
+
+        Parameters
+        ----------
+        s : any hashable type
+            Origin node
+        t : any hashable type
+            Destination node
+
+        Returns
+        -------
+        route : Route
+            The route from *s* to *t*
+        """
+        routes = self.model.routes
+        route = routes.get((s, t))
+        if route is None:
+            route = routes.get((t, s))
+            if route is not None:
+                route = route.reverse
+            else:
+                route = Route(self.model.shortest_path[s][t],
+                              self.model.cache_size, self.link_delay)
+            routes[(s, t)] = route
+        return route
     
     def all_pairs_shortest_paths(self):
         """Return all pairs shortest paths
@@ -155,7 +547,10 @@ class NetworkView(object):
         link_type : str
             The link type
         """
-        return self.model.link_type[(u, v)]
+        t = self.model.link_type[self.model.link_number(u, v)]
+        if t < 0:
+            raise KeyError((u, v))
+        return self.model.link_type_names[t]
     
     def link_delay(self, u, v):
         """Return the delay of link *(u, v)*.
@@ -172,7 +567,37 @@ class NetworkView(object):
         delay : float
             The link delay
         """
-        return self.model.link_delay[(u, v)]
+        delay = self.model.link_delay[self.model.link_number(u, v)]
+        if delay != delay:
+            # NaN, i.e. the link has no delay
+            raise KeyError((u, v))
+        return delay
+    
+    def path_delay(self, s, t):
+        """Return the delay of the shortest path from *s* to *t*, i.e. the sum
+        of the delays of its links.
+
+        Delays are computed the first time they are requested and then looked
+        up in constant time.
+
+        Parameters
+        ----------
+        s : any hashable type
+            Origin node
+        t : any hashable type
+            Destination node
+
+        Returns
+        -------
+        delay : float
+            The path delay
+        """
+        path_delay = self.model.path_delay
+        delay = path_delay.get((s, t))
+        if delay is None:
+            delay = self.route(s, t).delays[-1]
+            path_delay[(s, t)] = delay
+        return delay
     
     def topology(self):
         """Return the network topology
@@ -303,7 +728,8 @@ class NetworkModel(object):
     calls to the network controller.
     """
     
-    def __init__(self, topology, cache_policy, shortest_path=None):
+    def __init__(self, topology, cache_policy, shortest_path=None,
+                 routing='ALL_PAIRS', max_trees=None):
         """Constructor
         
         Parameters
@@ -316,6 +742,16 @@ class NetworkModel(object):
             policy
         shortest_path : dict of dict, optional
             The all-pair shortest paths of the network
+        routing : str, optional
+            How shortest paths are computed if they are not provided. If
+            *ALL_PAIRS*, the paths of all pairs of nodes are computed upfront.
+            If *LAZY*, the paths from a node are computed when first requested
+            (see *LazyShortestPaths*). If *NEXT_HOP*, paths are stored as a
+            next-hop matrix (see *NextHopShortestPaths*). All yield the same
+            symmetric paths
+        max_trees : int, optional
+            With *LAZY* routing, the maximum number of shortest path trees
+            kept in memory
         """
         # Filter inputs
         if not isinstance(topology, fnss.Topology):
@@ -323,15 +759,19 @@ class NetworkModel(object):
                              'fnss.Topology or any of its subclasses.')
         
         # Shortest paths of the network
-        self.shortest_path = shortest_path if shortest_path is not None \
-                             else symmetrify_paths(nx.all_pairs_dijkstra_path(topology))
+        if shortest_path is not None:
+            self.shortest_path = shortest_path
+        else:
+            self.shortest_path = build_shortest_paths(topology, routing, max_trees)
         
         # Network topology
         self.topology = topology
-        
-        # Dictionary mapping each content object to its source
-        # dict of location of contents keyed by content ID
-        self.content_source = {}
+
+        # Nodes are numbered 0..N-1, in the order of this list, to index the
+        # arrays of link and content attributes below
+        self.nodes = topology.nodes()
+        self.node_index = dict((v, i) for i, v in enumerate(self.nodes))
+        n_nodes = len(self.nodes)
         
         # Dictionary of cache sizes keyed by node
         self.cache_size = {}
@@ -339,18 +779,69 @@ class NetworkModel(object):
         self.static_cache_size = {}
         self.dynamic_cache_size = {}
         
-        # Dictionary of link types (internal/external)
-        self.link_type = nx.get_edge_attributes(topology, 'type')
-        self.link_delay = fnss.get_delays(topology)
-        # Instead of this manual assignment, I could have converted the
-        # topology to directed before extracting type and link delay but that
-        # requires a deep copy of the topology that can take long time if
+        # Links are numbered 0..L-1, each direction of an undirected link
+        # separately. link_index maps the number i*N + j of a pair of nodes
+        # numbered i and j to the number of the link between them, which
+        # indexes the arrays of link types (internal/external) and delays.
+        # Link types are stored as indices of link_type_names, -1 and NaN
+        # mark links without a type or a delay
+        self.link_index = {}
+        for u, v in topology.edges_iter():
+            i, j = self.node_index[u], self.node_index[v]
+            self.link_index[i*n_nodes + j] = len(self.link_index)
+            if not topology.is_directed() and i != j:
+                self.link_index[j*n_nodes + i] = len(self.link_index)
+        n_links = len(self.link_index)
+        self.link_type_names = []
+        self.link_type = np.empty(n_links, dtype=np.int8)
+        self.link_type.fill(-1)
+        self.link_delay = np.empty(n_links)
+        self.link_delay.fill(np.nan)
+        # Instead of filling both directions manually, I could have converted
+        # the topology to directed before extracting type and link delay but
+        # that requires a deep copy of the topology that can take long time if
         # many content source mappings are included in the topology
-        if not topology.is_directed():
-            for (u, v), link_type in self.link_type.items():
-                self.link_type[(v, u)] = link_type
-            for (u, v), delay in self.link_delay.items():
-                self.link_delay[(v, u)] = delay
+        for (u, v), link_type in nx.get_edge_attributes(topology, 'type').items():
+            if link_type not in self.link_type_names:
+                self.link_type_names.append(link_type)
+            t = self.link_type_names.index(link_type)
+            self.link_type[self.link_number(u, v)] = t
+            if not topology.is_directed():
+                self.link_type[self.link_number(v, u)] = t
+        for (u, v), delay in fnss.get_delays(topology).items():
+            self.link_delay[self.link_number(u, v)] = delay
+            if not topology.is_directed():
+                self.link_delay[self.link_number(v, u)] = delay
+
+        # Delays of shortest paths keyed by (origin, destination). They are
+        # computed when first requested by NetworkView.path_delay, hence only
+        # the pairs of nodes actually exchanging requests or contents are
+        # stored
+        self.path_delay = {}
+
+        # Source of each content, as the number of the source node (-1 if the
+        # content has no source). If contents are non-negative integers not
+        # much larger than their number (e.g. 1..C), the array is indexed by
+        # content directly, otherwise contents are numbered 0..C-1 by
+        # content_index
+        content_source = {}
+        for node in topology.nodes_iter():
+            stack_name, stack_props = fnss.get_stack(topology, node)
+            if stack_name == 'source':
+                for content in stack_props['contents']:
+                    content_source[content] = self.node_index[node]
+        if all(isinstance(k, numbers.Integral) and 0 <= k <= 2*len(content_source)
+               for k in content_source):
+            self.content_index = None
+            n_contents = max(content_source) + 1 if content_source else 0
+        else:
+            self.content_index = dict((k, i) for i, k in enumerate(content_source))
+            n_contents = len(content_source)
+        self.content_source = np.empty(n_contents, dtype=np.int32)
+        self.content_source.fill(-1)
+        for k, v in content_source.iteritems():
+            i = self.content_index[k] if self.content_index is not None else k
+            self.content_source[i] = v
                 
         # Initialize attributes
         for node in topology.nodes_iter():
@@ -361,10 +852,6 @@ class NetworkModel(object):
                     self.static_cache_size[node] = iround(self.cache_size[node]*0.99009901)
                     self.dynamic_cache_size[node] = self.cache_size[node] - self.static_cache_size[node]
                     #print "Cache Sizes: ",self.cache_size[node],self.static_cache_size[node],self.dynamic_cache_size[node]
-            elif stack_name == 'source':
-                contents = stack_props['contents']
-                for content in contents:
-                    self.content_source[content] = node
         if any(c < 1 for c in self.cache_size.values()):
             logger.warn('Some content caches have size equal to 0. '
                           'I am setting them to 1 and run the experiment anyway')
@@ -379,11 +866,179 @@ class NetworkModel(object):
         self.cache = {node: CACHE_POLICY[policy_name](self.cache_size[node], **policy_args)
                           for node in self.cache_size}
 
-        self.static_cache = {node: CACHE_POLICY['STATIC'](self.static_cache_size[node], **policy_args)
+        # Array-backed policies use an array-backed static tier as well
+        static_policy = 'STATIC_DENSE' if policy_name.endswith('_DENSE') else 'STATIC'
+        self.static_cache = {node: CACHE_POLICY[static_policy](self.static_cache_size[node], **policy_args)
                           for node in self.static_cache_size}
         self.dynamic_cache = {node: CACHE_POLICY[policy_name](self.dynamic_cache_size[node], **policy_args)
                           for node in self.dynamic_cache_size}
 
+        # Dictionary of Route objects keyed by (origin, destination), built on
+        # demand by NetworkView.route. Whatever the routing, strategies only
+        # build routes between receivers and sources or caching nodes, hence
+        # their number is bounded by twice the number of receivers times the
+        # number of sources and caching nodes, rather than by the square of
+        # the number of nodes. The same holds for path_delay
+        self.routes = {}
+
+        # Dictionary mapping each content to the set of nodes whose main cache
+        # stores it. It is updated by the controller and it never includes
+        # content sources
+        self.content_locations = {}
+
+    def link_number(self, u, v):
+        """Return the number of a link, which indexes the arrays of link
+        attributes
+
+        Parameters
+        ----------
+        u : any hashable type
+            Origin node
+        v : any hashable type
+            Destination node
+
+        Returns
+        -------
+        link : int
+            The number of link *(u, v)*
+        """
+        index = self.node_index
+        try:
+            return self.link_index[index[u]*len(self.nodes) + index[v]]
+        except KeyError:
+            raise KeyError((u, v))
+
+    def content_source_index(self, k):
+        """Return the number of the source node of a content
+
+        Parameters
+        ----------
+        k : any hashable type
+            The content identifier
+
+        Returns
+        -------
+        source : int
+            The index in *nodes* of the source of the content, or -1 if the
+            content has no source
+        """
+        if self.content_index is not None:
+            i = self.content_index.get(k, -1)
+        elif isinstance(k, numbers.Integral):
+            i = k
+        else:
+            return -1
+        if i < 0 or i >= len(self.content_source):
+            return -1
+        return self.content_source[i]
+
+    def is_source(self, node, k):
+        """Return whether a node is the source of a content
+
+        Parameters
+        ----------
+        node : any hashable type
+            The node
+        k : any hashable type
+            The content identifier
+
+        Returns
+        -------
+        is_source : bool
+            *True* if the node persistently stores the content, *False*
+            otherwise
+        """
+        source = self.content_source_index(k)
+        return source >= 0 and self.nodes[source] == node
+
+    def index_content_locations(self):
+        """Rebuild the index of content locations from the content of the
+        main caches.
+
+        This method only needs to be called after the caches have been
+        modified without going through a *NetworkController*, e.g. when they
+        are replaced by a saved copy.
+        """
+        self.content_locations = {}
+        for v, cache in self.cache.items():
+            for k in cache.dump():
+                self.content_locations.setdefault(k, set()).add(v)
+
+    def index_put(self, node, contents, evicted):
+        """Update the index of content locations after inserting contents in
+        the main cache of a node.
+
+        Parameters
+        ----------
+        node : any hashable type
+            The node whose cache was updated
+        contents : iterable
+            The contents that the cache was requested to store
+        evicted : iterable
+            The contents evicted by the cache
+        """
+        for k in evicted:
+            self.index_remove(node, k)
+        cache = self.cache[node]
+        for k in contents:
+            # Caches with selective insertion may not store the content
+            if cache.has(k):
+                self.content_locations.setdefault(k, set()).add(node)
+
+    def index_remove(self, node, k):
+        """Remove a content from the index of content locations of a node
+
+        Parameters
+        ----------
+        node : any hashable type
+            The node whose cache no longer stores the content
+        k : any hashable type
+            The content identifier
+        """
+        nodes = self.content_locations.get(k)
+        if nodes is not None:
+            nodes.discard(node)
+            if not nodes:
+                del self.content_locations[k]
+
+class Session(object):
+    """State of the content retrieval being handled by a network controller.
+
+    A controller reuses a single session record for all the requests it
+    handles, resetting its fields in place when a new session starts.
+    """
+
+    __slots__ = ('timestamp', 'receiver', 'content', 'log', 'increment_count')
+
+    def __init__(self):
+        """Constructor. All the fields are cleared"""
+        self.reset(None, None, None, False)
+
+    def reset(self, timestamp, receiver, content, log, increment_count=True):
+        """Overwrite all the fields of the session
+
+        Parameters
+        ----------
+        timestamp : int
+            The timestamp of the session
+        receiver : any hashable type
+            The receiver node requesting a content
+        content : any hashable type
+            The content identifier requested by the receiver
+        log : bool
+            *True* if this session needs to be reported to the collector,
+            *False* otherwise
+        increment_count : bool, optional
+            If *False*, the start of the session is not reported to the
+            collector even if the session is logged
+        """
+        self.timestamp = timestamp
+        self.receiver = receiver
+        self.content = content
+        self.log = log
+        self.increment_count = increment_count
+
+
 class NetworkController(object):
     """Network controller
     
@@ -400,12 +1055,18 @@ class NetworkController(object):
         model : NetworkModel
             Instance of the network model
         """
+        # The session being handled, or None between sessions. It always
+        # refers to the same record, which is reset for each new session
         self.session = None
+        self._session = Session()
         self.model = model
-        self.collector = None
+        self.detach_collector()
     
     def attach_collector(self, collector):
         """Attaches a data collector to which all events will be reported.
+
+        Events the collector does not listen to, according to its *listens*
+        method if it has one, are not reported at all.
         
         Parameters
         ----------
@@ -413,11 +1074,32 @@ class NetworkController(object):
             The data collector
         """
         self.collector = collector
+        self._set_listeners(getattr(collector, 'listens', lambda event: True))
         
     def detach_collector(self):
         """Detaches the data collector.
         """
         self.collector = None
+        self._set_listeners(lambda event: False)
+
+    def _set_listeners(self, listens):
+        """Set which events are reported to the collector
+
+        Parameters
+        ----------
+        listens : callable
+            Function returning whether the collector listens to an event,
+            given the name of the event
+        """
+        self._log_start_session = listens('start_session')
+        self._log_end_session = listens('end_session')
+        self._log_cache_hit = listens('cache_hit')
+        self._log_cache_miss = listens('cache_miss')
+        self._log_server_hit = listens('server_hit')
+        self._log_request_hop = listens('request_hop')
+        self._log_content_hop = listens('content_hop')
+        self._log_request_path = listens('request_path')
+        self._log_content_path = listens('content_path')
     
     def start_session(self, timestamp, receiver, content, log, increment_count=True):
         """Instruct the controller to start a new session (i.e. the retrieval
@@ -435,12 +1117,9 @@ class NetworkController(object):
             *True* if this session needs to be reported to the collector,
             *False* otherwise
         """
-        self.session = dict(timestamp=timestamp,
-                            receiver=receiver,
-                            content=content,
-                            log=log,
-                            increment_count=increment_count)
-        if self.collector is not None and self.session['log'] and self.session['increment_count']:
+        self._session.reset(timestamp, receiver, content, log, increment_count)
+        self.session = self._session
+        if self._log_start_session and log and increment_count:
             self.collector.start_session(timestamp, receiver, content)
     
     def forward_request_path(self, s, t, path=None, main_path=True):
@@ -453,10 +1132,13 @@ class NetworkController(object):
         t : any hashable type
             Destination node
         path : list, optional
-            The path to use. If not provided, shortest path is used
+            The path to use. If not provided, shortest path is used and
+            reported to the collector at once
         """
         if path is None:
-            path = self.model.shortest_path[s][t]
+            if self._log_request_path and self.session.log:
+                self.collector.request_path(s, t, self._n_hops(s, t))
+            return
         for u, v in path_links(path):
             self.forward_request_hop(u, v)
     
@@ -470,13 +1152,28 @@ class NetworkController(object):
         t : any hashable type
             Destination node
         path : list, optional
-            The path to use. If not provided, shortest path is used
+            The path to use. If not provided, shortest path is used and
+            reported to the collector at once
         """
         if path is None:
-            path = self.model.shortest_path[u][v]
+            if self._log_content_path and self.session.log:
+                self.collector.content_path(u, v, self._n_hops(u, v))
+            return
         for u, v in path_links(path):
             self.forward_content_hop(u, v)
     
+    def _n_hops(self, s, t):
+        """Return the number of hops of the shortest path from *s* to *t*,
+        taking it from the route memoised by the strategy, in either
+        direction since shortest paths are symmetric, if there is one"""
+        routes = self.model.routes
+        route = routes.get((s, t))
+        if route is None:
+            route = routes.get((t, s))
+        if route is None:
+            return len(self.model.shortest_path[s][t]) - 1
+        return len(route) - 1
+
     def forward_request_hop(self, u, v, main_path=True):
         """Forward a request over link  u -> v.
                 
@@ -487,7 +1184,7 @@ class NetworkController(object):
         v : any hashable type
             Destination node
         """
-        if self.collector is not None and self.session['log']:
+        if self._log_request_hop and self.session.log:
             self.collector.request_hop(u, v, main_path)
     
     def forward_content_hop(self, u, v, main_path=True):
@@ -500,7 +1197,7 @@ class NetworkController(object):
         v : any hashable type
             Destination node
         """
-        if self.collector is not None and self.session['log']:
+        if self._log_content_hop and self.session.log:
             self.collector.content_hop(u, v, main_path)
     
     def put_content(self, node):
@@ -521,8 +1218,14 @@ class NetworkController(object):
         evicted : any hashable type
             The evicted object or *None* if no contents were evicted.
         """
-        if node in self.model.cache:
-            return self.model.cache[node].put(self.session['content'])
+        cache = self.model.cache.get(node)
+        if cache is not None:
+            content = self.session.content
+            evicted = cache.put(content)
+            # Some policies return False rather than None if nothing is evicted
+            self.model.index_put(node, (content,),
+                                  () if evicted is None or evicted is False else (evicted,))
+            return evicted
     
     def get_content(self, node):
         """Get a content from a server or a cache.
@@ -537,22 +1240,21 @@ class NetworkController(object):
         content : bool
             True if the content is available, False otherwise
         """
-        if node in self.model.cache:
-            cache_hit = self.model.cache[node].get(self.session['content'])
+        session = self.session
+        cache = self.model.cache.get(node)
+        if cache is not None:
+            cache_hit = cache.get(session.content)
             if cache_hit:
-                if self.session['log']:
+                if self._log_cache_hit and session.log:
                     self.collector.cache_hit(node)
-            else:
-                if self.session['log']:
-                    self.collector.cache_miss(node)
+            elif self._log_cache_miss and session.log:
+                self.collector.cache_miss(node)
             return cache_hit
-        name, props = fnss.get_stack(self.model.topology, node)
-        if name == 'source' and self.session['content'] in props['contents']:
-            if self.collector is not None and self.session['log']:
+        if self.model.is_source(node, session.content):
+            if self._log_server_hit and session.log:
                 self.collector.server_hit(node)
             return True
-        else:
-            return False
+        return False
 
     def put_static_content(self, node):
         """Store content in the specified node.
@@ -572,8 +1274,9 @@ class NetworkController(object):
         evicted : any hashable type
             The evicted object or *None* if no contents were evicted.
         """
-        if node in self.model.static_cache:
-            return self.model.static_cache[node].put(self.session['content'])
+        cache = self.model.static_cache.get(node)
+        if cache is not None:
+            return cache.put(self.session.content)
     
     def get_static_content(self, node):
         """Get a content from a server or a cache.
@@ -588,22 +1291,21 @@ class NetworkController(object):
         content : bool
             True if the content is available, False otherwise
         """
-        if node in self.model.static_cache:
-            cache_hit = self.model.static_cache[node].get(self.session['content'])
+        session = self.session
+        cache = self.model.static_cache.get(node)
+        if cache is not None:
+            cache_hit = cache.get(session.content)
             if cache_hit:
-                if self.session['log']:
+                if self._log_cache_hit and session.log:
                     self.collector.cache_hit(node)
-            else:
-                if self.session['log']:
-                    self.collector.cache_miss(node)
+            elif self._log_cache_miss and session.log:
+                self.collector.cache_miss(node)
             return cache_hit
-        name, props = fnss.get_stack(self.model.topology, node)
-        if name == 'source' and self.session['content'] in props['contents']:
-            if self.collector is not None and self.session['log']:
+        if self.model.is_source(node, session.content):
+            if self._log_server_hit and session.log:
                 self.collector.server_hit(node)
             return True
-        else:
-            return False
+        return False
 
     def put_dynamic_content(self, node):
         """Store content in the specified node.
@@ -623,8 +1325,9 @@ class NetworkController(object):
         evicted : any hashable type
             The evicted object or *None* if no contents were evicted.
         """
-        if node in self.model.dynamic_cache:
-            return self.model.dynamic_cache[node].put(self.session['content'])
+        cache = self.model.dynamic_cache.get(node)
+        if cache is not None:
+            return cache.put(self.session.content)
     
     def get_dynamic_content(self, node):
         """Get a content from a server or a cache.
@@ -639,22 +1342,21 @@ class NetworkController(object):
         content : bool
             True if the content is available, False otherwise
         """
-        if node in self.model.dynamic_cache:
-            cache_hit = self.model.dynamic_cache[node].get(self.session['content'])
+        session = self.session
+        cache = self.model.dynamic_cache.get(node)
+        if cache is not None:
+            cache_hit = cache.get(session.content)
             if cache_hit:
-                if self.session['log']:
+                if self._log_cache_hit and session.log:
                     self.collector.cache_hit(node)
-            else:
-                if self.session['log']:
-                    self.collector.cache_miss(node)
+            elif self._log_cache_miss and session.log:
+                self.collector.cache_miss(node)
             return cache_hit
-        name, props = fnss.get_stack(self.model.topology, node)
-        if name == 'source' and self.session['content'] in props['contents']:
-            if self.collector is not None and self.session['log']:
+        if self.model.is_source(node, session.content):
+            if self._log_server_hit and session.log:
                 self.collector.server_hit(node)
             return True
-        else:
-            return False
+        return False
 
     def remove_content(self, node):
         """Remove the content being handled from the cache
@@ -669,8 +1371,52 @@ class NetworkController(object):
         removed : bool
             *True* if the entry was in the cache, *False* if it was not.
         """
-        if node in self.model.cache:
-            return self.model.cache[node].remove(self.session['content'])
+        cache = self.model.cache.get(node)
+        if cache is not None:
+            content = self.session.content
+            removed = cache.remove(content)
+            if removed:
+                self.model.index_remove(node, content)
+            return removed
+
+    def load_placement(self, placement, tier='main'):
+        """Preload caches with a static content placement.
+
+        Differently from *put_content* and its variants, this method does not
+        require an open session and it is not reported to the collector. All
+        the contents assigned to a node are inserted with a single bulk call
+        to its cache.
+
+        Parameters
+        ----------
+        placement : dict
+            Dictionary mapping each node to the sequence (e.g. a list or a
+            numpy array) of contents to store in its cache. Nodes without a
+            cache are ignored
+        tier : str, optional
+            The cache tier to load: *main*, *static* or *dynamic*
+
+        Returns
+        -------
+        evicted : dict
+            Dictionary mapping each loaded node to the list of contents evicted
+            while loading it
+        """
+        caches = {'main':    self.model.cache,
+                  'static':  self.model.static_cache,
+                  'dynamic': self.model.dynamic_cache}
+        if tier not in caches:
+            raise ValueError('tier must be one of %s' % ', '.join(sorted(caches)))
+        caches = caches[tier]
+        evicted = dict((v, caches[v].put_many(contents))
+                       for v, contents in placement.items() if v in caches)
+        if tier == 'main':
+            for v in evicted:
+                contents = placement[v]
+                if hasattr(contents, 'tolist'):
+                    contents = contents.tolist()
+                self.model.index_put(v, contents, evicted[v])
+        return evicted
 
     def end_session(self, success=True):
         """Close a session
@@ -680,7 +1426,7 @@ class NetworkController(object):
         success : bool, optional
             *True* if the session was completed successfully, *False* otherwise
         """
-        if self.collector is not None and self.session['log']:
+        if self._log_end_session and self.session.log:
             self.collector.end_session(success)
         self.session = None
 
@@ -0,0 +1,181 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+
+import fnss
+
+from icarus.execution import NetworkModel, NetworkView, NetworkController, \
+                             CollectorProxy, CacheHitRatioCollector, \
+                             LinkLoadCollector, LatencyCollector, \
+                             PathStretchCollector, TestCollector
+
+
+class CollectorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # 0 ---- 1 ---- 2, with link 1-2 external
+        topology = fnss.line_topology(3)
+        fnss.set_delays_constant(topology, 1, 'ms')
+        topology.edge[0][1]['type'] = 'internal'
+        topology.edge[1][2]['type'] = 'external'
+        fnss.add_stack(topology, 0, 'receiver', {})
+        fnss.add_stack(topology, 1, 'router', {'cache_size': 200})
+        fnss.add_stack(topology, 2, 'source', {'contents': range(1, 11)})
+        self.model = NetworkModel(topology, cache_policy={'name': 'LRU'})
+        self.view = NetworkView(self.model)
+
+    def session(self, collector, timestamp, hops):
+        collector.start_session(timestamp, 0, 1)
+        for u, v in zip(hops[:-1], hops[1:]):
+            collector.request_hop(u, v)
+        for u, v in zip(hops[::-1][:-1], hops[::-1][1:]):
+            collector.content_hop(u, v)
+        collector.end_session()
+
+
+class TestLinkLoadCollector(CollectorTestCase):
+
+    def test_results(self):
+        collector = LinkLoadCollector(self.view, sr=2)
+        self.session(collector, 0, [0, 1, 2])
+        self.session(collector, 2, [0, 1])
+        self.session(collector, 4, [0, 1, 2])
+        results = collector.results()
+        # Content hops travel on (1, 0) and (2, 1), which carry no requests
+        self.assertEqual({(0, 1): 0.75}, results['PER_LINK_INTERNAL'])
+        self.assertEqual({(1, 2): 0.5}, results['PER_LINK_EXTERNAL'])
+        self.assertEqual(0.75, results['MEAN_INTERNAL'])
+        self.assertEqual(0.5, results['MEAN_EXTERNAL'])
+        self.assertNotIn('PER_LINK_SERIES', results)
+
+    def test_no_external_links(self):
+        collector = LinkLoadCollector(self.view)
+        self.session(collector, 0, [0, 1])
+        self.session(collector, 1, [0, 1])
+        results = collector.results()
+        self.assertEqual({}, results['PER_LINK_EXTERNAL'])
+        self.assertEqual(0, results['MEAN_EXTERNAL'])
+
+    def test_series(self):
+        collector = LinkLoadCollector(self.view, sr=2, interval=2)
+        self.session(collector, 1, [0, 1, 2])
+        self.session(collector, 2.5, [0, 1])
+        self.session(collector, 6, [0, 1, 2])
+        results = collector.results()
+        self.assertEqual(2, results['INTERVAL'])
+        self.assertEqual({(0, 1): [1.0, 0.0, 0.5],
+                          (1, 2): [0.5, 0.0, 0.5]},
+                         results['PER_LINK_SERIES'])
+        self.assertEqual({(0, 1): 0.6}, results['PER_LINK_INTERNAL'])
+
+
+class TestSketchCollectors(CollectorTestCase):
+
+    def test_latency(self):
+        plain = LatencyCollector(self.view, cdf=True)
+        sketch = LatencyCollector(self.view, cdf=True, sketch=True)
+        for collector in (plain, sketch):
+            for hops in ([0, 1, 2], [0, 1], [0, 1], [0, 1, 2], [0, 1]):
+                self.session(collector, 0, hops)
+        plain, sketch = plain.results(), sketch.results()
+        self.assertEqual(plain['MEAN'], sketch['MEAN'])
+        self.assertEqual(2, sketch['P50'])
+        self.assertEqual(4, sketch['P99'])
+        self.assertEqual(5, sketch['HISTOGRAM'].count)
+        self.assertEqual(plain['CDF'][0].tolist(), sketch['CDF'][0].tolist())
+        self.assertEqual(plain['CDF'][1].tolist(), sketch['CDF'][1].tolist())
+
+    def test_path_stretch(self):
+        collector = PathStretchCollector(self.view, sketch=True)
+        self.session(collector, 0, [0, 1, 2])
+        results = collector.results()
+        for suffix in ('', '_REQUEST', '_CONTENT'):
+            self.assertEqual(1, results['HISTOGRAM' + suffix].count)
+            self.assertAlmostEqual(2/3., results['P50' + suffix], delta=0.01)
+        self.assertNotIn('CDF', results)
+
+    def test_path_stretch_mean_only(self):
+        collector = PathStretchCollector(self.view)
+        self.session(collector, 0, [0, 1, 2])
+        results = collector.results()
+        self.assertAlmostEqual(2/3., results['MEAN'])
+        self.assertNotIn('HISTOGRAM', results)
+
+
+class TestPathEvents(CollectorTestCase):
+
+    def test_path_delay(self):
+        self.assertEqual(2, self.view.path_delay(0, 2))
+        self.assertEqual(0, self.view.path_delay(1, 1))
+
+    def test_forward_paths(self):
+        link_load = LinkLoadCollector(self.view, sr=1)
+        latency = LatencyCollector(self.view)
+        controller = NetworkController(self.model)
+        controller.attach_collector(CollectorProxy(self.view,
+                                                   [link_load, latency]))
+        controller.start_session(0, 0, 1, log=True)
+        controller.forward_request_path(0, 2)
+        controller.forward_content_path(2, 0)
+        controller.end_session()
+        # Link loads are counted hop by hop, latency on the whole path
+        index = link_load.link_index
+        for u, v in [(0, 1), (1, 2)]:
+            self.assertEqual(1, link_load.req_count[index[u][v]])
+            self.assertEqual(1, link_load.cont_count[index[v][u]])
+        self.assertEqual(4, latency.results()['MEAN'])
+
+    def test_forward_paths_memoised_route(self):
+        latency = LatencyCollector(self.view)
+        controller = NetworkController(self.model)
+        controller.attach_collector(CollectorProxy(self.view, [latency]))
+        self.view.route(0, 2)
+        # Once the route is built, paths are not looked up anymore
+        self.model.shortest_path = {}
+        controller.start_session(0, 0, 1, log=True)
+        controller.forward_request_path(0, 2)
+        controller.forward_content_path(2, 0)
+        controller.end_session()
+        self.assertEqual(4, latency.results()['MEAN'])
+
+
+class TestListeners(CollectorTestCase):
+
+    def test_proxy_dispatch(self):
+        hit_ratio = CacheHitRatioCollector(self.view)
+        link_load = LinkLoadCollector(self.view)
+        proxy = CollectorProxy(self.view, [hit_ratio, link_load])
+        self.assertEqual([hit_ratio], proxy.collectors['cache_hit'])
+        self.assertEqual([link_load], proxy.collectors['request_hop'])
+        self.assertEqual([], proxy.collectors['request_path'])
+        self.assertEqual([link_load], proxy.request_path_hops)
+        self.assertTrue(proxy.listens('request_path'))
+        self.assertFalse(CollectorProxy(self.view, [hit_ratio]).listens('request_path'))
+
+    def test_controller_short_circuit(self):
+        controller = NetworkController(self.model)
+        controller.attach_collector(CollectorProxy(self.view,
+                    [CacheHitRatioCollector(self.view)]))
+        self.assertTrue(controller._log_cache_hit)
+        self.assertFalse(controller._log_request_hop)
+        self.assertFalse(controller._log_content_path)
+        controller.detach_collector()
+        self.assertFalse(controller._log_cache_hit)
+
+    def test_plain_collector(self):
+        collector = TestCollector(self.view)
+        self.assertTrue(collector.listens('request_path'))
+        self.assertFalse(collector.listens('results'))
+        controller = NetworkController(self.model)
+        controller.attach_collector(collector)
+        controller.start_session(0, 0, 1, log=True)
+        controller.forward_request_path(0, 2)
+        controller.end_session()
+        self.assertEqual([(0, 1), (1, 2)],
+                         collector.session_summary()['request_hops'])
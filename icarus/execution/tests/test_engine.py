@@ -0,0 +1,167 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+import os
+import shutil
+import tempfile
+
+import fnss
+import numpy as np
+
+from icarus.execution import exec_experiment
+from icarus.models import Strategy
+from icarus.registry import STRATEGY
+
+
+def topology():
+    """Return a line topology with one cache between receiver and source
+    """
+    # 0 ---- 1 ---- 2
+    topology = fnss.line_topology(3)
+    fnss.set_delays_constant(topology, 1, 'ms')
+    fnss.add_stack(topology, 0, 'receiver', {})
+    fnss.add_stack(topology, 1, 'router', {'cache_size': 200})
+    fnss.add_stack(topology, 2, 'source', {'contents': range(1, 501)})
+    return topology
+
+
+def workload(warmup, measured):
+    """Return a workload requesting the given contents from receiver 0"""
+    return [(t, {'receiver': 0, 'content': k, 'log': t >= len(warmup)})
+            for t, k in enumerate(list(warmup) + list(measured))]
+
+
+class BatchWorkload(object):
+    """Workload providing the same events one at a time and in batches"""
+
+    def __init__(self, events):
+        self.events = events
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def iter_batches(self, batch_size):
+        for start in range(0, len(self.events), batch_size):
+            events = self.events[start:start + batch_size]
+            yield (np.array([t for t, _ in events], dtype=float),
+                   np.array([e['receiver'] for _, e in events]),
+                   np.array([e['content'] for _, e in events]),
+                   np.array([e['log'] for _, e in events]))
+
+
+class RecordingStrategy(Strategy):
+    """Strategy recording the events it processes"""
+
+    events = []
+
+    def process_event(self, time, receiver, content, log):
+        self.events.append((time, {'receiver': receiver, 'content': content,
+                                   'log': log}))
+
+
+class CountingStrategy(Strategy):
+    """Strategy counting the events it processes, with a table rebuilt by
+    the constructor and excluded from warmup snapshots"""
+
+    _snapshot_exclude = Strategy._snapshot_exclude + ('table',)
+
+    def __init__(self, view, controller, **kwargs):
+        super(CountingStrategy, self).__init__(view, controller)
+        self.table = range(10)
+        self.count = 0
+
+    def process_event(self, time, receiver, content, log):
+        self.count += 1
+
+
+class TestWarmupSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.snapshot_dir = tempfile.mkdtemp()
+        self.snapshot = os.path.join(self.snapshot_dir, 'warmup.pickle')
+
+    def tearDown(self):
+        shutil.rmtree(self.snapshot_dir)
+
+    def run_experiment(self, workload, warmup_snapshot=None):
+        results = exec_experiment(topology(), workload, {}, {'name': 'NRR', 'metacaching': 'LCE'},
+                                  {'name': 'LRU'}, {'CACHE_HIT_RATIO': {}},
+                                  warmup_snapshot)
+        return results['CACHE_HIT_RATIO']['MEAN']
+
+    def test_save_resume(self):
+        measured = range(1, 21)
+        expected = self.run_experiment(workload(range(1, 11), measured))
+        self.assertEqual(0.5, expected)
+        self.assertEqual(expected, self.run_experiment(
+                workload(range(1, 11), measured), self.snapshot))
+        self.assertTrue(os.path.isfile(self.snapshot))
+        # Warmup events are skipped on resume, so a different warmup does not
+        # change the results
+        self.assertEqual(expected, self.run_experiment(
+                workload(range(21, 31), measured), self.snapshot))
+        self.assertEqual(0, self.run_experiment(
+                workload(range(21, 31), measured)))
+
+    def test_snapshot_state(self):
+        strategy = CountingStrategy(None, None)
+        strategy.count = 3
+        self.assertEqual({'count': 3}, strategy.snapshot_state())
+        strategy = CountingStrategy(None, None)
+        strategy.restore_state({'count': 3})
+        self.assertEqual(3, strategy.count)
+        self.assertEqual(range(10), strategy.table)
+
+
+class TestBatches(unittest.TestCase):
+
+    def setUp(self):
+        STRATEGY['TEST_RECORDING'] = RecordingStrategy
+        RecordingStrategy.events = []
+
+    def tearDown(self):
+        del STRATEGY['TEST_RECORDING']
+
+    def run_experiment(self, workload, strategy, batch_size=None,
+                       warmup_snapshot=None, collectors={}):
+        return exec_experiment(topology(), workload, {}, strategy,
+                               {'name': 'LRU'}, collectors, warmup_snapshot,
+                               batch_size)
+
+    def test_batches_match_events(self):
+        events = workload(range(1, 11), range(1, 21))
+        for batch_size in (None, 1, 4, 30):
+            RecordingStrategy.events = []
+            self.run_experiment(BatchWorkload(events),
+                                {'name': 'TEST_RECORDING'}, batch_size)
+            self.assertEqual(events, RecordingStrategy.events)
+
+    def test_batch_results(self):
+        events = workload(range(1, 11), range(1, 21))
+        strategy = {'name': 'NRR', 'metacaching': 'LCE'}
+        collectors = {'CACHE_HIT_RATIO': {}, 'LATENCY': {}}
+        expected = self.run_experiment(BatchWorkload(events), strategy,
+                                       collectors=collectors)
+        self.assertEqual(expected, self.run_experiment(
+                BatchWorkload(events), strategy, 4, collectors=collectors))
+
+    def test_split_batch_resume(self):
+        events = workload(range(1, 11), range(1, 21))
+        snapshot_dir = tempfile.mkdtemp()
+        try:
+            snapshot = os.path.join(snapshot_dir, 'warmup.pickle')
+            for _ in range(2):
+                RecordingStrategy.events = []
+                self.run_experiment(BatchWorkload(events),
+                                    {'name': 'TEST_RECORDING'}, 4, snapshot)
+            # Warmup events of the batch split at the warmup boundary are
+            # skipped on resume
+            self.assertEqual(events[10:], RecordingStrategy.events)
+        finally:
+            shutil.rmtree(snapshot_dir)
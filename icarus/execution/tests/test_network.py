@@ -0,0 +1,286 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.") 
+del sys
+import random
+
+import fnss
+import networkx as nx
+
+from icarus.execution import NetworkModel, NetworkView, NetworkController, \
+                             LazyShortestPaths, NextHopShortestPaths
+from icarus.execution.network import symmetrify_paths
+from icarus.models import ttl_cache
+
+
+def line_topology():
+    """Return a line topology with caches on all nodes except the source
+    """
+    # Topology sketch
+    #
+    # 0 ---- 1 ---- 2 ---- 3 ---- 4
+    #
+    topology = fnss.line_topology(5)
+    fnss.add_stack(topology, 4, 'source', {'contents': range(1, 101)})
+    for v in (1, 2, 3):
+        fnss.add_stack(topology, v, 'router', {'cache_size': 200})
+    fnss.add_stack(topology, 0, 'receiver', {})
+    return topology
+
+
+class TestContentLocations(unittest.TestCase):
+
+    def setUp(self):
+        self.model = NetworkModel(line_topology(), cache_policy={'name': 'LRU'})
+        self.view = NetworkView(self.model)
+        self.controller = NetworkController(self.model)
+
+    def scan(self, k):
+        """Return the locations of a content by querying all caches"""
+        loc = set(v for v, c in self.model.cache.items() if c.has(k))
+        loc.add(self.view.content_source(k))
+        return loc
+
+    def test_put_remove(self):
+        random.seed(5)
+        for _ in range(2000):
+            k = random.randint(1, 20)
+            v = random.choice((1, 2, 3))
+            self.controller.start_session(0, 0, k, False)
+            if random.random() < 0.8:
+                self.controller.put_content(v)
+            else:
+                self.controller.remove_content(v)
+            self.controller.end_session()
+            for k in range(1, 21):
+                self.assertEqual(self.view.content_locations(k), self.scan(k))
+
+    def test_load_placement(self):
+        self.controller.load_placement({1: range(1, 250), 2: [3, 4], 4: [5]})
+        for k in range(1, 21):
+            self.assertEqual(self.view.content_locations(k), self.scan(k))
+        self.assertEqual(self.view.content_locations(4), set([2, 4]))
+        self.assertEqual(self.view.content_locations(60), set([1, 4]))
+
+    def test_prune_expired(self):
+        now = [0]
+        self.model.cache[2] = ttl_cache(self.model.cache[2], lambda: now[0])
+        self.model.cache[2].put(7, ttl=10)
+        self.model.index_put(2, [7], [])
+        self.assertEqual(self.view.content_locations(7), set([2, 4]))
+        now[0] = 20
+        self.assertEqual(self.view.content_locations(7), set([4]))
+        self.assertNotIn(7, self.model.content_locations)
+
+    def test_index_content_locations(self):
+        self.model.cache[2].put(7)
+        self.model.index_content_locations()
+        self.assertEqual(self.view.content_locations(7), set([2, 4]))
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        self.controller = NetworkController(
+                NetworkModel(line_topology(), cache_policy={'name': 'LRU'}))
+
+    def test_session_reused(self):
+        self.assertIsNone(self.controller.session)
+        self.controller.start_session(1, 0, 3, True)
+        session = self.controller.session
+        self.assertEqual((1, 0, 3, True), (session.timestamp, session.receiver,
+                                           session.content, session.log))
+        self.assertTrue(self.controller.get_content(4))
+        self.assertFalse(self.controller.get_content(1))
+        self.controller.end_session()
+        self.assertIsNone(self.controller.session)
+        self.controller.start_session(2, 0, 5, False, False)
+        self.assertIs(session, self.controller.session)
+        self.assertEqual(5, session.content)
+        self.assertFalse(session.increment_count)
+        self.assertRaises(AttributeError, setattr, session, 'serving_node', 4)
+        self.controller.end_session()
+
+
+class TestDenseIndex(unittest.TestCase):
+
+    def test_link_attributes(self):
+        topology = line_topology()
+        fnss.set_delays_constant(topology, 2, 'ms', [(0, 1)])
+        fnss.set_delays_constant(topology, 5, 'ms', [(1, 2), (2, 3), (3, 4)])
+        topology.edge[3][4]['type'] = 'external'
+        for u, v in [(0, 1), (1, 2), (2, 3)]:
+            topology.edge[u][v]['type'] = 'internal'
+        model = NetworkModel(topology, cache_policy={'name': 'LRU'})
+        view = NetworkView(model)
+        # One entry per direction of each link
+        self.assertEqual(8, len(model.link_delay))
+        self.assertEqual(2, view.link_delay(0, 1))
+        self.assertEqual(2, view.link_delay(1, 0))
+        self.assertEqual(5, view.link_delay(4, 3))
+        self.assertEqual('internal', view.link_type(2, 1))
+        self.assertEqual('external', view.link_type(4, 3))
+        self.assertRaises(KeyError, view.link_delay, 0, 2)
+        self.assertRaises(KeyError, view.link_type, 0, 4)
+        self.assertEqual((0, 2, 7, 12, 17), view.route(0, 4).delays)
+
+    def test_content_source_integers(self):
+        model = NetworkModel(line_topology(), cache_policy={'name': 'LRU'})
+        view = NetworkView(model)
+        self.assertIsNone(model.content_index)
+        for k in range(1, 101):
+            self.assertEqual(4, view.content_source(k))
+        self.assertRaises(KeyError, view.content_source, 0)
+        self.assertRaises(KeyError, view.content_source, -1)
+        self.assertRaises(KeyError, view.content_source, 101)
+
+    def test_get_content_source(self):
+        model = NetworkModel(line_topology(), cache_policy={'name': 'LRU'})
+        controller = NetworkController(model)
+        controller.start_session(0, 0, 5, False)
+        self.assertTrue(controller.get_content(4))
+        self.assertFalse(controller.get_content(0))
+        controller.end_session()
+        controller.start_session(0, 0, 101, False)
+        self.assertFalse(controller.get_content(4))
+        controller.end_session()
+        self.assertTrue(model.is_source(4, 100))
+        self.assertFalse(model.is_source(3, 100))
+        self.assertFalse(model.is_source(4, 'a'))
+
+    def test_content_source_strings(self):
+        topology = fnss.line_topology(3)
+        fnss.add_stack(topology, 0, 'source', {'contents': ['a', 'b']})
+        fnss.add_stack(topology, 2, 'source', {'contents': ['c', 10**9]})
+        fnss.add_stack(topology, 1, 'router', {'cache_size': 200})
+        model = NetworkModel(topology, cache_policy={'name': 'LRU'})
+        view = NetworkView(model)
+        self.assertIsNotNone(model.content_index)
+        self.assertEqual(0, view.content_source('a'))
+        self.assertEqual(0, view.content_source('b'))
+        self.assertEqual(2, view.content_source('c'))
+        self.assertEqual(2, view.content_source(10**9))
+        self.assertRaises(KeyError, view.content_source, 'd')
+
+
+class TestRoute(unittest.TestCase):
+
+    def setUp(self):
+        topology = line_topology()
+        for u, v in topology.edges_iter():
+            topology.edge[u][v]['delay'] = u + v
+        self.model = NetworkModel(topology, cache_policy={'name': 'LRU'})
+        self.view = NetworkView(self.model)
+
+    def test_route(self):
+        route = self.view.route(0, 4)
+        self.assertEqual(route.path, (0, 1, 2, 3, 4))
+        self.assertEqual(len(route), 5)
+        self.assertEqual(route.links, [(0, 1), (1, 2), (2, 3), (3, 4)])
+        self.assertEqual(route.hops, ((0, 1, True), (1, 2, True),
+                                      (2, 3, True), (3, 4, False)))
+        self.assertEqual(route.cache_hops, (0, 1, 2))
+        self.assertEqual(route.delays, (0, 1, 4, 9, 16))
+        self.assertIs(route, self.view.route(0, 4))
+
+    def test_reverse(self):
+        route = self.view.route(0, 2)
+        reverse = route.reverse
+        self.assertEqual(reverse.path, (2, 1, 0))
+        self.assertEqual(reverse.hops, ((2, 1, True), (1, 0, False)))
+        self.assertEqual(reverse.delays, (0, 3, 4))
+        self.assertIs(reverse.reverse, route)
+        self.assertIs(reverse, self.view.route(2, 0))
+
+    def test_cache_space(self):
+        route = self.view.route(0, 4)
+        self.assertEqual((600, 600, 400, 200, 0), route.cache_space)
+        self.assertEqual((600, 600, 400, 200, 0), route.reverse.cache_space)
+        self.assertEqual((400, 400, 200), self.view.route(0, 2).cache_space)
+
+
+class TestLazyShortestPaths(unittest.TestCase):
+
+    def assert_same_paths(self, topology, max_trees=None):
+        expected = symmetrify_paths(nx.all_pairs_dijkstra_path(topology))
+        paths = LazyShortestPaths(topology, max_trees=max_trees)
+        self.assertEqual(set(paths), set(expected))
+        nodes = topology.nodes()
+        random.shuffle(nodes)
+        for s in nodes:
+            for t in nodes:
+                self.assertEqual(paths[s][t], expected[s][t])
+        if max_trees is not None:
+            self.assertLessEqual(len(paths._trees), max_trees)
+
+    def test_symmetric_paths(self):
+        random.seed(6)
+        # Grids and unweighted graphs have many equal-cost paths, which
+        # symmetrify_paths must break in the same way
+        for topology in (fnss.Topology(nx.grid_2d_graph(4, 5)),
+                         fnss.Topology(nx.connected_watts_strogatz_graph(40, 4, 0.3, seed=1)),
+                         fnss.line_topology(6)):
+            self.assert_same_paths(topology)
+            self.assert_same_paths(topology, max_trees=3)
+
+    def test_weighted_paths(self):
+        topology = fnss.Topology(nx.connected_watts_strogatz_graph(30, 4, 0.3, seed=2))
+        for u, v in topology.edges_iter():
+            topology.edge[u][v]['weight'] = (u * v) % 7 + 1
+        self.assert_same_paths(topology, max_trees=5)
+
+    def test_missing_node(self):
+        paths = LazyShortestPaths(fnss.line_topology(3))
+        self.assertRaises(KeyError, paths.__getitem__, 3)
+        self.assertRaises(KeyError, paths[0].__getitem__, 3)
+        self.assertRaises(ValueError, LazyShortestPaths, fnss.line_topology(3), 0)
+
+    def test_model(self):
+        model = NetworkModel(line_topology(), cache_policy={'name': 'LRU'},
+                             routing='LAZY', max_trees=2)
+        self.assertEqual(NetworkView(model).shortest_path(4, 0), [4, 3, 2, 1, 0])
+        self.assertRaises(ValueError, NetworkModel, line_topology(),
+                          cache_policy={'name': 'LRU'}, routing='UNKNOWN')
+
+
+class TestNextHopShortestPaths(unittest.TestCase):
+
+    def assert_same_paths(self, topology):
+        expected = symmetrify_paths(nx.all_pairs_dijkstra_path(topology))
+        paths = NextHopShortestPaths(topology)
+        self.assertEqual(set(paths), set(expected))
+        self.assertEqual(paths.next_hop.shape, (len(topology),) * 2)
+        for s in topology:
+            for t in topology:
+                self.assertEqual(paths[s][t], expected[s][t])
+                self.assertEqual(list(paths.iter_path(s, t)), expected[s][t])
+
+    def test_symmetric_paths(self):
+        for topology in (fnss.Topology(nx.grid_2d_graph(4, 5)),
+                         fnss.Topology(nx.connected_watts_strogatz_graph(40, 4, 0.3, seed=1)),
+                         fnss.line_topology(6)):
+            self.assert_same_paths(topology)
+
+    def test_weighted_paths(self):
+        topology = fnss.Topology(nx.connected_watts_strogatz_graph(30, 4, 0.3, seed=2))
+        for u, v in topology.edges_iter():
+            topology.edge[u][v]['weight'] = (u * v) % 7 + 1
+        self.assert_same_paths(topology)
+
+    def test_disconnected(self):
+        topology = fnss.line_topology(3)
+        topology.add_edge(3, 4)
+        paths = NextHopShortestPaths(topology)
+        self.assertEqual(paths[3][4], [3, 4])
+        self.assertRaises(KeyError, paths[0].__getitem__, 4)
+        self.assertRaises(KeyError, paths[4].__getitem__, 0)
+
+    def test_model(self):
+        model = NetworkModel(line_topology(), cache_policy={'name': 'LRU'},
+                             routing='NEXT_HOP')
+        self.assertEqual(NetworkView(model).shortest_path(4, 0), [4, 3, 2, 1, 0])
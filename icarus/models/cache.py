@@ -4,6 +4,8 @@ This module contains the implementations of all the cache replacement policies
 provided by Icarus.
 """
 from collections import deque
+from array import array
+import heapq
 import random
 import abc
 import copy
@@ -16,13 +18,18 @@ from icarus.registry import register_cache_policy
 
 __all__ = [
         'LinkedSet',
+        'DenseLinkedSet',
         'Cache',
         'NullCache',
         'LruCache',
-	'StaticCache',
+        'DenseLruCache',
+        'StaticCache',
+        'DenseStaticCache',
         'SegmentedLruCache',
         'LfuCache',
+        'PerfectLfuCache',
         'FifoCache',
+        'DenseFifoCache',
         'RandEvictionCache',
         'rand_insert_cache',
         'keyval_cache',
@@ -114,7 +121,32 @@ class LinkedSet(object):
         while cur:
             yield cur.val
             cur = cur.up
-    
+
+    def __getstate__(self):
+        """Return the state of the set for pickling and copying.
+
+        The set is serialized as a plain list of its items, from top to
+        bottom, because pickling the linked nodes directly recurses once per
+        node and fails on large sets.
+
+        Returns
+        -------
+        state : dict
+            Dictionary whose *items* entry lists the items of the set from
+            top to bottom
+        """
+        return {'items': list(self)}
+
+    def __setstate__(self, state):
+        """Restore the state of the set from a list of items
+
+        Parameters
+        ----------
+        state : dict
+            The state returned by *__getstate__*
+        """
+        self.__init__(state['items'])
+
     def __str__(self):
         """Return a string representation of the set
         
@@ -445,6 +477,421 @@ class LinkedSet(object):
         self._map.clear()
 
 
+class DenseLinkedSet(object):
+    """A doubly-linked set whose links are stored in arrays of C integers.
+
+    This class provides the same interface and time complexity as
+    *LinkedSet*, but no object is allocated per item. Each item is assigned a
+    slot, i.e. an index in the arrays storing the slots of the items above and
+    below it, and a single dictionary maps items to their slots. Slots of
+    removed items are reused, so the arrays only grow up to the largest number
+    of items ever stored at the same time.
+    """
+    # Marker of the end of the list in the link arrays
+    _NIL = -1
+
+    def __init__(self, iterable=[], n=0):
+        """Constructor
+
+        Parameters
+        ----------
+        iterable : iterable type
+            An iterable type to inizialize the data structure.
+            It must contain only one instance of each element
+        n : int, optional
+            The number of slots preallocated, i.e. the number of items that
+            can be stored without resizing the arrays. Arrays are resized
+            automatically when more items are inserted
+        """
+        self._up = array('i', [self._NIL])*n
+        self._down = array('i', [self._NIL])*n
+        self._item = [None]*n
+        # Slot of each item in the set
+        self._slot = {}
+        # Slots released by removed items, and number of slots ever used
+        self._free = []
+        self._used = 0
+        self._top = self._NIL
+        self._bottom = self._NIL
+        if iterable:
+            if len(set(iterable)) < len(iterable):
+                raise ValueError('The iterable parameter contains repeated '
+                                 'elements')
+            for i in iterable:
+                self.append_bottom(i)
+
+    def _assign(self, k):
+        """Assign a free slot to item *k* and return it"""
+        if k in self._slot:
+            raise KeyError('The item %s is already in the set' % str(k))
+        if self._free:
+            s = self._free.pop()
+        else:
+            s = self._used
+            self._used += 1
+            if s == len(self._item):
+                self._up.append(self._NIL)
+                self._down.append(self._NIL)
+                self._item.append(None)
+        self._slot[k] = s
+        self._item[s] = k
+        return s
+
+    def _release(self, s):
+        """Remove the item in slot *s*, which must be unlinked, and return
+        it"""
+        k = self._item[s]
+        self._item[s] = None
+        del self._slot[k]
+        self._free.append(s)
+        return k
+
+    def _unlink(self, s):
+        """Detach slot *s* from its neighbours"""
+        up, down = self._up[s], self._down[s]
+        if up == self._NIL:
+            self._top = down
+        else:
+            self._down[up] = down
+        if down == self._NIL:
+            self._bottom = up
+        else:
+            self._up[down] = up
+
+    def _link_top(self, s):
+        """Link the unlinked slot *s* at the top of the list"""
+        self._up[s] = self._NIL
+        self._down[s] = self._top
+        if self._top == self._NIL:
+            self._bottom = s
+        else:
+            self._up[self._top] = s
+        self._top = s
+
+    def _link_bottom(self, s):
+        """Link the unlinked slot *s* at the bottom of the list"""
+        self._up[s] = self._bottom
+        self._down[s] = self._NIL
+        if self._bottom == self._NIL:
+            self._top = s
+        else:
+            self._down[self._bottom] = s
+        self._bottom = s
+
+    def _link_above(self, i, s):
+        """Link the unlinked slot *s* above the linked slot *i*"""
+        up = self._up[i]
+        if up == self._NIL:
+            return self._link_top(s)
+        self._up[s] = up
+        self._down[s] = i
+        self._down[up] = s
+        self._up[i] = s
+
+    def _link_below(self, i, s):
+        """Link the unlinked slot *s* below the linked slot *i*"""
+        down = self._down[i]
+        if down == self._NIL:
+            return self._link_bottom(s)
+        self._up[s] = i
+        self._down[s] = down
+        self._up[down] = s
+        self._down[i] = s
+
+    def _slot_of(self, k):
+        """Return the slot of item *k*, which must be in the set"""
+        s = self._slot.get(k)
+        if s is None:
+            raise KeyError('Item %s not in the set' % str(k))
+        return s
+
+    def __len__(self):
+        """Return the number of elements in the linked set
+
+        Returns
+        -------
+        len : int
+            The length of the set
+        """
+        return len(self._slot)
+
+    def __iter__(self):
+        """Return an iterator over the set
+
+        Returns
+        -------
+        reversed : iterator
+            An iterator over the set
+        """
+        down, item = self._down, self._item
+        cur = self._top
+        while cur != self._NIL:
+            yield item[cur]
+            cur = down[cur]
+
+    def __reversed__(self):
+        """Return a reverse iterator over the set
+
+        Returns
+        -------
+        reversed : iterator
+            A reverse iterator over the set
+        """
+        up, item = self._up, self._item
+        cur = self._bottom
+        while cur != self._NIL:
+            yield item[cur]
+            cur = up[cur]
+
+    def __getstate__(self):
+        """Return the state of the set for pickling and copying.
+
+        The set is serialized as a plain list of its items, from top to
+        bottom, as *LinkedSet*.
+
+        Returns
+        -------
+        state : dict
+            The state of the set
+        """
+        return {'items': list(self), 'n': len(self._item)}
+
+    def __setstate__(self, state):
+        """Restore the state of the set from a list of items
+
+        Parameters
+        ----------
+        state : dict
+            The state returned by *__getstate__*
+        """
+        self.__init__(state['items'], state['n'])
+
+    def __str__(self):
+        """Return a string representation of the set
+
+        Returns
+        -------
+        str : str
+            A string representation of the set
+        """
+        return self.__class__.__name__ + "([" + "".join("%s, " % str(i) for i in self)[:-2] + "])"
+
+    def __contains__(self, k):
+        """Return whether the set contains a given item
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to search
+
+        Returns
+        -------
+        contains : bool
+            *True* if the set contains the item, *False* otherwise
+        """
+        return k in self._slot
+
+    @property
+    def top(self):
+        """Return the item at the top of the set
+
+        Returns
+        -------
+        top : any hashable type
+            The item at the top or *None* if the set is empty
+        """
+        return self._item[self._top] if self._top != self._NIL else None
+
+    @property
+    def bottom(self):
+        """Return the item at the bottom of the set
+
+        Returns
+        -------
+        bottom : any hashable type
+            The item at the bottom or *None* if the set is empty
+        """
+        return self._item[self._bottom] if self._bottom != self._NIL else None
+
+    def pop_top(self):
+        """Pop the item at the top of the set
+
+        Returns
+        -------
+        top : any hashable type
+            The item at the top or *None* if the set is empty
+        """
+        s = self._top
+        if s == self._NIL:
+            return None
+        self._unlink(s)
+        return self._release(s)
+
+    def pop_bottom(self):
+        """Pop the item at the bottom of the set
+
+        Returns
+        -------
+        bottom : any hashable type
+            The item at the bottom or *None* if the set is empty
+        """
+        s = self._bottom
+        if s == self._NIL:
+            return None
+        self._unlink(s)
+        return self._release(s)
+
+    def append_top(self, k):
+        """Append an item at the top of the set
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to append
+        """
+        self._link_top(self._assign(k))
+
+    def append_bottom(self, k):
+        """Append an item at the bottom of the set
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to append
+        """
+        self._link_bottom(self._assign(k))
+
+    def move_up(self, k):
+        """Move a specified item one position up in the set
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to move up
+        """
+        s = self._slot_of(k)
+        up = self._up[s]
+        if up == self._NIL:
+            return
+        self._unlink(s)
+        self._link_above(up, s)
+
+    def move_down(self, k):
+        """Move a specified item one position down in the set
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to move down
+        """
+        s = self._slot_of(k)
+        down = self._down[s]
+        if down == self._NIL:
+            return
+        self._unlink(s)
+        self._link_below(down, s)
+
+    def move_to_top(self, k):
+        """Move a specified item to the top of the set
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to move to the top
+        """
+        s = self._slot_of(k)
+        if self._top == s:
+            return
+        self._unlink(s)
+        self._link_top(s)
+
+    def move_to_bottom(self, k):
+        """Move a specified item to the bottom of the set
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to move to the bottom
+        """
+        s = self._slot_of(k)
+        if self._bottom == s:
+            return
+        self._unlink(s)
+        self._link_bottom(s)
+
+    def insert_above(self, i, k):
+        """Insert an item one position above a given item already in the set
+
+        Parameters
+        ----------
+        i : any hashable type
+            The item of the set above which the new item is inserted
+        k : any hashable type
+            The item to insert
+        """
+        if k in self._slot:
+            raise KeyError('Item %s already in the set' % str(k))
+        self._link_above(self._slot_of(i), self._assign(k))
+
+    def insert_below(self, i, k):
+        """Insert an item one position below a given item already in the set
+
+        Parameters
+        ----------
+        i : any hashable type
+            The item of the set below which the new item is inserted
+        k : any hashable type
+            The item to insert
+        """
+        if k in self._slot:
+            raise KeyError('Item %s already in the set' % str(k))
+        self._link_below(self._slot_of(i), self._assign(k))
+
+    def index(self, k):
+        """Return index of a given element.
+
+        This operation has a O(n) time complexity, with n being the size of the
+        set.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item whose index is queried
+
+        Returns
+        -------
+        index : int
+            The index of the item
+        """
+        if k not in self._slot:
+            raise KeyError('The item %s is not in the set' % str(k))
+        for index, item in enumerate(self):
+            if item == k:
+                return index
+
+    def remove(self, k):
+        """Remove an item from the set
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to remove
+        """
+        s = self._slot_of(k)
+        self._unlink(s)
+        self._release(s)
+
+    def clear(self):
+        """Empty the set"""
+        n = len(self._item)
+        self._item = [None]*n
+        self._slot.clear()
+        self._free = []
+        self._used = 0
+        self._top = self._NIL
+        self._bottom = self._NIL
+
+
 class Cache(object):
     """Base implementation of a cache object"""
     
@@ -583,6 +1030,35 @@ class Cache(object):
         """
         raise NotImplementedError('This method is not implemented')
 
+    def put_many(self, contents):
+        """Insert a sequence of items in the cache in a single call.
+
+        The resulting state of the cache is the same as if *put* was called
+        for each item in order, but the per-item overhead is lower. This is
+        meant to be used to preload caches with a static placement.
+
+        Parameters
+        ----------
+        contents : iterable
+            The items to be inserted, e.g. a list or a numpy array
+
+        Returns
+        -------
+        evicted : list
+            The list of items evicted while inserting the contents
+        """
+        if hasattr(contents, 'tolist'):
+            # Iterating over numpy arrays yields numpy scalars which are much
+            # slower to hash than plain Python objects
+            contents = contents.tolist()
+        put = self.put
+        evicted = []
+        for k in contents:
+            v = put(k)
+            if v is not None and v is not False:
+                evicted.append(v)
+        return evicted
+
     @abc.abstractmethod
     def remove(self, k):
         """Remove an item from the cache, if present.
@@ -835,6 +1311,22 @@ class LruCache(Cache):
     def clear(self):
         pass
 
+@register_cache_policy('LRU_DENSE')
+class DenseLruCache(LruCache):
+    """Least Recently Used (LRU) cache eviction policy with array-backed
+    storage.
+
+    This cache behaves exactly as *LruCache*, but it stores items in a
+    *DenseLinkedSet*, hence without allocating an object per item.
+    """
+
+    @inheritdoc(Cache)
+    def __init__(self, maxlen, **kwargs):
+        super(DenseLruCache, self).__init__(maxlen, **kwargs)
+        # One more slot than maxlen, since an item is inserted before evicting
+        self._cache = DenseLinkedSet(n=self._maxlen + 1)
+
+
 @register_cache_policy('STATIC')
 class StaticCache(Cache):
     """Static cache eviction policy.
@@ -918,7 +1410,22 @@ class StaticCache(Cache):
             return None
         # if content not in cache append it on top
         return False if len(self._cache) > self._maxlen else self._cache.append_top(k)
-        
+
+    @inheritdoc(Cache)
+    def put_many(self, contents):
+        if hasattr(contents, 'tolist'):
+            contents = contents.tolist()
+        cache = self._cache
+        maxlen = self._maxlen
+        # Same admission rule as put, without the per-item call overhead.
+        # Static caches never evict, hence nothing is ever returned
+        for k in contents:
+            if k in cache:
+                cache.move_to_top(k)
+            elif len(cache) <= maxlen:
+                cache.append_top(k)
+        return []
+
     @inheritdoc(Cache)
     def remove(self, k):
         return False
@@ -927,6 +1434,21 @@ class StaticCache(Cache):
     def clear(self):
         self._cache.clear()
 
+@register_cache_policy('STATIC_DENSE')
+class DenseStaticCache(StaticCache):
+    """Static cache eviction policy with array-backed storage.
+
+    This cache behaves exactly as *StaticCache*, but it stores items in a
+    *DenseLinkedSet*, hence without allocating an object per item.
+    """
+
+    @inheritdoc(Cache)
+    def __init__(self, maxlen, **kwargs):
+        super(DenseStaticCache, self).__init__(maxlen, **kwargs)
+        # One more slot than maxlen, since an item is inserted before evicting
+        self._cache = DenseLinkedSet(n=self._maxlen + 1)
+
+
 @register_cache_policy('SLRU')
 class SegmentedLruCache(Cache):
     """Segmented Least Recently Used (LRU) cache eviction policy.
@@ -1092,23 +1614,44 @@ class LfuCache(Cache):
     counters are increased when the associated item is requested. Upon
     insertion of a new item, the cache evicts the one which was requested the
     least times in the past, i.e. the one whose associated value has the
-    smallest value.
+    smallest value. Ties are broken in favour of evicting the item that was
+    inserted first.
     
     This is an implementation of an In-Cache-LFU, i.e. a cache that keeps
     counters for items only as long as they are in cache and resets the
     counter of an item when it is evicted. This is different from a Perfect-LFU
-    policy in which a counter is maintained also when the content is evicted.
+    policy in which a counter is maintained also when the content is evicted
+    (see *PerfectLfuCache*).
     
     In contrast to LRU, LFU has been shown to perform optimally under IRM
-    demands. However, its implementation is computationally expensive since it
-    cannot be implemented in such a way that both search and replacement tasks
-    can be executed in constant time. This makes it particularly unfit for
-    large caches and line speed operations.
+    demands. Items are grouped in buckets by request count and the non-empty
+    buckets are kept in a doubly linked list sorted by count, whose head is
+    the bucket of least requested items, so that the eviction candidate is
+    found without scanning the cache and the next least requested bucket is
+    found in constant time after the head is emptied. Within a bucket items
+    are kept in a binary heap ordered by insertion time, because an item
+    reaching a count may have been inserted before items that reached it
+    earlier. Hence, search takes constant time while insertion and
+    replacement take *O(log b)*, with *b* being the number of items with the
+    same count.
     """
     
     @inheritdoc(Cache)
     def __init__(self, maxlen, **kwargs):
+        # Map items to (frequency, insertion time)
         self._cache = {}
+        # Map frequencies to heaps of (insertion time, item). Heaps may
+        # contain stale entries, which are discarded lazily
+        self._buckets = {}
+        # Map frequencies to the number of valid entries in their bucket
+        self._count = {}
+        # Doubly linked list of the frequencies of non-empty buckets, in
+        # ascending order, mapping each to the previous and next one (None at
+        # the ends). Its head is the lowest frequency, None if the cache is
+        # empty
+        self._prev_freq = {}
+        self._next_freq = {}
+        self._min_freq = None
         self.t = 0
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
@@ -1131,11 +1674,112 @@ class LfuCache(Cache):
     def has(self, k):
         return k in self._cache
 
+    def _link(self, freq, prev):
+        """Insert the frequency of a new bucket in the list of frequencies.
+
+        The list is walked from *prev*, a lower frequency in the list, or from
+        its head if *prev* is None, until the position of *freq* is found.
+        Callers pass the frequency immediately preceding *freq* whenever they
+        know it, so that no walk is needed.
+        """
+        nxt = self._min_freq if prev is None else self._next_freq[prev]
+        while nxt is not None and nxt < freq:
+            prev, nxt = nxt, self._next_freq[nxt]
+        self._prev_freq[freq] = prev
+        self._next_freq[freq] = nxt
+        if prev is None:
+            self._min_freq = freq
+        else:
+            self._next_freq[prev] = freq
+        if nxt is not None:
+            self._prev_freq[nxt] = freq
+
+    def _unlink(self, freq):
+        """Remove the frequency of an empty bucket from the list of
+        frequencies"""
+        prev = self._prev_freq.pop(freq)
+        nxt = self._next_freq.pop(freq)
+        if prev is None:
+            self._min_freq = nxt
+        else:
+            self._next_freq[prev] = nxt
+        if nxt is not None:
+            self._prev_freq[nxt] = prev
+
+    def _push(self, k, freq, t, prev=None):
+        """Add an item to the bucket of its frequency, creating the bucket
+        after frequency *prev* (see *_link*) if it does not exist"""
+        self._cache[k] = freq, t
+        if freq in self._buckets:
+            bucket = self._buckets[freq]
+            heapq.heappush(bucket, (t, k))
+            self._count[freq] += 1
+            # Rebuild heaps dominated by stale entries to bound their size
+            if len(bucket) > 2*self._count[freq] + 16:
+                cache = self._cache
+                bucket[:] = [(i, j) for i, j in bucket if cache.get(j) == (freq, i)]
+                heapq.heapify(bucket)
+        else:
+            self._buckets[freq] = [(t, k)]
+            self._count[freq] = 1
+            self._link(freq, prev)
+
+    def _release(self, freq):
+        """Decrease the number of items of a bucket, removing it if empty"""
+        self._count[freq] -= 1
+        if self._count[freq] == 0:
+            del self._buckets[freq]
+            del self._count[freq]
+            self._unlink(freq)
+
+    def _pull(self, k):
+        """Remove an item from its bucket, leaving a stale heap entry"""
+        freq, _ = self._cache.pop(k)
+        self._release(freq)
+
+    def _victim(self):
+        """Return the item to evict, i.e. the first inserted among the least
+        frequently used, without removing it"""
+        bucket = self._buckets[self._min_freq]
+        cache = self._cache
+        while cache.get(bucket[0][1]) != (self._min_freq, bucket[0][0]):
+            heapq.heappop(bucket)
+        return bucket[0][1]
+
+    def _increment(self, k):
+        """Increase the frequency of an item in cache by one"""
+        freq, t = self._cache[k]
+        # The bucket of the current frequency still holds the item, hence the
+        # new bucket, if any, is linked right after it
+        self._push(k, freq + 1, t, freq)
+        self._release(freq)
+
+    def _insert(self, k, freq):
+        """Insert an item not in cache with a given frequency, evicting the
+        least frequently used item if the cache is full.
+
+        Returns
+        -------
+        evicted : any hashable type
+            The evicted object or *None* if no contents were evicted.
+        """
+        self.t += 1
+        if len(self._cache) >= self._maxlen:
+            # The new item is the most recently inserted, hence it is evicted
+            # straight away if its frequency is lower than any other item
+            if freq < self._min_freq:
+                return k
+            evicted = self._victim()
+            self._pull(evicted)
+        else:
+            evicted = None
+        self._push(k, freq, self.t)
+        return evicted
+
     @inheritdoc(Cache)
     def get(self, k):
         if self.has(k):
-            freq, t = self._cache[k]
-            self._cache[k] = freq+1, t 
+            self._increment(k)
             return True
         else:
             return False
@@ -1143,18 +1787,13 @@ class LfuCache(Cache):
     @inheritdoc(Cache)
     def put(self, k):
         if not self.has(k):
-            self.t += 1
-            self._cache[k] = (1, self.t)
-            if len(self._cache) > self._maxlen:
-                evicted = min(self._cache, key=lambda x: self._cache[x])
-                del self._cache[evicted]
-                return evicted
+            return self._insert(k, 1)
         return None
     
     @inheritdoc(Cache)
     def remove(self, k):
         if k in self._cache:
-            self._cache.pop(k)
+            self._pull(k)
             return True
         else:
             return False
@@ -1162,7 +1801,68 @@ class LfuCache(Cache):
     @inheritdoc(Cache)
     def clear(self):
         self._cache.clear()
+        self._buckets.clear()
+        self._count.clear()
+        self._prev_freq.clear()
+        self._next_freq.clear()
+        self._min_freq = None
+
+
+@register_cache_policy('PERFECT_LFU')
+class PerfectLfuCache(LfuCache):
+    """Perfect Least Frequently Used (Perfect-LFU) cache implementation
+
+    Differently from an In-Cache-LFU (see *LfuCache*), this policy keeps a
+    request counter for every item ever requested, including items that are
+    not or no longer in cache. A counter is increased at every request of the
+    item, whether it is a hit or a miss, and an item is inserted in the cache
+    with the count of all its past requests.
+
+    Since counters are never discarded, the memory used by this policy grows
+    with the number of distinct items requested rather than with the cache
+    size. Inserting an item whose count has no bucket in cache walks the list
+    of counts from the lowest one, which is bounded by the number of distinct
+    counts in cache and is usually short.
+    """
+
+    @inheritdoc(Cache)
+    def __init__(self, maxlen, **kwargs):
+        super(PerfectLfuCache, self).__init__(maxlen, **kwargs)
+        # Map all requested items to their request count
+        self._counter = {}
 
+    def frequency(self, k):
+        """Return the number of times an item has been requested, whether it
+        is in cache or not.
+
+        This method does not change the internal state of the cache.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item looked up
+
+        Returns
+        -------
+        frequency : int
+            The request count of the item
+        """
+        return self._counter.get(k, 0)
+
+    @inheritdoc(Cache)
+    def get(self, k):
+        self._counter[k] = self._counter.get(k, 0) + 1
+        return super(PerfectLfuCache, self).get(k)
+
+    @inheritdoc(Cache)
+    def put(self, k):
+        if not self.has(k):
+            # Items inserted without being requested first count as requested
+            # once, as in an In-Cache-LFU
+            freq = max(self._counter.get(k, 0), 1)
+            self._counter[k] = freq
+            return self._insert(k, freq)
+        return None
 
 
 @register_cache_policy('FIFO')
@@ -1257,6 +1957,54 @@ class FifoCache(Cache):
         self._d.clear()
 
 
+@register_cache_policy('FIFO_DENSE')
+class DenseFifoCache(FifoCache):
+    """First In First Out (FIFO) cache eviction policy with array-backed
+    storage.
+
+    This cache behaves exactly as *FifoCache*, but it stores items in a
+    *DenseLinkedSet*, which replaces both the set and the queue of
+    *FifoCache*, hence without allocating an object per item. Differently
+    from *FifoCache*, computing the position of an item does not require
+    scanning the whole queue, but only the items inserted after it.
+    """
+
+    @inheritdoc(Cache)
+    def __init__(self, maxlen, **kwargs):
+        super(DenseFifoCache, self).__init__(maxlen, **kwargs)
+        # One more slot than maxlen, since an item is inserted before evicting
+        self._cache = DenseLinkedSet(n=self._maxlen + 1)
+        self._d = None
+
+    @inheritdoc(Cache)
+    def dump(self):
+        return list(self._cache)
+
+    @inheritdoc(FifoCache)
+    def position(self, k):
+        if k not in self._cache:
+            raise ValueError('The item %s is not in the cache' % str(k))
+        return self._cache.index(k)
+
+    @inheritdoc(Cache)
+    def put(self, k):
+        if k in self._cache:
+            return None
+        self._cache.append_top(k)
+        return self._cache.pop_bottom() if len(self._cache) > self._maxlen else None
+
+    @inheritdoc(Cache)
+    def remove(self, k):
+        if k not in self._cache:
+            return False
+        self._cache.remove(k)
+        return True
+
+    @inheritdoc(Cache)
+    def clear(self):
+        self._cache.clear()
+
+
 @register_cache_policy('RAND')
 class RandEvictionCache(Cache):
     """Random eviction cache implementation.
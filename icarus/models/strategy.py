@@ -4,7 +4,9 @@ from __future__ import division
 import random
 import abc
 import collections
+import itertools
 import math
+import os
 
 import networkx as nx
 import numpy as np
@@ -50,6 +52,11 @@ class Strategy(object):
     
     __metaclass__ = abc.ABCMeta
 
+    # Attributes not saved in warmup snapshots, either because they are not
+    # part of the state of the strategy or because the constructor already
+    # rebuilds them, e.g. by reading or memory-mapping a file
+    _snapshot_exclude = ('view', 'controller')
+
     def __init__(self, view, controller, **kwargs):
         """Constructor
         
@@ -88,6 +95,61 @@ class Strategy(object):
         raise NotImplementedError('The selected strategy must implement '
                                   'a process_event method')
 
+    def process_batch(self, time, receiver, content, log):
+        """Process a batch of events received from the simulation engine.
+
+        Events are provided as parallel arrays, the i-th event being described
+        by the i-th element of each array. This default implementation calls
+        *process_event* for each event in order. Strategies able to process
+        events in a vectorized fashion can override it.
+
+        Parameters
+        ----------
+        time : array
+            The timestamps of the events
+        receiver : array
+            The receiver nodes requesting a content
+        content : array
+            The content identifiers requested by the receivers
+        log : array
+            Indicates whether each event must be registered by the data
+            collectors attached to the network.
+        """
+        process_event = self.process_event
+        # Converting arrays to lists first makes elements plain Python objects
+        for event in itertools.izip(time.tolist(), receiver.tolist(),
+                                    content.tolist(), log.tolist()):
+            process_event(*event)
+
+    def snapshot_state(self):
+        """Return the state of the strategy to be saved in a warmup snapshot.
+
+        This default implementation returns all the attributes of the
+        strategy, except those listed in *_snapshot_exclude*. Strategies
+        holding large attributes that can be stored more compactly can
+        override it, together with *restore_state*.
+
+        Returns
+        -------
+        state : dict
+            The state of the strategy, which must be picklable
+        """
+        return dict((k, v) for k, v in self.__dict__.items()
+                    if k not in self._snapshot_exclude)
+
+    def restore_state(self, state):
+        """Restore the state of the strategy saved in a warmup snapshot.
+
+        The strategy is a new instance, hence the attributes not included in
+        the state keep the value set by the constructor.
+
+        Parameters
+        ----------
+        state : dict
+            The state returned by *snapshot_state*
+        """
+        self.__dict__.update(state)
+
 @register_strategy('HYBRID')
 class Hybrid(Strategy):
     """Hybrid strategy.
@@ -211,20 +273,17 @@ class Hybrid(Strategy):
                     
 
             #serving_node = 10
-            for r1 in range(self.static_cache_size):                
-                self.controller.start_session(time, receiver, cont[r1], log, False)
-                serving_node = 6#rec[r1]
-                self.controller.put_static_content(serving_node)
-                self.controller.end_session(False)
+            self.controller.load_placement({6: cont[:self.static_cache_size]},
+                                           tier='static')
 
 
-        path = self.view.shortest_path(receiver, source)
+        route = self.view.route(receiver, source)
 
         # Route requests to original source and queries caches on the path
         self.controller.start_session(time, receiver, content, log)
-        for u, v in path_links(path):
+        for u, v, has_cache in route.hops:
             self.controller.forward_request_hop(u, v)
-            if self.view.has_cache(v):
+            if has_cache:
                 if self.controller.get_static_content(v):
                     serving_node = v
                	    self.scount += 1
@@ -240,16 +299,16 @@ class Hybrid(Strategy):
             self.controller.get_dynamic_content(v)
             serving_node = v
         # Return content
-	hopcount = len(self.view.shortest_path(receiver, serving_node))
-        path = list(reversed(self.view.shortest_path(receiver, serving_node)))
+        route = self.view.route(receiver, serving_node)
+        hopcount = len(route)
 
         if self.count >= warm_up_count+1467699:# and ( not (serving_node == 10)):
             print self.scount, self.dcount
             #print '\nHyb: Request # %d, Serving node %d, Content %d, Receiver %d, Source %d, Path %s' % (self.count, serving_node, content, receiver, source, path)
 
-        for u, v in path_links(path):
-            self.controller.forward_content_hop(u, v)
-            if self.view.has_cache(v):
+        self.controller.forward_content_path(serving_node, receiver)
+        for u, v, has_cache in route.reverse.hops:
+            if has_cache:
                 # insert content
                 self.controller.put_dynamic_content(v)
 
@@ -322,12 +381,7 @@ class Optimal2Caching(Strategy):
                 columns = f.strip()
                 cont.append(int(columns))
 
-            for l in l1:
-                for c in cont:                
-                    self.controller.start_session(time, receiver, c, log, False)
-                    serving_node = l
-                    self.controller.put_content(serving_node)
-                    self.controller.end_session(False)
+            self.controller.load_placement(dict((l, cont) for l in l1))
 
             cont = []
             for f in f3:
@@ -335,12 +389,7 @@ class Optimal2Caching(Strategy):
                 columns = f.strip()
                 cont.append(int(columns))
 
-            for l in l2:
-                for c in cont:                
-                    self.controller.start_session(time, receiver, c, log, False)
-                    serving_node = l
-                    self.controller.put_content(serving_node)
-                    self.controller.end_session(False)
+            self.controller.load_placement(dict((l, cont) for l in l2))
 
             cont = []
             for f in f4:
@@ -348,12 +397,7 @@ class Optimal2Caching(Strategy):
                 columns = f.strip()
                 cont.append(int(columns))
 
-            for l in l3:
-                for c in cont:                
-                    self.controller.start_session(time, receiver, c, log, False)
-                    serving_node = l
-                    self.controller.put_content(serving_node)
-                    self.controller.end_session(False)
+            self.controller.load_placement(dict((l, cont) for l in l3))
 
             """columns = []
             rec = []
@@ -859,10 +903,10 @@ class LeaveCopyEverywhere(Strategy):
         self.sources = [10]
         #self.caches = [4, 55, 10, 21, 18, 49, 14, 35, 37, 22, 58, 20, 29, 59, 39, 31, 34, 36, 15, 46] #GARR
 
-        self.conts = []
+        self.conts = set()
         f1 = open('/home/adita/Greedy 08142017/youtube_traces/All traces/f15','r')
         for f in f1:
-            self.conts.append(int(f.rstrip()))
+            self.conts.add(int(f.rstrip()))
         print "LCE"
 	"""receivers = [27, 28, 3, 5, 4, 7, 9, 8, 11, 13, 12, 15, 14, 17, 16, 19, 18] #WIDE
 	sources = [10]#, 6, 20, 21, 22]#WIDE
@@ -881,7 +925,7 @@ class LeaveCopyEverywhere(Strategy):
                 if not self.view.cache_dump(v) == None:
                     print "LCE Cache Dump of ", v, self.count,(self.view.cache_dump(v))"""
 
-        path = self.view.shortest_path(receiver, source)
+        route = self.view.route(receiver, source)
 	nodes = [27, 28, 3, 5, 4, 7, 9, 8, 11, 13, 12, 15, 14, 17, 16, 19, 18] #WIDE
 	#nodes = [26, 20, 21, 11, 10, 19, 18, 37] #GEANT
 	#nodes = [54, 42, 48, 60, 52, 53, 24, 25, 26, 27, 23, 47, 28, 1, 0, 3, 2, 5, 8, 51, 11, 13, 12, 16, 19, 30, 50] #GARR
@@ -899,9 +943,9 @@ class LeaveCopyEverywhere(Strategy):
 	fo.close()"""
         # Route requests to original source and queries caches on the path
         self.controller.start_session(time, receiver, content, log)
-        for u, v in path_links(path):
+        for u, v, has_cache in route.hops:
             self.controller.forward_request_hop(u, v)
-            if self.view.has_cache(v):
+            if has_cache:
                 if self.controller.get_content(v):
                     serving_node = v
                     if v not in self.sources and self.count > warm_up_count and content in self.conts:
@@ -912,15 +956,15 @@ class LeaveCopyEverywhere(Strategy):
             self.controller.get_content(v)
             serving_node = v
         # Return content
-	hopcount = len(self.view.shortest_path(receiver, serving_node))
-        path = list(reversed(self.view.shortest_path(receiver, serving_node)))
+        route = self.view.route(receiver, serving_node)
+        hopcount = len(route)
         """for i in range(len(path)-1):
             print "LCE Link delay of %d - %d : %d" % (path[i], path[i+1], self.view.link_delay(path[i], path[i+1]))"""
         #if self.count > warm_up_count and ( not (serving_node == 10)):
             #print '\nLCE: Request # %d, Serving node %d, Content %d, Receiver %d, Source %d, Path %s' % (self.count, serving_node, content, receiver, source, path)
-        for u, v in path_links(path):
-            self.controller.forward_content_hop(u, v)
-            if self.view.has_cache(v):
+        self.controller.forward_content_path(serving_node, receiver)
+        for u, v, has_cache in route.reverse.hops:
+            if has_cache:
                 # insert content
                 self.controller.put_content(v)
 
@@ -942,6 +986,10 @@ class LeaveCopyEverywhere(Strategy):
 @register_strategy('OPTIMAL')
 class OptimalCaching(Strategy):
 
+    # The placement matrix is reopened from the current trace part and the
+    # contents read from file by the constructor
+    _snapshot_exclude = Strategy._snapshot_exclude + ('cache_mat', 'conts')
+
     @inheritdoc(Strategy)
     def __init__(self, view, controller, **kwargs):
         super(OptimalCaching, self).__init__(view, controller)
@@ -972,11 +1020,14 @@ class OptimalCaching(Strategy):
 	#print name5
 	self.name4 = str.join('%s'%name2,'%s'%name5)
 	#print name4
-	self.cache_mat = np.loadtxt(open('/home/adita/Greedy 08142017/Adita/GARR/All 1 lac/1/part1/%s.csv'%self.name4,"rb"),delimiter=",")
+	self.cache_mat = self._load_cache_mat(self._part_dir(1))
 	#self.cache_mat = np.loadtxt(open('/home/adita/Greedy 08142017/Adita/WIDE/test/1/%s.csv'%self.name4,"rb"),delimiter=",")
 	self.link = []
 	self.load = []
         self.actual_cont = []
+        # Map each content of the current placement part to its column in
+        # the placement matrix
+        self.actual_cont_index = {}
         self.hits = [None] * 581527
         self.delay = 0
         self.caches = [0,1,2,6,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,29] #WIDE
@@ -986,10 +1037,10 @@ class OptimalCaching(Strategy):
         #self.caches = [4, 55, 10, 21, 18, 49, 14, 35, 37, 22, 58, 20, 29, 59, 39, 31, 34, 36, 15, 46] #GARR
         #self.receivers = [1, 7, 8, 9, 11, 12, 19, 26, 28, 30, 32, 33, 41, 42, 43, 47, 48, 50, 53, 57, 60] #GARR
 
-        self.conts = []
+        self.conts = set()
         f1 = open('/home/adita/Greedy 08142017/youtube_traces/All traces/f15','r')
         for f in f1:
-            self.conts.append(int(f.rstrip()))
+            self.conts.add(int(f.rstrip()))
         print "Opt"
 	self.sources = [10]#, 6]#, 20, 21, 22]#WIDE
         print "Shortest Paths:"#, self.network_cache
@@ -998,6 +1049,48 @@ class OptimalCaching(Strategy):
                 print self.view.shortest_path(self.receivers[i], self.sources[j])
 
 
+    def _part_dir(self, part):
+        """Return the directory of a trace part, numbered from 1"""
+        return '/home/adita/Greedy 08142017/Adita/GARR/All 1 lac/1/part%d' % part
+
+    def _load_cache_mat(self, part_dir):
+        """Load the placement matrix of a trace part.
+
+        The dense CSV file is converted into a sparse bundle next to it the
+        first time it is read, and the bundle is memory-mapped afterwards.
+
+        Parameters
+        ----------
+        part_dir : str
+            The directory of the trace part
+
+        Returns
+        -------
+        cache_mat : PlacementMatrix
+            The placement matrix, with one row per node
+        """
+        path = os.path.join(part_dir, self.name4)
+        return icarus.cached_placement_matrix(path + '.csv', path)
+
+    @inheritdoc(Strategy)
+    def snapshot_state(self):
+        state = super(OptimalCaching, self).snapshot_state()
+        # Only the contents hit so far are saved
+        state['hits'] = dict((i, x) for i, x in enumerate(self.hits)
+                             if x is not None)
+        return state
+
+    @inheritdoc(Strategy)
+    def restore_state(self, state):
+        state = dict(state)
+        hits = [None] * len(self.hits)
+        for i, x in state.pop('hits').items():
+            hits[i] = x
+        state['hits'] = hits
+        super(OptimalCaching, self).restore_state(state)
+        # The matrix of the part in use, name_counter pointing to the next one
+        self.cache_mat = self._load_cache_mat(self._part_dir(self.name_counter - 1))
+
     @inheritdoc(Strategy)
     def process_event(self, time, receiver, content, log):
 	source = self.view.content_source(content)
@@ -1023,16 +1116,13 @@ class OptimalCaching(Strategy):
                 columns = [col.strip() for col in columns]
                 rec.append(int(columns[0]))
                 cont.append(int(columns[1])+1)
-            #serving_node = 10
-            for r1 in range(len(rec)):                
-                self.controller.start_session(time, receiver, cont[r1], log, False)
-                serving_node = rec[r1]
-                self.controller.put_content(serving_node)
-                self.controller.end_session(False)
+            placement = collections.defaultdict(list)
+            for r1 in range(len(rec)):
+                placement[rec[r1]].append(cont[r1])
+            self.controller.load_placement(placement)
 
         if self.change_counter == 100000 and self.count > warm_up_count and self.name_counter < 16:
-            file_name = '/home/adita/Greedy 08142017/Adita/GARR/All 1 lac/1/part'+str(self.name_counter)
-            self.cache_mat = np.loadtxt(open(file_name+'/%s.csv'%self.name4,"rb"),delimiter=",")
+            self.cache_mat = self._load_cache_mat(self._part_dir(self.name_counter))
             #self.cache_mat = np.loadtxt(open('/home/adita/Greedy 08142017/Adita/WIDE/test/2/%s.csv'%self.name4,"rb"),delimiter=",")
             name = '/home/adita/Greedy 08142017/Adita/GARR/All 1 lac/1/part'+str(self.name_counter)+'/matrix'+str(self.cache_size) #WIDE
             #name = '/home/adita/Greedy 08142017//Adita/WIDE/10939-1/matrix'+str(self.cache_size) #WIDE
@@ -1042,6 +1132,10 @@ class OptimalCaching(Strategy):
                 with open('/home/adita/Greedy 08142017/youtube_traces/All 1 lac/part'+str(self.name_counter)+'/unique_cont', 'r') as f:
                     for content in f:
                         self.actual_cont.append(int(content.rstrip()))
+            # If a content appears more than once, its first column is used
+            self.actual_cont_index = {}
+            for i, c in enumerate(self.actual_cont):
+                self.actual_cont_index.setdefault(c, i)
             f1 = open(name,'r')
             columns = []
             rec = []
@@ -1055,12 +1149,10 @@ class OptimalCaching(Strategy):
                     cont.append(self.actual_cont[int(columns[1])])
                 else:
                     cont.append(int(columns[1])+1)
-            #serving_node = 10
-            for r1 in range(len(rec)):                
-                self.controller.start_session(time, receiver, cont[r1], log, False)
-                serving_node = rec[r1]
-                self.controller.put_content(serving_node)
-                self.controller.end_session(False)
+            placement = collections.defaultdict(list)
+            for r1 in range(len(rec)):
+                placement[rec[r1]].append(cont[r1])
+            self.controller.load_placement(placement)
             print self.name_counter, self.count, self.change_counter
             self.change_counter = 0
             self.name_counter += 1
@@ -1093,22 +1185,21 @@ class OptimalCaching(Strategy):
                 #print "\nDelay:", self.delay
             #if self.count > warm_up_count and ( not (serving_node == 10)):
                 #print '\nOpt: Request # %d, Serving node %d, Content %d, Receiver %d, Source %d, Path %s' % (self.count, serving_node, content, receiver, source, path)
+            # Column of the content in the placement matrix, or None if the
+            # content is not in the matrix, hence not placed in any cache
+            if self.name_counter-1 >= 2 and self.name_counter-1 < 16:
+                if not isinstance(content,int):
+                    content = content.rstrip()
+                col = self.actual_cont_index.get(int(content))
+            else:
+                col = int(content-1)
             for i in range(0,len(path)-1):
 	        u = path[i]
 	        v = path[i+1]
-                cache_row = self.cache_mat[v][:]
                 self.controller.forward_content_hop(u, v)
                 self.delay = self.delay + self.view.link_delay(u, v)
-                if self.name_counter-1 >= 2 and self.name_counter-1 < 16:
-                    #print "Buggg", self.name_counter-1, content, self.count
-                    if not isinstance(content,int):
-                        content = content.rstrip()
-                    if cache_row[int(self.actual_cont.index(int(content)))] == 1:
-                        self.controller.put_content(v)
-                else:
-                    #print "Bugggg",content,self.count,self.change_counter
-                    if cache_row[int(content-1)] == 1:
-                        self.controller.put_content(v)
+                if col is not None and self.cache_mat.node_caches(v, col):
+                    self.controller.put_content(v)
                 #print v, cache_row[int(content-1)]
             self.change_counter += 1
 
@@ -1265,8 +1356,7 @@ class CharacteristicTime(Strategy):
             if s4 is not serving_node:
 	       content_id[index2] = content
 	       cache_id[index2] = serving_node
-	       pdf = icarus.TruncatedZipfDist(alpha,n).pdf
-	       charac_time1 = icarus.che_characteristic_time(pdf,cache_size,content)
+	       charac_time1 = icarus.che_characteristic_time_zipf(alpha,n,cache_size,content)
 	       #c_time1 = icarus.che_characteristic_time(pdf,cache_size)
 	       #charac_time1 = c_time1[0]
 	       charac_time[index2] = charac_time1
@@ -1371,8 +1461,7 @@ class CharacteristicTime(Strategy):
             if s4 is not serving_node:
 	       content_id[index2] = content
 	       cache_id[index2] = serving_node
-	       pdf = icarus.TruncatedZipfDist(alpha,n).pdf
-	       charac_time1 = icarus.che_characteristic_time(pdf,cache_size,content)
+	       charac_time1 = icarus.che_characteristic_time_zipf(alpha,n,cache_size,content)
 	       #c_time1 = icarus.che_characteristic_time(pdf,cache_size)
 	       #charac_time1 = c_time1[0]
 	       charac_time[index2] = charac_time1
@@ -1527,8 +1616,7 @@ class CharacteristicTimeLCE(Strategy):
             if s4 is not serving_node:
 	       content_id[index2] = content
 	       cache_id[index2] = serving_node
-	       pdf = icarus.TruncatedZipfDist(alpha,n).pdf
-	       charac_time1 = icarus.che_characteristic_time(pdf,cache_size,content)
+	       charac_time1 = icarus.che_characteristic_time_zipf(alpha,n,cache_size,content)
 	       #c_time1 = icarus.che_characteristic_time(pdf,cache_size)
 	       #charac_time1 = c_time1[0]
 	       charac_time[index2] = charac_time1
@@ -1641,8 +1729,7 @@ class CharacteristicTimeLCE(Strategy):
             if s4 is not serving_node:
 	       content_id[index2] = content
 	       cache_id[index2] = serving_node
-	       pdf = icarus.TruncatedZipfDist(alpha,n).pdf
-	       charac_time1 = icarus.che_characteristic_time(pdf,cache_size,content)
+	       charac_time1 = icarus.che_characteristic_time_zipf(alpha,n,cache_size,content)
 	       #c_time1 = icarus.che_characteristic_time(pdf,cache_size)
 	       #charac_time1 = c_time1[0]
 	       charac_time[index2] = charac_time1
@@ -1698,7 +1785,7 @@ class LeaveCopyDown(Strategy):
     def process_event(self, time, receiver, content, log):
         # get all required data
         source = self.view.content_source(content)
-        path = self.view.shortest_path(receiver, source)
+        route = self.view.route(receiver, source)
         #caches = [0,1,2,6,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,29]
         """for v in self.caches:
             if self.count == warm_up_count or self.count == warm_up_count+500000 or self.count == warm_up_count+1400000:
@@ -1731,9 +1818,9 @@ class LeaveCopyDown(Strategy):
             pass
 
         else:
-            for u, v in path_links(path):
+            for u, v, has_cache in route.hops:
                 self.controller.forward_request_hop(u, v)
-                if self.view.has_cache(v):
+                if has_cache:
                     if self.controller.get_content(v):
                         serving_node = v
                         if v not in self.sources and self.count > warm_up_count:
@@ -1744,16 +1831,16 @@ class LeaveCopyDown(Strategy):
                 self.controller.get_content(v)
                 serving_node = v
             # Return content
-	    hopcount = len(self.view.shortest_path(receiver, serving_node))
-            path = list(reversed(self.view.shortest_path(receiver, serving_node)))
+            route = self.view.route(receiver, serving_node)
+            hopcount = len(route)
             #if self.count > print_count:
                 #print '\nLCD: Request # %d, Serving node %d, Content %d, Receiver %d, Source %d, Path %s' % (self.count, serving_node, content, receiver, source, path)
             # Leave a copy of the content only in the cache one level down the hit
             # caching node
             copied = False
-            for u, v in path_links(path):
-                self.controller.forward_content_hop(u, v)
-                if not copied and v != receiver and self.view.has_cache(v):
+            self.controller.forward_content_path(serving_node, receiver)
+            for u, v, has_cache in route.reverse.hops:
+                if not copied and v != receiver and has_cache:
                     self.controller.put_content(v)
                     copied = True
 
@@ -1814,12 +1901,12 @@ class ProbCache(Strategy):
         self.hits = [None] * 581527
         self.caches = [4, 55, 10, 21, 18, 49, 14, 35, 37, 22, 58, 20, 29, 59, 39, 31, 34, 36, 15, 46] #GARR
         print "PC"
-    
+
     @inheritdoc(Strategy)
     def process_event(self, time, receiver, content, log):
         # get all required data
         source = self.view.content_source(content)
-        path = self.view.shortest_path(receiver, source)
+        route = self.view.route(receiver, source)
         #caches = [0,1,2,6,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,29]
         """for v in self.caches:
             if self.count == warm_up_count or self.count == warm_up_count+500000 or self.count == warm_up_count+1400000:
@@ -1852,11 +1939,9 @@ class ProbCache(Strategy):
             pass
 
         else:
-            for hop in range(1, len(path)):
-                u = path[hop - 1]
-                v = path[hop]
+            for u, v, has_cache in route.hops:
                 self.controller.forward_request_hop(u, v)
-                if self.view.has_cache(v):
+                if has_cache:
                     if self.controller.get_content(v):
                         serving_node = v
                         if v not in self.sources and self.count > warm_up_count:
@@ -1867,21 +1952,21 @@ class ProbCache(Strategy):
                 self.controller.get_content(v)
                 serving_node = v
             # Return content
-	    hopcount = len(self.view.shortest_path(receiver, serving_node))
-            path = list(reversed(self.view.shortest_path(receiver, serving_node)))
+            route = self.view.route(receiver, serving_node)
+            hopcount = len(route)
             #if self.count > print_count:
                 #print '\nProb: Request # %d, Serving node %d, Content %d, Receiver %d, Source %d, Path %s' % (self.count, serving_node, content, receiver, source, path)
-            c = len([v for v in path if self.view.has_cache(v)])
+            route = route.reverse
+            cache_space = route.cache_space
+            # Number of nodes of the route with a cache
+            c = len(route.cache_hops) + (route.path[0] in self.cache_size1)
             x = 0.0
-            for hop in range(1, len(path)):
-                u = path[hop - 1]
-                v = path[hop]    
-                N = sum([self.cache_size1[n] for n in path[hop - 1:]
-                         if n in self.cache_size1])
-                if v in self.cache_size1:
+            self.controller.forward_content_path(serving_node, receiver)
+            for hop, (u, v, has_cache) in enumerate(route.hops):
+                N = cache_space[hop]
+                if has_cache:
                     x += 1
-                self.controller.forward_content_hop(u, v)
-                if v != receiver and v in self.cache_size1:
+                if v != receiver and has_cache:
                     # The (x/c) factor raised to the power of "c" according to the
                     # extended version of ProbCache published in IEEE TPDS
                     prob_cache = float(N)/(self.t_tw * self.cache_size1[v])*(x/c)**c
@@ -1941,7 +2026,7 @@ class CacheLessForMore(Strategy):
     def process_event(self, time, receiver, content, log):
         # get all required data
         source = self.view.content_source(content)
-        path = self.view.shortest_path(receiver, source)
+        route = self.view.route(receiver, source)
         #caches = [0,1,2,6,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,29]
         """for v in self.caches:
             if self.count == warm_up_count or self.count == warm_up_count+500000 or self.count == warm_up_count+1400000:
@@ -1974,9 +2059,9 @@ class CacheLessForMore(Strategy):
             pass
 
         else:
-            for u, v in path_links(path):
+            for u, v, has_cache in route.hops:
                 self.controller.forward_request_hop(u, v)
-                if self.view.has_cache(v):
+                if has_cache:
                     if self.controller.get_content(v):
                         serving_node = v
                         if v not in self.sources and self.count > warm_up_count:
@@ -1987,8 +2072,8 @@ class CacheLessForMore(Strategy):
                 self.controller.get_content(v)
                 serving_node = v
             # Return content
-	    hopcount = len(self.view.shortest_path(receiver, serving_node))
-            path = list(reversed(self.view.shortest_path(receiver, serving_node)))
+            route = self.view.route(receiver, serving_node)
+            hopcount = len(route)
             #if self.count > print_count:
                 #print '\nCL4M: Request # %d, Serving node %d, Content %d, Receiver %d, Source %d, Path %s' % (self.count, serving_node, content, receiver, source, path)
             # get the cache with maximum betweenness centrality
@@ -1996,16 +2081,15 @@ class CacheLessForMore(Strategy):
             # closer to the receiver
             max_betw = -1
             designated_cache = None
-            for v in path[1:]:
-                if self.view.has_cache(v):
+            for _, v, has_cache in route.reverse.hops:
+                if has_cache:
                     if self.betw[v] >= max_betw:
                         max_betw = self.betw[v]
                         designated_cache = v
             # Forward content
-            for u, v in path_links(path):
-                self.controller.forward_content_hop(u, v)
-                if v == designated_cache:
-                    self.controller.put_content(v)
+            self.controller.forward_content_path(serving_node, receiver)
+            if designated_cache is not None:
+                self.controller.put_content(designated_cache)
 
 
         if self.count == warm_up_count + 1467699:
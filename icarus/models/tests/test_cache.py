@@ -9,10 +9,14 @@ else:
         raise ImportError("The unittest2 package is needed to run the tests.") 
 del sys
 import collections
+import copy
+import pickle
+import random
 
 import numpy as np
 
 import icarus.models as cache
+from icarus.registry import CACHE_POLICY
 
 class TestLinkedSet(unittest.TestCase):
     
@@ -220,6 +224,110 @@ class TestLinkedSet(unittest.TestCase):
         self.assertRaises(ValueError, cache.LinkedSet, iterable=[1, None, None])
         self.assertIsNotNone(cache.LinkedSet(iterable=[1, 0, None]))
 
+    def test_pickle(self):
+        c = cache.LinkedSet(range(10000))
+        d = pickle.loads(pickle.dumps(c, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(list(c), list(d))
+        self.assertTrue(self.link_consistency(d))
+        e = copy.deepcopy(cache.LinkedSet())
+        self.assertEqual(len(e), 0)
+        e.append_top(1)
+        self.assertEqual(list(e), [1])
+
+
+class TestDenseLinkedSet(unittest.TestCase):
+
+    def link_consistency(self, linked_set):
+        """Checks that links of a dense linked set are consistent iterating
+        from top or from bottom"""
+        return list(linked_set) == list(reversed(list(reversed(linked_set))))
+
+    def test_append(self):
+        c = cache.DenseLinkedSet()
+        c.append_top(1)
+        c.append_top(2)
+        c.append_bottom(0)
+        self.assertEqual(len(c), 3)
+        self.assertEqual(list(c), [2, 1, 0])
+        self.assertEqual(c.top, 2)
+        self.assertEqual(c.bottom, 0)
+        self.assertTrue(self.link_consistency(c))
+        self.assertRaises(KeyError, c.append_top, 2)
+        self.assertRaises(KeyError, c.append_bottom, 0)
+
+    def test_grow(self):
+        c = cache.DenseLinkedSet(n=2)
+        c.append_top(100)
+        c.append_top(1)
+        c.append_top(10**9)
+        self.assertTrue(100 in c)
+        self.assertFalse(99 in c)
+        self.assertFalse(1000 in c)
+        self.assertEqual(list(c), [10**9, 1, 100])
+        self.assertEqual(3, len(c._up))
+
+    def test_reuse_slots(self):
+        c = cache.DenseLinkedSet(n=4)
+        for k in range(10**6, 10**6 + 1000):
+            c.append_top(k)
+            if len(c) > 4:
+                c.pop_bottom()
+        self.assertEqual(range(10**6 + 999, 10**6 + 995, -1), list(c))
+        self.assertEqual(5, len(c._up))
+        c.clear()
+        self.assertEqual([], list(c))
+        c.append_bottom('a')
+        self.assertEqual(['a'], list(reversed(c)))
+
+    def test_init(self):
+        c = cache.DenseLinkedSet([3, 1, 2])
+        self.assertEqual(list(c), [3, 1, 2])
+        self.assertRaises(ValueError, cache.DenseLinkedSet, [1, 2, 1])
+
+    def test_pop(self):
+        c = cache.DenseLinkedSet([1, 2, 3])
+        self.assertEqual(c.pop_top(), 1)
+        self.assertEqual(c.pop_bottom(), 3)
+        self.assertEqual(c.pop_bottom(), 2)
+        self.assertEqual(c.pop_top(), None)
+        self.assertEqual(c.pop_bottom(), None)
+        self.assertEqual(len(c), 0)
+        self.assertEqual(c.top, None)
+        self.assertEqual(c.bottom, None)
+
+    def test_same_as_linked_set(self):
+        random.seed(1)
+        dense = cache.DenseLinkedSet()
+        ref = cache.LinkedSet()
+        for _ in range(3000):
+            k = random.randint(0, 30)
+            op = random.choice(['append_top', 'append_bottom', 'move_up',
+                                'move_down', 'move_to_top', 'move_to_bottom',
+                                'remove', 'pop_top', 'pop_bottom',
+                                'insert_above', 'insert_below', 'index'])
+            if op in ('pop_top', 'pop_bottom'):
+                self.assertEqual(getattr(dense, op)(), getattr(ref, op)())
+                continue
+            if op in ('insert_above', 'insert_below'):
+                if len(ref) == 0:
+                    continue
+                args = (random.choice(list(ref)), k)
+            else:
+                args = (k,)
+            try:
+                expected = getattr(ref, op)(*args)
+            except KeyError:
+                self.assertRaises(KeyError, getattr(dense, op), *args)
+            else:
+                self.assertEqual(getattr(dense, op)(*args), expected)
+            self.assertEqual(list(dense), list(ref))
+            self.assertEqual(len(dense), len(ref))
+            self.assertTrue(self.link_consistency(dense))
+        dense.clear()
+        self.assertEqual(len(dense), 0)
+        self.assertEqual(list(dense), [])
+        self.assertFalse(0 in dense)
+
 
 class TestCache(unittest.TestCase):
 
@@ -247,7 +355,23 @@ class TestCache(unittest.TestCase):
         c.do('DELETE', 2)
         self.assertFalse(c.do('GET', 2))
         self.assertEquals(c.dump(), [])
-    
+
+    def test_put_many(self):
+        c = cache.LruCache(3)
+        self.assertEquals(c.put_many([1, 2, 3, 4, 5]), [1, 2])
+        self.assertEquals(c.dump(), [5, 4, 3])
+        self.assertEquals(c.put_many(np.array([3, 6])), [4])
+        self.assertEquals(c.dump(), [6, 3, 5])
+
+    def test_put_many_static(self):
+        c = cache.StaticCache(4)
+        d = cache.StaticCache(4)
+        contents = [1, 2, 3, 2, 4, 5, 6, 7]
+        for k in contents:
+            c.put(k)
+        self.assertEquals(d.put_many(np.array(contents)), [])
+        self.assertEquals(c.dump(), d.dump())
+
 
 class TestLruCache(unittest.TestCase):
 
@@ -469,6 +593,75 @@ class TestFifoCache(unittest.TestCase):
         self.assertEqual(c.dump(), [4, 3, 1])
         
 
+class TestDenseLruCache(unittest.TestCase):
+
+    def test_same_as_lru(self):
+        random.seed(2)
+        dense = cache.DenseLruCache(8)
+        ref = cache.LruCache(8)
+        for _ in range(2000):
+            k = random.randint(0, 60)
+            if random.random() < 0.5:
+                self.assertEqual(dense.get(k), ref.get(k))
+            else:
+                self.assertEqual(dense.put(k), ref.put(k))
+            self.assertEqual(dense.dump(), ref.dump())
+        self.assertEqual(dense.position(ref.dump()[3]), 3)
+        # Arrays are sized by the cache size, not by the content identifiers
+        self.assertEqual(9, len(dense._cache._up))
+
+    def test_registered(self):
+        c = CACHE_POLICY['LRU_DENSE'](4)
+        self.assertIsInstance(c, cache.DenseLruCache)
+        c = CACHE_POLICY['STATIC_DENSE'](4)
+        self.assertIsInstance(c, cache.DenseStaticCache)
+
+
+class TestDenseFifoCache(unittest.TestCase):
+
+    def test_fifo(self):
+        c = cache.DenseFifoCache(4)
+        self.assertEquals(len(c), 0)
+        for k in (1, 2, 3, 4):
+            c.put(k)
+        self.assertEquals(len(c), 4)
+        self.assertEquals(c.dump(), [4, 3, 2, 1])
+        self.assertEquals(c.put(5), 1)
+        self.assertEquals(c.dump(), [5, 4, 3, 2])
+        c.get(2)
+        self.assertEquals(c.dump(), [5, 4, 3, 2])
+        self.assertEquals(c.put(4), None)
+        self.assertEquals(c.dump(), [5, 4, 3, 2])
+        self.assertEquals(c.position(3), 2)
+        self.assertRaises(ValueError, c.position, 1)
+        c.clear()
+        self.assertEquals(len(c), 0)
+        self.assertEquals(c.dump(), [])
+
+    def test_remove(self):
+        c = cache.DenseFifoCache(4)
+        c.put(1)
+        c.put(2)
+        c.put(3)
+        self.assertTrue(c.remove(2))
+        self.assertFalse(c.remove(2))
+        self.assertEqual(len(c), 2)
+        self.assertEqual(c.dump(), [3, 1])
+        c.put(4)
+        c.put(5)
+        self.assertEqual(c.dump(), [5, 4, 3, 1])
+
+    def test_same_as_fifo(self):
+        random.seed(3)
+        dense = cache.DenseFifoCache(8)
+        ref = cache.FifoCache(8)
+        for _ in range(2000):
+            k = random.randint(0, 60)
+            self.assertEqual(dense.get(k), ref.get(k))
+            self.assertEqual(dense.put(k), ref.put(k))
+            self.assertEqual(dense.dump(), ref.dump())
+
+
 class TestRandCache(unittest.TestCase):
     
     def test_rand(self):
@@ -558,6 +751,92 @@ class TestLfuCache(unittest.TestCase):
         c.remove(5)
         self.assertEqual(len(c), 3)
         self.assertEqual(c.dump(), [4, 3, 1])
+
+    def test_same_as_scan(self):
+        # Check eviction order against a cache scanning all items for the one
+        # with minimum (frequency, insertion time)
+        random.seed(4)
+        c = cache.LfuCache(10)
+        ref = {}
+        t = 0
+        for _ in range(5000):
+            k = random.randint(0, 40)
+            op = random.random()
+            if op < 0.6:
+                self.assertEqual(c.get(k), k in ref)
+                if k in ref:
+                    ref[k] = ref[k][0] + 1, ref[k][1]
+            elif op < 0.95:
+                evicted = None
+                if k not in ref:
+                    t += 1
+                    ref[k] = 1, t
+                    if len(ref) > 10:
+                        evicted = min(ref, key=lambda x: ref[x])
+                        del ref[evicted]
+                self.assertEqual(c.put(k), evicted)
+            else:
+                self.assertEqual(c.remove(k), ref.pop(k, None) is not None)
+            self.assertEqual(c.dump(), sorted(ref, key=lambda x: ref[x], reverse=True))
+
+    def test_frequency_list(self):
+        # Check that the list of frequencies is sorted and tracks non-empty
+        # buckets, also when items are inserted with arbitrary frequencies
+        random.seed(5)
+        c = cache.LfuCache(8)
+        for _ in range(3000):
+            k = random.randint(0, 20)
+            op = random.random()
+            if op < 0.5:
+                c.get(k)
+            elif op < 0.8:
+                c.put(k)
+            elif op < 0.9:
+                if not c.has(k):
+                    c._insert(k, random.randint(1, 30))
+            else:
+                c.remove(k)
+            freqs = []
+            f = c._min_freq
+            while f is not None:
+                freqs.append(f)
+                f = c._next_freq[f]
+            self.assertEqual(freqs, sorted(c._count))
+            self.assertEqual(sorted(c._prev_freq), freqs)
+            for prev, f in zip([None] + freqs, freqs):
+                self.assertEqual(c._prev_freq[f], prev)
+
+
+class TestPerfectLfuCache(unittest.TestCase):
+
+    def test_perfect_lfu(self):
+        c = cache.PerfectLfuCache(2)
+        for _ in range(3):
+            self.assertFalse(c.get(1))
+        self.assertFalse(c.get(2))
+        self.assertEqual(c.frequency(1), 3)
+        self.assertEqual(c.put(2), None)
+        self.assertEqual(c.put(3), None)
+        # Item 1 was requested more times than any item in cache
+        self.assertEqual(c.put(1), 2)
+        self.assertEqual(c.dump(), [1, 3])
+        self.assertTrue(c.get(3))
+        # Item 2 keeps its counter after eviction, but it is not enough to
+        # replace any item
+        self.assertEqual(c.put(2), 2)
+        self.assertFalse(c.has(2))
+        self.assertFalse(c.get(2))
+        self.assertFalse(c.get(2))
+        self.assertEqual(c.frequency(2), 3)
+        self.assertEqual(c.put(2), 3)
+        self.assertEqual(c.dump(), [2, 1])
+        c.clear()
+        self.assertEquals(len(c), 0)
+        self.assertEqual(c.frequency(1), 3)
+
+    def test_registered(self):
+        c = CACHE_POLICY['PERFECT_LFU'](4)
+        self.assertIsInstance(c, cache.PerfectLfuCache)
         
         
 class TestRandInsert(unittest.TestCase):
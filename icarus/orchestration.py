@@ -5,26 +5,41 @@ user-provided settings.
 """
 from __future__ import division
 import time
+import os
 import collections
 import multiprocessing as mp
 import logging
 import copy
+import hashlib
 import sys
 import signal
 import traceback
+import cPickle as pickle
 
-from icarus.execution import exec_experiment
+from icarus.execution import exec_experiment, build_shortest_paths
 from icarus.registry import TOPOLOGY_FACTORY, CACHE_PLACEMENT, CONTENT_PLACEMENT, \
                             CACHE_POLICY, WORKLOAD, DATA_COLLECTOR, STRATEGY
 from icarus.results import ResultSet
-from icarus.util import SequenceNumber, timestr
+from icarus.util import SequenceNumber, Tree, timestr
 
 
-__all__ = ['Orchestrator', 'run_scenario']
+__all__ = [
+    'Orchestrator',
+    'run_scenario',
+    'warmup_snapshot_path',
+    'topology_cache_path',
+    'load_topology',
+          ]
 
 
 logger = logging.getLogger('orchestration')
 
+# Topologies and shortest paths read or built by this process, keyed by the
+# path of their cache file, which depends on the replication index. The
+# orchestrator fills it before forking its workers, which then share it
+# copy-on-write
+_topology_cache = {}
+
 
 class Orchestrator(object):
     """Orchestrator.
@@ -53,7 +68,40 @@ class Orchestrator(object):
         self.summary_freq = summary_freq
         self._stop = False
         if self.settings.PARALLEL_EXECUTION:
+            self.preload_workloads()
+            if 'TOPOLOGY_CACHE_DIR' in self.settings:
+                self.prefetch_topologies()
             self.pool = mp.Pool(settings.N_PROCESSES)
+
+    def preload_workloads(self):
+        """Load the traces of all queued experiments whose workload provides a
+        *preload* method.
+
+        This is called before creating the pool of workers, which then share a
+        single copy of each trace instead of reading one each.
+        """
+        for experiment in self.settings.EXPERIMENT_QUEUE:
+            workload_spec = dict(experiment['workload'])
+            workload_name = workload_spec.pop('name', None)
+            workload = WORKLOAD.get(workload_name)
+            if hasattr(workload, 'preload'):
+                workload.preload(**workload_spec)
+
+    def prefetch_topologies(self):
+        """Load the topologies and shortest paths of all queued experiments
+        from the topology cache, building and caching those not found.
+
+        This is called before creating the pool of workers, which then inherit
+        them instead of reading them once per experiment.
+        """
+        for experiment in self.settings.EXPERIMENT_QUEUE:
+            topology_spec = experiment['topology']
+            if topology_spec['name'] not in TOPOLOGY_FACTORY:
+                continue
+            routing = experiment['netconf'].get('routing', 'ALL_PAIRS')
+            for replication in range(self.settings.N_REPLICATIONS):
+                load_topology(self.settings.TOPOLOGY_CACHE_DIR, topology_spec,
+                              routing, replication)
     
     def stop(self):
         """Stop the execution of the orchestrator
@@ -88,10 +136,10 @@ class Orchestrator(object):
             # Schedule experiments from the queue
             while queue:
                 experiment = queue.popleft()
-                for _ in range(self.settings.N_REPLICATIONS):
+                for replication in range(self.settings.N_REPLICATIONS):
                     job_queue.append(self.pool.apply_async(run_scenario,
                             args=(self.settings, experiment,
-                                  self.seq.assign(), self.n_exp),
+                                  self.seq.assign(), self.n_exp, replication),
                             callback=self.experiment_callback))
             self.pool.close()
             # This solution is probably not optimal, but at least makes
@@ -113,10 +161,10 @@ class Orchestrator(object):
         else: # Single-process execution
             while queue:
                 experiment = queue.popleft()
-                for _ in range(self.settings.N_REPLICATIONS):
+                for replication in range(self.settings.N_REPLICATIONS):
                     self.experiment_callback(run_scenario(self.settings, 
                                             experiment, self.seq.assign(),
-                                            self.n_exp))
+                                            self.n_exp, replication))
                     if self._stop:
                         self.stop()
 
@@ -155,7 +203,7 @@ class Orchestrator(object):
                         self.n_success, self.n_fail, n_scheduled, eta)
         
 
-def run_scenario(settings, params, curr_exp, n_exp):
+def run_scenario(settings, params, curr_exp, n_exp, replication=0):
     """Run a single scenario experiment
     
     Parameters
@@ -168,6 +216,8 @@ def run_scenario(settings, params, curr_exp, n_exp):
         sequence number of the experiment
     n_exp : int
         Number of scheduled experiments
+    replication : int, optional
+        Index of the replication of the experiment
     
     Returns
     -------
@@ -196,7 +246,14 @@ def run_scenario(settings, params, curr_exp, n_exp):
             logger.error('No topology factory implementation for %s was found.'
                          % topology_name)
             return None
-        topology = TOPOLOGY_FACTORY[topology_name](**topology_spec)
+        routing = tree['netconf'].get('routing', 'ALL_PAIRS')
+        shortest_path = None
+        if 'TOPOLOGY_CACHE_DIR' in settings:
+            topology, shortest_path = load_topology(settings.TOPOLOGY_CACHE_DIR,
+                                                    params['topology'], routing,
+                                                    replication)
+        else:
+            topology = TOPOLOGY_FACTORY[topology_name](**topology_spec)
         
         workload_spec = tree['workload']
         workload_name = workload_spec.pop('name')
@@ -246,6 +303,9 @@ def run_scenario(settings, params, curr_exp, n_exp):
         
         # Configuration parameters of network model
         netconf = tree['netconf']
+        if shortest_path is not None:
+            netconf = dict(netconf)
+            netconf['shortest_path'] = shortest_path
         
         # Text description of the scenario run to print on screen
         scenario = tree['desc'] if 'desc' in tree else "Description N/A"
@@ -258,8 +318,20 @@ def run_scenario(settings, params, curr_exp, n_exp):
     
         collectors = {m: {} for m in metrics}
 
+        warmup_snapshot = None
+        if 'WARMUP_CACHE_DIR' in settings:
+            warmup_snapshot = warmup_snapshot_path(settings.WARMUP_CACHE_DIR,
+                                                   params, replication)
+            if os.path.isfile(warmup_snapshot):
+                logger.info('Experiment %d/%d | Resuming from warmup snapshot %s',
+                            curr_exp, n_exp, warmup_snapshot)
+
+        batch_size = settings.BATCH_SIZE if 'BATCH_SIZE' in settings else None
+
         logger.info('Experiment %d/%d | Start simulation', curr_exp, n_exp)
-        results = exec_experiment(topology, workload, netconf, strategy, cache_policy, collectors)
+        results = exec_experiment(topology, workload, netconf, strategy,
+                                  cache_policy, collectors, warmup_snapshot,
+                                  batch_size)
         #print results
         duration = time.time() - start_time
         logger.info('Experiment %d/%d | End simulation | Duration %s.', 
@@ -274,3 +346,150 @@ def run_scenario(settings, params, curr_exp, n_exp):
         logger.error('Experiment %d/%d | Failed | %s: %s\n%s',
                      curr_exp, n_exp, err_type, err_message,
                      traceback.format_exc())
+
+
+def warmup_snapshot_path(cache_dir, params, replication=0):
+    """Return the path of the file storing the warmup snapshot of a
+    replication of an experiment.
+
+    The file name is a hash of the replication index and of all the
+    experiment parameters affecting the state of the network at the end of the
+    warmup phase, i.e. topology, workload, cache and content placement,
+    strategy and cache policy. The number of measured requests and the
+    description of the experiment are not included, so that experiments
+    differing only in those parameters share the same warmup. Different
+    replications never share a warmup, so that they remain independent.
+
+    Parameters
+    ----------
+    cache_dir : str
+        The directory where warmup snapshots are stored. It is created if it
+        does not exist
+    params : Tree
+        experiment parameters tree
+    replication : int, optional
+        Index of the replication of the experiment
+
+    Returns
+    -------
+    path : str
+        The path of the warmup snapshot file
+    """
+    paths = params.paths()
+    paths.pop(('workload', 'n_measured'), None)
+    paths.pop(('desc',), None)
+    key = hashlib.sha1(repr((sorted(paths.items()), replication))).hexdigest()
+    if not os.path.isdir(cache_dir):
+        try:
+            os.makedirs(cache_dir)
+        except OSError:
+            # Another process may have created it in the meantime
+            if not os.path.isdir(cache_dir):
+                raise
+    return os.path.join(cache_dir, 'warmup-%s.pickle' % key)
+
+
+def topology_cache_path(cache_dir, topology_spec, routing='ALL_PAIRS',
+                        replication=0):
+    """Return the path of the file storing the topology of a replication and
+    its shortest paths in the topology cache.
+
+    The file name is a hash of the name and arguments of the topology factory,
+    of the routing used to compute the shortest paths and of the replication
+    index. Each replication has its own topology, so that topology factories
+    drawing random numbers still build an independent topology for each
+    replication, while experiments of the same replication share it.
+
+    Parameters
+    ----------
+    cache_dir : str
+        The directory where topologies are cached. It is created if it does
+        not exist
+    topology_spec : Tree
+        The topology parameters tree, including the factory name
+    routing : str, optional
+        The routing of the network model (see *NetworkModel*)
+    replication : int, optional
+        Index of the replication of the experiment
+
+    Returns
+    -------
+    path : str
+        The path of the topology cache file
+    """
+    paths = Tree(topology_spec).paths()
+    key = hashlib.sha1(repr((sorted(paths.items()), routing, replication))
+                       ).hexdigest()
+    if not os.path.isdir(cache_dir):
+        try:
+            os.makedirs(cache_dir)
+        except OSError:
+            # Another process may have created it in the meantime
+            if not os.path.isdir(cache_dir):
+                raise
+    return os.path.join(cache_dir, 'topology-%s.pickle' % key)
+
+
+def load_topology(cache_dir, topology_spec, routing='ALL_PAIRS',
+                  replication=0):
+    """Return the topology of a replication and its shortest paths from the
+    topology cache.
+
+    If the topology is not cached yet, it is built by its factory, its
+    shortest paths are computed and both are stored in the cache. Each call
+    returns a new copy of the topology, which can then be edited by cache and
+    content placements, while shortest paths are shared. All-pairs shortest
+    paths are stored as tuples so that they cannot be modified: callers
+    needing to modify a path must copy it.
+
+    Parameters
+    ----------
+    cache_dir : str
+        The directory where topologies are cached
+    topology_spec : Tree
+        The topology parameters tree, including the factory name
+    routing : str, optional
+        The routing of the network model (see *NetworkModel*). With *LAZY*
+        routing only the topology is cached, since shortest paths are computed
+        by the network model on demand
+    replication : int, optional
+        Index of the replication of the experiment
+
+    Returns
+    -------
+    topology : Topology
+        The topology
+    shortest_path : dict of dict or shortest path provider
+        The shortest paths of the topology, or *None* with *LAZY* routing
+    """
+    path = topology_cache_path(cache_dir, topology_spec, routing, replication)
+    if path not in _topology_cache:
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                topology, shortest_path = pickle.load(f)
+            _topology_cache[path] = (topology, _freeze_paths(shortest_path))
+        else:
+            spec = dict(topology_spec)
+            topology = TOPOLOGY_FACTORY[spec.pop('name')](**spec)
+            shortest_path = build_shortest_paths(topology, routing) \
+                            if routing != 'LAZY' else None
+            shortest_path = _freeze_paths(shortest_path)
+            _topology_cache[path] = (topology, shortest_path)
+            # Write to a temporary file first, so that processes concurrently
+            # reading the cache never see a partially written file
+            tmp_path = '%s.%d.tmp' % (path, os.getpid())
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(_topology_cache[path], f, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_path, path)
+    topology, shortest_path = _topology_cache[path]
+    return copy.deepcopy(topology), shortest_path
+
+
+def _freeze_paths(shortest_path):
+    """Return all-pairs shortest paths with each path converted to a tuple,
+    so that they can be shared by all experiments without being copied.
+    Shortest path providers other than dictionaries are returned unchanged"""
+    if not isinstance(shortest_path, dict):
+        return shortest_path
+    return dict((s, dict((t, tuple(path)) for t, path in paths.iteritems()))
+                for s, paths in shortest_path.iteritems())
@@ -2,10 +2,14 @@
 """
 import collections
 import copy
+import numbers
 try:
     import cPickle as pickle
 except ImportError:
     import pickle
+
+import numpy as np
+
 from icarus.util import Tree
 from icarus.registry import register_results_reader, register_results_writer
 
@@ -162,6 +166,103 @@ class ResultSet(object):
                 filtered_resultset.add(parameters, results)
         return filtered_resultset
 
+    def merge_replications(self):
+        """Return a resultset with the results of experiments having the same
+        parameters, e.g. replications of an experiment, merged into one.
+
+        Results are merged value by value: values having a *merge* method, such
+        as *LogHistogram* objects, are merged, numeric values are averaged and
+        all other values are taken from the first experiment.
+
+        Statistics summarizing a histogram, i.e. the values named *P50*,
+        *P95*, *P99* and *CDF* stored next to a *HISTOGRAM* value and having
+        the same suffix, are instead recomputed from the merged histogram, and
+        the *MEAN* with the same suffix is averaged weighting each experiment
+        by the number of values of its histogram. CDFs without a histogram are
+        averaged point by point, hence they are exact only if all experiments
+        measured the same number of values.
+
+        Returns
+        -------
+        merged_resultset : ResultSet
+            The resultset with one result per distinct set of parameters, in
+            the order in which they first appear
+        """
+        groups = collections.OrderedDict()
+        for parameters, results in self._results:
+            key = repr(sorted(Tree(parameters).paths().items()))
+            groups.setdefault(key, (parameters, []))[1].append(results.paths())
+        merged_resultset = ResultSet(copy.deepcopy(self.attr))
+        for parameters, results_paths in groups.values():
+            merged = Tree()
+            for path, value in results_paths[0].items():
+                values = [r[path] for r in results_paths if path in r]
+                if hasattr(value, 'merge'):
+                    value = copy.deepcopy(value)
+                    for v in values[1:]:
+                        value.merge(v)
+                elif isinstance(value, numbers.Number) and \
+                        not isinstance(value, bool):
+                    value = sum(values)/float(len(values))
+                merged.setval(path, value)
+            _merge_summaries(merged, results_paths)
+            merged_resultset.add(parameters, merged)
+        return merged_resultset
+
+
+def _merge_summaries(merged, results_paths):
+    """Recompute the statistics summarizing the histograms of merged results
+
+    Parameters
+    ----------
+    merged : Tree
+        The merged results, modified in place
+    results_paths : list of dict
+        The paths of the results of each merged experiment
+    """
+    histograms = {}
+    for path, value in merged.paths().items():
+        if path[-1].startswith('HISTOGRAM'):
+            histograms[path[:-1], path[-1][len('HISTOGRAM'):]] = value
+    for path, value in merged.paths().items():
+        if not path[-1].startswith('CDF'):
+            continue
+        suffix = path[-1][len('CDF'):]
+        if (path[:-1], suffix) in histograms:
+            continue
+        cdfs = [r[path] for r in results_paths if path in r]
+        if len(cdfs) > 1:
+            merged.setval(path, _merge_cdfs(cdfs))
+    for (parent, suffix), histogram in histograms.items():
+        if histogram.count < 1:
+            continue
+        paths = merged.paths()
+        for name, q in (('P50', 0.5), ('P95', 0.95), ('P99', 0.99)):
+            if parent + (name + suffix,) in paths:
+                merged.setval(parent + (name + suffix,), histogram.quantile(q))
+        if parent + ('CDF' + suffix,) in paths:
+            merged.setval(parent + ('CDF' + suffix,), histogram.cdf())
+        mean_path = parent + ('MEAN' + suffix,)
+        hist_path = parent + ('HISTOGRAM' + suffix,)
+        if mean_path in paths:
+            means = [(r[mean_path], r[hist_path].count) for r in results_paths
+                     if mean_path in r and hist_path in r]
+            merged.setval(mean_path, sum(m*n for m, n in means)/
+                                     float(sum(n for _, n in means)))
+
+
+def _merge_cdfs(cdfs):
+    """Return the point by point average of a list of CDFs, each in the format
+    returned by *icarus.tools.cdf*"""
+    x = np.unique(np.concatenate([np.asarray(values) for values, _ in cdfs]))
+    cdf = np.zeros(len(x))
+    for values, probs in cdfs:
+        idx = np.searchsorted(values, x, side='right') - 1
+        cdf += np.where(idx >= 0, np.asarray(probs)[np.maximum(idx, 0)], 0)
+    cdf /= len(cdfs)
+    cdf[-1] = 1.0 # Prevent rounding errors
+    return x, cdf
+
 
 @register_results_writer('PICKLE')
 def write_results_pickle(results, path):
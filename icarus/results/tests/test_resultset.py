@@ -9,6 +9,7 @@ else:
 del sys
 
 from icarus.results import ResultSet
+from icarus.tools import LogHistogram, cdf
 
 class TestResultSet(unittest.TestCase):
 
@@ -55,4 +56,55 @@ class TestResultSet(unittest.TestCase):
     def test_filter_no_match(self):
         filtered_rs = self.rs.filter({'gamma': 3})
         self.assertEquals(3, len(filtered_rs))
-        
\ No newline at end of file
+        
+
+    def test_merge_replications(self):
+        rs = ResultSet()
+        for i in range(2):
+            hist = LogHistogram()
+            hist.add(i + 1)
+            rs.add({'alpha': 1}, {'LATENCY': {'MEAN': i + 1, 'HISTOGRAM': hist},
+                                  'DESC': 'a%d' % i})
+        rs.add({'alpha': 2}, {'LATENCY': {'MEAN': 5, 'HISTOGRAM': LogHistogram()},
+                              'DESC': 'b'})
+        merged = rs.merge_replications()
+        self.assertEqual(2, len(merged))
+        parameters, results = merged[0]
+        self.assertEqual(1, parameters['alpha'])
+        self.assertEqual(1.5, results['LATENCY']['MEAN'])
+        self.assertEqual(2, results['LATENCY']['HISTOGRAM'].count)
+        self.assertEqual('a0', results['DESC'])
+        self.assertEqual(1, rs[0][1]['LATENCY']['HISTOGRAM'].count)
+        self.assertEqual(5, merged[1][1]['LATENCY']['MEAN'])
+
+    def test_merge_replications_histogram_summaries(self):
+        rs = ResultSet()
+        for values in (range(1, 101), range(1000, 1100), range(1, 101)[:50]):
+            hist = LogHistogram()
+            for v in values:
+                hist.add(v)
+            rs.add({'alpha': 1}, {'STRETCH': {
+                    'MEAN_REQUEST': sum(values)/float(len(values)),
+                    'HISTOGRAM_REQUEST': hist, 'CDF_REQUEST': hist.cdf(),
+                    'P50_REQUEST': hist.quantile(0.5),
+                    'P95_REQUEST': hist.quantile(0.95),
+                    'P99_REQUEST': hist.quantile(0.99)}})
+        results = rs.merge_replications()[0][1]['STRETCH']
+        hist = results['HISTOGRAM_REQUEST']
+        self.assertEqual(250, hist.count)
+        self.assertEqual(hist.quantile(0.5), results['P50_REQUEST'])
+        self.assertEqual(hist.quantile(0.95), results['P95_REQUEST'])
+        self.assertEqual(hist.quantile(0.99), results['P99_REQUEST'])
+        self.assertAlmostEqual(hist.mean, results['MEAN_REQUEST'])
+        x, cdf = results['CDF_REQUEST']
+        self.assertEqual(hist.cdf()[0].tolist(), x.tolist())
+        self.assertEqual(hist.cdf()[1].tolist(), cdf.tolist())
+
+    def test_merge_replications_cdf(self):
+        rs = ResultSet()
+        rs.add({'alpha': 1}, {'LATENCY': {'CDF': cdf([1, 2, 2, 4])}})
+        rs.add({'alpha': 1}, {'LATENCY': {'CDF': cdf([2, 3, 3, 5])}})
+        x, y = rs.merge_replications()[0][1]['LATENCY']['CDF']
+        expected_x, expected_y = cdf([1, 2, 2, 4, 2, 3, 3, 5])
+        self.assertEqual(expected_x.tolist(), x.tolist())
+        self.assertEqual(expected_y.tolist(), y.tolist())
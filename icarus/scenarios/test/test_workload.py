@@ -0,0 +1,34 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+import fnss
+import numpy as np
+
+from icarus.scenarios import StationaryWorkload
+
+
+class TestStationaryBatches(unittest.TestCase):
+
+    def setUp(self):
+        topology = fnss.star_topology(4)
+        fnss.add_stack(topology, 0, 'source', {})
+        for v in (1, 2, 3, 4):
+            fnss.add_stack(topology, v, 'receiver', {})
+        self.workload = StationaryWorkload(topology, n_contents=50, alpha=0.8,
+                                           n_warmup=100, n_measured=250,
+                                           seed=1)
+
+    def test_iter_batches(self):
+        batches = list(self.workload.iter_batches(64))
+        self.assertEqual([64] * 5 + [30], [len(b[0]) for b in batches])
+        time, receiver, content, log = [np.concatenate(a) for a in zip(*batches)]
+        self.assertTrue(np.all(np.diff(time) > 0))
+        self.assertEqual(set([1, 2, 3, 4]), set(receiver.tolist()))
+        self.assertTrue(np.all((content >= 1) & (content <= 50)))
+        self.assertEqual([False] * 100 + [True] * 250, log.tolist())
@@ -16,14 +16,27 @@ following attributes:
 
 Each workload must expose the `contents` attribute which is an iterable of
 all content identifiers. This is needed for content placement.
+
+Workloads may also provide an `iter_batches(batch_size)` method returning an
+iterator of 4-tuples of parallel numpy arrays (time, receiver, content, log),
+each describing up to `batch_size` events. If available, it is used by the
+simulation engine in place of `__iter__` to avoid creating a dictionary per
+event.
+
+Workloads reading large traces may also provide a `preload` class method,
+taking the same keyword arguments as `__init__` except the topology, which
+loads the trace into memory shared by all instances reading it. The
+orchestrator calls it for all queued experiments before creating its pool of
+worker processes, which then share a single copy of each trace.
 """
 import random
-import csv
 import math
 
+import numpy as np
 import networkx as nx
 
-from icarus.tools import TruncatedZipfDist, DiscreteDist
+from icarus.tools import TruncatedZipfDist, DiscreteDist, load_youtube_trace, \
+                         read_youtube_trace, iter_trace_chunks, intern_contents
 from icarus.registry import register_workload
 
 __all__ = [
@@ -33,6 +46,10 @@ __all__ = [
         'TraceDrivenWorkload'
            ]
 
+# Default path of the file containing the probability of each unique content
+# of a YouTube trace
+_YOUTUBE_PDF_FILE = '/home/adita/Greedy 08142017/youtube_traces/All traces/pdf'
+
 @register_workload('YOUTUBETRACE')
 class YoutubetraceWorkload(object):
     """This function generates events from the youtube traces
@@ -51,11 +68,19 @@ class YoutubetraceWorkload(object):
         Path of file containing timestamps of requested contents
     clients_file : str
         Path of file containing clients which requested the content
+    unique_contents_file : str
+        Path of file containing the identifiers of unique contents
     n_warmup : int, optional
         The number of warmup requests (i.e. requests executed to fill cache but
         not logged)
     n_measured : int, optional
         The number of logged requests after the warmup
+    pdf_file : str, optional
+        Path of file containing the probability of each unique content
+    trace_dir : str, optional
+        Path of a binary trace bundle written by
+        *icarus.tools.convert_youtube_trace*. If specified, the trace is
+        memory-mapped from the bundle and all other file paths are ignored
 
     Returns
     -------
@@ -64,41 +89,83 @@ class YoutubetraceWorkload(object):
         the timestamp at which the event occurs and the second element is a
         dictionary of event attributes.
     """
-    def __init__(self, topology, n_contents, num_clients, reqs_file, timestamps_file, clients_file, unique_contents_file,
-                    n_warmup=10 ** 5, n_measured=4 * 10 ** 5, **kwargs):
+
+    # Traces loaded by preload, keyed by their files, shared by all the
+    # instances reading the same trace
+    _traces = {}
+
+    def __init__(self, topology, n_contents, num_clients, reqs_file=None,
+                 timestamps_file=None, clients_file=None,
+                 unique_contents_file=None, n_warmup=10 ** 5,
+                 n_measured=4 * 10 ** 5, pdf_file=_YOUTUBE_PDF_FILE,
+                 trace_dir=None, **kwargs):
         self.receivers = [v for v in topology.nodes_iter()
                      if topology.node[v]['stack'][0] == 'receiver']
         self.buffering = 64 * 1024 * 1024
         self.n_contents = n_contents
-        self.request_contents = []
-        self.timestamps = []
-        self.clients = []
-        self.contents = []#range(1, n_contents + 1)
-        self.probability = []
-        with open('/home/adita/Greedy 08142017/youtube_traces/All traces/pdf', 'r') as f:
-            for content in f:
-                self.probability.append(float(content.rstrip()))
-        with open(timestamps_file, 'r', buffering=self.buffering) as f:
-            for content in f:
-                self.timestamps.append(float(content.rstrip()))
-        with open(reqs_file, 'r', buffering=self.buffering) as f:
-            for content in f:
-                self.request_contents.append(int(content.rstrip()))
-        with open(clients_file, 'r', buffering=self.buffering) as f:
-            for content in f:
-                self.clients.append(int(content.rstrip()))
-        with open(unique_contents_file, 'r', buffering=self.buffering) as f:
-            for content in f:
-                self.contents.append(int(content.rstrip()))
+        key = self._trace_key(pdf_file, reqs_file, timestamps_file,
+                              clients_file, unique_contents_file, trace_dir)
+        trace = self._traces.get(key)
+        if trace is None:
+            trace = self._load_trace(*key)
+        self.probability = trace['pdf']
+        self.timestamps = trace['timestamps']
+        self.request_contents = trace['requests']
+        self.clients = trace['clients']
+        # Contents are used for content placement, hence they are
+        # converted to Python objects
+        self.contents = trace['unique_contents'].tolist()
         self.n_warmup = n_warmup
         self.n_measured = n_measured
         self.num_clients = num_clients
         self.disc = DiscreteDist(self.probability)
         #print len(self.clients)
 
+    @classmethod
+    def preload(cls, reqs_file=None, timestamps_file=None, clients_file=None,
+                unique_contents_file=None, pdf_file=_YOUTUBE_PDF_FILE,
+                trace_dir=None, **kwargs):
+        """Load a trace into memory shared by all the instances reading it.
+
+        Trace arrays are read-only, hence processes forked after this call
+        share their memory pages instead of holding a copy each. Parameters
+        are the same of the constructor, other arguments are ignored.
+        """
+        key = cls._trace_key(pdf_file, reqs_file, timestamps_file,
+                             clients_file, unique_contents_file, trace_dir)
+        if key not in cls._traces:
+            cls._traces[key] = cls._load_trace(*key)
+
+    @staticmethod
+    def _trace_key(pdf_file, reqs_file, timestamps_file, clients_file,
+                   unique_contents_file, trace_dir):
+        """Return the key of a trace in the dictionary of preloaded traces
+        """
+        if trace_dir is not None:
+            return (None, None, None, None, None, trace_dir)
+        if None in (reqs_file, timestamps_file, clients_file,
+                    unique_contents_file):
+            raise ValueError('Either trace_dir or all trace files must '
+                             'be specified')
+        return (pdf_file, reqs_file, timestamps_file, clients_file,
+                unique_contents_file, None)
+
+    @staticmethod
+    def _load_trace(pdf_file, reqs_file, timestamps_file, clients_file,
+                    unique_contents_file, trace_dir):
+        """Read the arrays of a trace from a bundle or from text files"""
+        if trace_dir is not None:
+            return load_youtube_trace(trace_dir)
+        trace = read_youtube_trace(pdf_file, reqs_file, timestamps_file,
+                                   clients_file, unique_contents_file)
+        for array in trace.values():
+            array.flags.writeable = False
+        return trace
+
     def __iter__(self):
         req_counter = 0
         t_event = 0.0
+        indices = self.disc.rv_iter(self.n_warmup)
         while req_counter < self.n_warmup + self.n_measured:
 
             """if req_counter == self.n_warmup + 25:
@@ -120,15 +187,15 @@ class YoutubetraceWorkload(object):
             if req_counter < self.n_warmup:
                 receiver = random.choice(self.receivers)
                 t_event += (random.expovariate(1.0))
-                index = int(self.disc.rv())#np.searchsorted(self.probability,random_number)
+                index = next(indices)#np.searchsorted(self.probability,random_number)
                 if index == 581527:#35130:
                     index = 581526#35129
                 #print index
                 content = self.contents[index]
 
             else:
-                t_event = self.timestamps[req_counter-self.n_warmup]
-                content = self.request_contents[req_counter-self.n_warmup]
+                t_event = float(self.timestamps[req_counter-self.n_warmup])
+                content = int(self.request_contents[req_counter-self.n_warmup])
 
                 a = int(int(self.clients[req_counter-self.n_warmup])/(math.ceil(self.num_clients/len(self.receivers))))
                 #print a
@@ -148,6 +215,43 @@ class YoutubetraceWorkload(object):
             req_counter += 1
         raise StopIteration()
 
+    def iter_batches(self, batch_size):
+        """Return an iterator over batches of events.
+
+        Warmup events are drawn with vectorized operations from the same
+        distributions used by *__iter__*, while measured events are slices of
+        the trace.
+
+        Parameters
+        ----------
+        batch_size : int
+            The maximum number of events per batch
+
+        Returns
+        -------
+        batches : iterator
+            Iterator of (time, receiver, content, log) tuples of arrays
+        """
+        rng = np.random.RandomState(random.randint(0, 2**32 - 1))
+        receivers = np.asarray(self.receivers)
+        contents = np.asarray(self.contents)
+        t_event = 0.0
+        for start in range(0, self.n_warmup, batch_size):
+            size = min(batch_size, self.n_warmup - start)
+            time = t_event + np.cumsum(rng.exponential(1.0, size))
+            t_event = time[-1]
+            receiver = receivers[rng.randint(len(receivers), size=size)]
+            index = self.disc.rv_batch(size)
+            index[index == 581527] = 581526
+            yield time, receiver, contents[index], np.zeros(size, dtype=bool)
+        for start in range(0, self.n_measured, batch_size):
+            size = min(batch_size, self.n_measured - start)
+            time = np.asarray(self.timestamps[start:start + size], dtype=float)
+            content = np.asarray(self.request_contents[start:start + size])
+            receiver = np.empty(len(content), dtype=int)
+            receiver.fill(5)
+            yield time, receiver, content, np.ones(len(content), dtype=bool)
+
     """def __iter__(self):
         req_counter = 0
         t_event = 0.0
@@ -247,19 +351,52 @@ class StationaryWorkload(object):
     def __iter__(self):
         req_counter = 0
         t_event = 0.0
+        contents = self.zipf.rv_iter(self.n_warmup + self.n_measured)
         while req_counter < self.n_warmup + self.n_measured:
             t_event += (random.expovariate(self.rate))
             if self.beta == 0:
                 receiver = random.choice(self.receivers)
             else:
                 receiver = self.receivers[self.receiver_dist.rv()-1]
-            content = int(self.zipf.rv())
+            content = next(contents)
             log = (req_counter >= self.n_warmup)
             event = {'receiver': receiver, 'content': content, 'log': log}
             yield (t_event, event)
             req_counter += 1
         raise StopIteration()
 
+    def iter_batches(self, batch_size):
+        """Return an iterator over batches of events.
+
+        Events are drawn with vectorized operations from the same
+        distributions used by *__iter__*.
+
+        Parameters
+        ----------
+        batch_size : int
+            The maximum number of events per batch
+
+        Returns
+        -------
+        batches : iterator
+            Iterator of (time, receiver, content, log) tuples of arrays
+        """
+        rng = np.random.RandomState(random.randint(0, 2**32 - 1))
+        receivers = np.asarray(self.receivers)
+        n_events = self.n_warmup + self.n_measured
+        t_event = 0.0
+        for start in range(0, n_events, batch_size):
+            size = min(batch_size, n_events - start)
+            time = t_event + np.cumsum(rng.exponential(1.0/self.rate, size))
+            t_event = time[-1]
+            if self.beta == 0:
+                receiver = receivers[rng.randint(len(receivers), size=size)]
+            else:
+                receiver = receivers[self.receiver_dist.rv_batch(size) - 1]
+            content = self.zipf.rv_batch(size)
+            log = np.arange(start, start + size) >= self.n_warmup
+            yield time, receiver, content, log
+
 
 @register_workload('GLOBETRAFF')
 class GlobetraffWorkload(object):
@@ -282,9 +419,11 @@ class GlobetraffWorkload(object):
     topology : fnss.Topology
         The topology to which the workload refers
     reqs_file : str
-        The GlobeTraff request file
+        The GlobeTraff request file, optionally compressed with gzip, bzip2
+        or xz
     contents_file : str
-        The GlobeTraff content file
+        The GlobeTraff content file, optionally compressed with gzip, bzip2
+        or xz
     beta : float, optional
         Spatial skewness of requests rates
         
@@ -303,42 +442,48 @@ class GlobetraffWorkload(object):
         self.receivers = [v for v in topology.nodes_iter() 
                      if topology.node[v]['stack'][0] == 'receiver']
         self.n_contents = 0
-        with open(contents_file, 'r') as f:
-            reader = csv.reader(f, delimiter='\t')
-            for content, popularity, size, app_type in reader:
-                self.n_contents = max(self.n_contents, content)
+        for lines in iter_trace_chunks(contents_file):
+            for line in lines:
+                content, popularity, size, app_type = line.split('\t')
+                self.n_contents = max(self.n_contents, int(content))
         self.n_contents += 1
         self.contents = range(self.n_contents)
         self.request_file = reqs_file
         self.beta = beta
         if beta != 0:
-            degree = nx.degree(self.topology)
+            degree = nx.degree(topology)
             self.receivers = sorted(self.receivers, key=lambda x: 
                                     degree[iter(topology.edge[x]).next()], 
                                     reverse=True)
             self.receiver_dist = TruncatedZipfDist(beta, len(self.receivers))
         
     def __iter__(self):
-        with open(self.request_file, 'r') as f:
-            reader = csv.reader(f, delimiter='\t')
-            for timestamp, content, size in reader:
+        for lines in iter_trace_chunks(self.request_file):
+            for line in lines:
+                timestamp, content, size = line.split('\t')
                 if self.beta == 0:
                     receiver = random.choice(self.receivers)
                 else:
                     receiver = self.receivers[self.receiver_dist.rv()-1]
-                event = {'receiver': receiver, 'content': content, 'size': size}
-                yield (timestamp, event)
+                event = {'receiver': receiver, 'content': int(content),
+                         'size': int(size)}
+                yield (float(timestamp), event)
         raise StopIteration()
 
 @register_workload('TRACE_DRIVEN')
 class TraceDrivenWorkload(object):
     """Parse requests from a generic request trace.
     
-    This workload requires two text files:
+    This workload requires two text files, optionally compressed with gzip,
+    bzip2 or xz:
      * a requests file, where each line corresponds to a string identifying
        the content requested
      * a contents file, which lists all unique content identifiers appearing
        in the requests file.
+
+    Content identifiers are interned into integers 1..N, in the order in which
+    they are listed in the contents file, and requests are read in chunks, so
+    that memory usage does not depend on the length of the trace.
        
     Since the trace do not provide timestamps, requests are scheduled according
     to a Poisson process of rate *rate*. All requests are mapped to receivers
@@ -395,10 +540,11 @@ class TraceDrivenWorkload(object):
         self.rate = rate
         self.receivers = [v for v in topology.nodes_iter() 
                           if topology.node[v]['stack'][0] == 'receiver']
-        self.contents = []
-        with open(contents_file, 'r', buffering=self.buffering) as f:
-            for content in f:
-                self.contents.append(content)
+        # Table interning content identifiers into integers
+        self.content_ids = {}
+        for lines in iter_trace_chunks(contents_file, buffering=self.buffering):
+            intern_contents(lines, self.content_ids)
+        self.contents = range(1, len(self.content_ids) + 1)
         self.beta = beta
         if beta != 0:
             degree = nx.degree(topology)
@@ -410,8 +556,8 @@ class TraceDrivenWorkload(object):
     def __iter__(self):
         req_counter = 0
         t_event = 0.0
-        with open(self.reqs_file, 'r', buffering=self.buffering) as f:
-            for content in f:
+        for lines in iter_trace_chunks(self.reqs_file, buffering=self.buffering):
+            for content in intern_contents(lines, self.content_ids).tolist():
                 t_event += (random.expovariate(self.rate))
                 if self.beta == 0:
                     receiver = random.choice(self.receivers)
@@ -423,4 +569,4 @@ class TraceDrivenWorkload(object):
                 req_counter += 1
                 if(req_counter >= self.n_warmup + self.n_measured):
                     raise StopIteration()
-            raise ValueError("Trace did not contain enough requests")
+        raise ValueError("Trace did not contain enough requests")
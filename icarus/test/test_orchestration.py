@@ -0,0 +1,156 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+import os
+import shutil
+import tempfile
+
+import networkx as nx
+
+import icarus.orchestration as orchestration
+from icarus.execution.network import symmetrify_paths
+from icarus.registry import TOPOLOGY_FACTORY, WORKLOAD
+from icarus.util import Settings, Tree
+
+
+class TestTopologyCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.spec = Tree({'name': 'TREE', 'k': 2, 'h': 3})
+        orchestration._topology_cache.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+        orchestration._topology_cache.clear()
+
+    def test_cache_path(self):
+        path = orchestration.topology_cache_path(self.cache_dir, self.spec)
+        self.assertEqual(path, orchestration.topology_cache_path(
+                self.cache_dir, Tree({'h': 3, 'k': 2, 'name': 'TREE'})))
+        self.assertNotEqual(path, orchestration.topology_cache_path(
+                self.cache_dir, Tree({'name': 'TREE', 'k': 2, 'h': 4})))
+        self.assertNotEqual(path, orchestration.topology_cache_path(
+                self.cache_dir, self.spec, 'NEXT_HOP'))
+        self.assertNotEqual(path, orchestration.topology_cache_path(
+                self.cache_dir, self.spec, replication=1))
+
+    def as_dict(self, shortest_path):
+        return dict((s, dict((t, list(p)) for t, p in shortest_path[s].items()))
+                    for s in shortest_path)
+
+    def test_load_topology(self):
+        topology, shortest_path = orchestration.load_topology(self.cache_dir,
+                                                              self.spec)
+        self.assertTrue(os.path.isfile(orchestration.topology_cache_path(
+                self.cache_dir, self.spec)))
+        expected = symmetrify_paths(nx.all_pairs_dijkstra_path(topology))
+        self.assertEqual(expected, self.as_dict(shortest_path))
+        # Read from disk
+        orchestration._topology_cache.clear()
+        cached_topology, cached_path = orchestration.load_topology(
+                self.cache_dir, self.spec)
+        self.assertEqual(sorted(topology.edges()), sorted(cached_topology.edges()))
+        self.assertEqual(expected, self.as_dict(cached_path))
+        # Each call returns a new copy of the topology
+        cached_topology.node[0]['edited'] = True
+        topology, _ = orchestration.load_topology(self.cache_dir, self.spec)
+        self.assertNotIn('edited', topology.node[0])
+
+    def test_shared_paths_immutable(self):
+        _, shortest_path = orchestration.load_topology(self.cache_dir, self.spec)
+        self.assertEqual((0, 1, 3, 7), shortest_path[0][7])
+        # Paths are shared, not copied, by all calls
+        _, other_path = orchestration.load_topology(self.cache_dir, self.spec)
+        self.assertIs(shortest_path[0][7], other_path[0][7])
+
+    def test_replications(self):
+        calls = []
+        def factory(**kwargs):
+            calls.append(kwargs)
+            return TOPOLOGY_FACTORY['TREE'](**kwargs)
+        TOPOLOGY_FACTORY['TEST_COUNTING'] = factory
+        try:
+            spec = Tree({'name': 'TEST_COUNTING', 'k': 2, 'h': 3})
+            for replication in (0, 1, 0, 1):
+                orchestration.load_topology(self.cache_dir, spec,
+                                            replication=replication)
+            # Each replication builds its own topology once
+            self.assertEqual(2, len(calls))
+        finally:
+            del TOPOLOGY_FACTORY['TEST_COUNTING']
+
+    def test_load_topology_lazy(self):
+        topology, shortest_path = orchestration.load_topology(
+                self.cache_dir, self.spec, 'LAZY')
+        self.assertIsNone(shortest_path)
+        self.assertEqual(15, topology.number_of_nodes())
+
+
+class TestWarmupSnapshotPath(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_path(self):
+        params = Tree({'topology': {'name': 'TREE'}, 'desc': 'a',
+                       'workload': {'name': 'STATIONARY', 'n_measured': 10}})
+        path = orchestration.warmup_snapshot_path(self.cache_dir, params)
+        params['desc'] = 'b'
+        params['workload']['n_measured'] = 20
+        self.assertEqual(path, orchestration.warmup_snapshot_path(
+                self.cache_dir, params, 0))
+        self.assertNotEqual(path, orchestration.warmup_snapshot_path(
+                self.cache_dir, params, 1))
+
+
+class PreloadedWorkload(object):
+    """Workload recording the arguments of its preload calls"""
+
+    preloaded = []
+
+    @classmethod
+    def preload(cls, **kwargs):
+        cls.preloaded.append(kwargs)
+
+
+class TestPreloadWorkloads(unittest.TestCase):
+
+    def setUp(self):
+        WORKLOAD['TEST_PRELOADED'] = PreloadedWorkload
+        PreloadedWorkload.preloaded = []
+        self.settings = Settings()
+        self.settings.EXPERIMENT_QUEUE = [
+                Tree({'workload': {'name': 'TEST_PRELOADED', 'trace': 'a'}})]
+        self.settings.N_PROCESSES = 1
+
+    def tearDown(self):
+        del WORKLOAD['TEST_PRELOADED']
+
+    def test_serial(self):
+        self.settings.PARALLEL_EXECUTION = False
+        orchestration.Orchestrator(self.settings)
+        self.assertEqual([], PreloadedWorkload.preloaded)
+
+    def test_parallel(self):
+        self.settings.PARALLEL_EXECUTION = True
+        orchestrator = orchestration.Orchestrator(self.settings)
+        orchestrator.stop()
+        self.assertEqual([{'trace': 'a'}], PreloadedWorkload.preloaded)
+
+    def test_error(self):
+        def preload(**kwargs):
+            raise IOError('No such file')
+        WORKLOAD['TEST_PRELOADED'] = type('FailingWorkload', (object,),
+                                          {'preload': staticmethod(preload)})
+        self.settings.PARALLEL_EXECUTION = True
+        self.assertRaises(IOError, orchestration.Orchestrator, self.settings)
@@ -7,3 +7,4 @@ behavior of caches and statistical utilities.
 from .stats import *
 from .cacheperf import *
 from .traces import *
+from .placement import *
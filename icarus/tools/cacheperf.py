@@ -3,6 +3,7 @@ replacement policies.
 """
 from __future__ import division
 import math
+import warnings
 
 import numpy as np
 from scipy.optimize import fsolve
@@ -12,6 +13,7 @@ from icarus.tools import TruncatedZipfDist, DiscreteDist
 
 __all__ = [
        'che_characteristic_time',
+       'che_characteristic_time_zipf',
        'che_per_content_cache_hit_ratio',
        'che_cache_hit_ratio',
        'che_characteristic_time_simplified',
@@ -23,7 +25,8 @@ __all__ = [
        'optimal_cache_hit_ratio',
        'numeric_per_content_cache_hit_ratio',
        'numeric_cache_hit_ratio',
-       'trace_driven_cache_hit_ratio'
+       'trace_driven_cache_hit_ratio',
+       'stack_distance_hit_curve'
           ]
 
 
@@ -57,6 +60,138 @@ def che_characteristic_time(pdf, cache_size, target=None):
     return r if target is None else r[0]
 
 
+# Characteristic times computed by che_characteristic_time_zipf, keyed by
+# (alpha, population, cache_size)
+_che_zipf_cache = {}
+
+
+def _che_newton(pdf, cache_size, tol=1e-12, max_iter=100, chunk_size=2**22):
+    """Solve the Che approximation equations of all items at once.
+
+    Parameters
+    ----------
+    pdf : array-like
+        The probability density function of an item being requested
+    cache_size : int
+        The size of the cache (in number of items)
+    tol : float, optional
+        The relative tolerance on the characteristic times
+    max_iter : int, optional
+        The maximum number of Newton iterations
+    chunk_size : int, optional
+        The maximum number of elements of the temporary matrices evaluated at
+        once
+
+    Returns
+    -------
+    r : array of float
+        Array of length N+1, where r[0] is the solution of the equation
+        without any item excluded and r[i] is the characteristic time of item
+        i in [1,N]
+
+    Notes
+    -----
+    If the cache can store all items but one, i.e. *cache_size* >= N - 1, no
+    item is ever evicted and the equations have no finite solution. In this
+    case a *RuntimeWarning* is issued and the cache size is capped to N - 2,
+    the largest size for which characteristic times are finite.
+    A *RuntimeWarning* is also issued if some equations do not converge
+    within *max_iter* iterations.
+    """
+    pdf = np.asarray(pdf, dtype=float)
+    n = len(pdf)
+    if n < 2:
+        raise ValueError('The population must have at least two items')
+    if cache_size > n - 2:
+        warnings.warn('Cache size %s does not allow any eviction among %d '
+                      'items, capping it to %d' % (cache_size, n, n - 2),
+                      RuntimeWarning)
+        cache_size = n - 2
+    # Solve sum_j(exp(-p_j*r)) - w_i*exp(-p_i*r) = N - 1 - C, where w_0 = 0
+    # (i.e. no item excluded) and w_i = 1, for each item i in [1,N]
+    p = np.concatenate(([0.0], pdf))
+    w = np.ones(n + 1)
+    w[0] = 0
+    rhs = n - 1 - cache_size
+    r = np.zeros(n + 1)
+    rows = max(1, chunk_size // max(n, 1))
+    # The left hand side is convex and decreasing in r, hence Newton
+    # iterations approach the root monotonically after the first one. The
+    # equation without exclusions is solved first, starting from 0, and its
+    # root, which is an upper bound of all others, is then used as the
+    # starting point of all items
+    for idx in (np.arange(1), np.arange(1, n + 1)):
+        r[idx] = r[0]
+        for _ in range(max_iter):
+            if len(idx) == 0:
+                break
+            step = np.empty(len(idx))
+            for start in range(0, len(idx), rows):
+                i = idx[start:start + rows]
+                e = np.exp(-np.outer(r[i], pdf))
+                ex = w[i]*np.exp(-p[i]*r[i])
+                f = e.sum(axis=1) - ex - rhs
+                df = p[i]*ex - e.dot(pdf)
+                step[start:start + rows] = f/df
+            r[idx] -= step
+            idx = idx[np.abs(step) > tol*np.abs(r[idx])]
+        if len(idx) > 0:
+            warnings.warn('The characteristic times of %d items did not '
+                          'converge in %d iterations' % (len(idx), max_iter),
+                          RuntimeWarning)
+    return r
+
+
+def che_characteristic_time_zipf(alpha, population, cache_size, target=None):
+    """Return the characteristic time of an item or of all items of a Zipf
+    distributed population, as defined by Che et al.
+
+    Differently from *che_characteristic_time*, the equations of all items
+    are solved together with a vectorized Newton method and the results are
+    memoized, so that, after the first call for a given set of arguments,
+    looking up the characteristic time of an item only takes constant time.
+
+    Parameters
+    ----------
+    alpha : float
+        The Zipf distribution parameter
+    population : int
+        The number of items of the population
+    cache_size : int
+        The size of the cache (in number of items)
+    target : int, optional
+        The item index [1,N] for which characteristic time is requested. If not
+        specified, the function returns the characteristic times of all the
+        items in the population. Targets outside [1,N] get the characteristic
+        time computed without excluding any item, as *che_characteristic_time*
+        does.
+
+    Returns
+    -------
+    r : array of float or float
+        If target is None, returns a read-only array of length N+1 whose item
+        i is the characteristic time of item i in [1,N] and whose item 0 is
+        the characteristic time computed without excluding any item.
+        If a target is specified, then it returns the characteristic time of
+        only the specified item.
+
+    Notes
+    -----
+    As for *che_characteristic_time*, there is no finite characteristic time
+    if *cache_size* >= N - 1. In this case the cache size is capped to N - 2
+    and a *RuntimeWarning* is issued.
+    """
+    key = (alpha, population, cache_size)
+    if key not in _che_zipf_cache:
+        r = _che_newton(TruncatedZipfDist(alpha, population).pdf, cache_size)
+        r.flags.writeable = False
+        _che_zipf_cache[key] = r
+    r = _che_zipf_cache[key]
+    if target is None:
+        return r
+    return float(r[target]) if 1 <= target <= population else float(r[0])
+
+
 def che_per_content_cache_hit_ratio(pdf, cache_size, target=None):
     """Estimate the cache hit ratio of an item or of all items using the Che's
     approximation.
@@ -450,14 +585,12 @@ def numeric_per_content_cache_hit_ratio(pdf, cache, warmup=None, measure=None,
     if warmup is None: warmup = 10*len(pdf)
     if measure is None: measure = 30*len(pdf)
     z = DiscreteDist(pdf, seed)
-    for _ in range(warmup):
-        content = z.rv()
+    for content in z.rv_iter(warmup):
         if not cache.get(content):
             cache.put(content)
     cache_hits = np.zeros(len(pdf))
     requests = np.zeros(len(pdf))
-    for _ in range(measure):
-        content = z.rv()
+    for content in z.rv_iter(measure):
         requests[content-1] += 1
         if cache.get(content): 
             cache_hits[content-1] += 1
@@ -495,13 +628,11 @@ def numeric_cache_hit_ratio(pdf, cache, warmup=None, measure=None, seed=None):
     if warmup is None: warmup = 10*len(pdf)
     if measure is None: measure = 30*len(pdf)
     z = DiscreteDist(pdf, seed)
-    for _ in range(warmup):
-        content = z.rv()
+    for content in z.rv_iter(warmup):
         if not cache.get(content):
             cache.put(content)
     cache_hits = 0
-    for _ in range(measure):
-        content = z.rv()
+    for content in z.rv_iter(measure):
         if cache.get(content): 
             cache_hits += 1
         else:
@@ -531,6 +662,24 @@ def trace_driven_cache_hit_ratio(workload, cache, warmup_ratio=0.25):
     """
     if warmup_ratio < 0 or warmup_ratio > 1:
         raise ValueError("warmup_ratio must be comprised between 0 and 1")
+    from icarus.models import LruCache
+    if type(cache) is LruCache and len(cache) == 0:
+        # The hit ratio of an initially empty LRU cache is fully determined by
+        # the stack distances of the requests, which are computed in one pass
+        cache_hit_ratio = stack_distance_hit_curve(workload, [cache.maxlen],
+                                                   warmup_ratio)[0]
+        # Leave the cache in the state it would have after replaying the
+        # workload, i.e. storing the most recently requested contents
+        recent = []
+        recent_set = set()
+        for content in reversed(workload):
+            if content not in recent_set:
+                recent.append(content)
+                recent_set.add(content)
+                if len(recent) == cache.maxlen:
+                    break
+        cache.put_many(reversed(recent))
+        return cache_hit_ratio
     n = len(workload)
     cache_hits = 0
     n_warmup = int(warmup_ratio*n)
@@ -542,4 +691,83 @@ def trace_driven_cache_hit_ratio(workload, cache, warmup_ratio=0.25):
         else:
             cache.put(content)
         n_req += 1
-    return cache_hits/(n - n_warmup)
\ No newline at end of file
+    return cache_hits/(n - n_warmup)
+
+
+def stack_distance_hit_curve(workload, sizes, warmup_ratio=0.25):
+    """Compute the cache hit ratio of LRU caches of different sizes under an
+    arbitrary trace-driven workload in a single pass over the workload.
+
+    This function computes the LRU stack distance of each request according
+    to the algorithm of Mattson et al. [1]_. A request is a hit in an
+    initially empty LRU cache of size C if and only if its stack distance is
+    not greater than C. Stack distances are computed with a Fenwick tree
+    marking the last request of each content, hence the time complexity is
+    O(n log n), where n is the length of the workload, regardless of the
+    number of cache sizes evaluated.
+
+    Parameters
+    ----------
+    workload : list or array
+        List of URLs or content identifiers extracted from a trace. This list
+        only needs to contains content identifiers and not timestamps
+    sizes : list
+        The sizes of the caches (in number of items)
+    warmup_ratio : float, optional
+        Ratio of requests of the workload used to warm up the caches (i.e.
+        whose cache hit/miss results are discarded)
+
+    Returns
+    -------
+    cache_hit_ratio : array
+        The cache hit ratio of each cache size, in the same order as *sizes*
+
+    References
+    ----------
+    .. [1] R. L. Mattson, J. Gecsei, D. R. Slutz, I. L. Traiger, Evaluation
+           techniques for storage hierarchies, IBM Systems Journal, 9(2),
+           1970
+    """
+    if warmup_ratio < 0 or warmup_ratio > 1:
+        raise ValueError("warmup_ratio must be comprised between 0 and 1")
+    sizes = np.asarray(sizes, dtype=int)
+    if np.any(sizes <= 0):
+        raise ValueError("sizes must be positive")
+    if hasattr(workload, 'tolist'):
+        workload = workload.tolist()
+    n = len(workload)
+    n_warmup = int(warmup_ratio*n)
+    max_size = int(sizes.max())
+    # hist[d] is the number of measured requests with stack distance d
+    hist = [0]*(max_size + 1)
+    # Fenwick tree over request positions (1-indexed). Position i is marked if
+    # the request at position i is the last request of its content so far
+    tree = [0]*(n + 1)
+    n_marked = 0
+    last = {}
+    for t, content in enumerate(workload, 1):
+        p = last.get(content)
+        if p is not None:
+            # Number of distinct contents requested after position p, i.e.
+            # number of marked positions greater than p
+            i = p
+            marked = 0
+            while i > 0:
+                marked += tree[i]
+                i -= i & -i
+            d = n_marked - marked + 1
+            if t > n_warmup and d <= max_size:
+                hist[d] += 1
+            i = p
+            while i <= n:
+                tree[i] -= 1
+                i += i & -i
+        else:
+            n_marked += 1
+        last[content] = t
+        i = t
+        while i <= n:
+            tree[i] += 1
+            i += i & -i
+    cache_hits = np.cumsum(hist)[sizes]
+    return cache_hits/(n - n_warmup)
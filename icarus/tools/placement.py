@@ -0,0 +1,278 @@
+"""Functions for storing and looking up precomputed content placements.
+
+A content placement matrix has one row per node and one column per content,
+with element (v, k) equal to 1 if content k is placed in the cache of node v
+and 0 otherwise. Elements of dense matrices are compared against a threshold,
+which by default only accepts values equal to 1 up to rounding errors, so
+that fractional values are not placements. Since caches store a small
+fraction of the catalogue, these matrices are very sparse. Here they are
+stored in compressed sparse row (CSR) form, i.e. by the sorted column indices
+of the placements of each row, as a bundle of .npy files that can be
+memory-mapped.
+"""
+from __future__ import division
+import os
+import shutil
+
+import numpy as np
+
+__all__ = [
+       'PlacementMatrix',
+       'convert_placement_matrix',
+       'load_placement_matrix',
+       'cached_placement_matrix',
+          ]
+
+# Default threshold of the elements of dense matrices considered placements,
+# i.e. elements equal to 1 up to rounding errors
+PLACEMENT_THRESHOLD = 1 - 1e-9
+
+
+class PlacementMatrix(object):
+    """Sparse binary matrix of content placements, indexed by node and by
+    content column.
+    """
+
+    def __init__(self, indptr, indices, shape):
+        """Constructor
+
+        Parameters
+        ----------
+        indptr : array of int
+            Array of length n_nodes+1. The columns placed in node v are
+            indices[indptr[v]:indptr[v+1]]
+        indices : array of int
+            The columns of the nonzero elements of all rows, sorted in
+            ascending order within each row
+        shape : tuple
+            The (n_nodes, n_contents) shape of the matrix
+        """
+        self.indptr = indptr
+        self.indices = indices
+        self.shape = tuple(int(i) for i in shape)
+
+    @classmethod
+    def from_dense(cls, matrix, threshold=PLACEMENT_THRESHOLD):
+        """Build a placement matrix from a dense 0/1 matrix.
+
+        Parameters
+        ----------
+        matrix : 2-d array-like
+            The dense matrix
+        threshold : float, optional
+            Elements greater than or equal to this value are placements, all
+            others are not
+
+        Returns
+        -------
+        placement : PlacementMatrix
+            The placement matrix
+        """
+        matrix = np.atleast_2d(np.asarray(matrix))
+        rows, cols = np.nonzero(matrix >= threshold)
+        indptr = np.zeros(matrix.shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=matrix.shape[0]), out=indptr[1:])
+        return cls(indptr, cols.astype(np.int64), matrix.shape)
+
+    def __len__(self):
+        """Return the number of nodes (rows) of the matrix"""
+        return self.shape[0]
+
+    @property
+    def nnz(self):
+        """Return the number of contents placed in all nodes"""
+        return int(self.indptr[-1])
+
+    def row(self, v):
+        """Return the contents placed in a node
+
+        Parameters
+        ----------
+        v : int
+            The node (row) index
+
+        Returns
+        -------
+        columns : array of int
+            The sorted columns of the contents placed in the node
+        """
+        return self.indices[self.indptr[v]:self.indptr[v + 1]]
+
+    def node_caches(self, v, k):
+        """Return whether a node caches a content, i.e. whether element (v, k)
+        of the matrix is 1.
+
+        This takes *O(log m)* time, with *m* being the number of contents
+        placed in the node.
+
+        Parameters
+        ----------
+        v : int
+            The node (row) index
+        k : int
+            The content (column) index
+
+        Returns
+        -------
+        cached : bool
+            *True* if the node caches the content, *False* otherwise
+        """
+        if not 0 <= k < self.shape[1]:
+            raise IndexError('Column %d out of range' % k)
+        start, end = self.indptr[v], self.indptr[v + 1]
+        i = start + np.searchsorted(self.indices[start:end], k)
+        return bool(i < end and self.indices[i] == k)
+
+    def toarray(self):
+        """Return the placement as a dense 0/1 matrix
+
+        Returns
+        -------
+        matrix : 2-d array
+            The dense matrix
+        """
+        matrix = np.zeros(self.shape)
+        for v in range(self.shape[0]):
+            matrix[v, self.row(v)] = 1
+        return matrix
+
+    def save(self, bundle_dir):
+        """Save the matrix as a bundle of .npy files that can be read by
+        *load_placement_matrix*.
+
+        Parameters
+        ----------
+        bundle_dir : str
+            The directory where the bundle is written. It is created if it does
+            not exist
+        """
+        if not os.path.isdir(bundle_dir):
+            os.makedirs(bundle_dir)
+        arrays = {'indptr': self.indptr, 'indices': self.indices,
+                  'shape': self.shape}
+        for name, array in arrays.items():
+            np.save(os.path.join(bundle_dir, name + '.npy'),
+                    np.asarray(array, dtype=np.int64))
+
+
+def convert_placement_matrix(csv_file, bundle_dir=None, delimiter=',',
+                             threshold=PLACEMENT_THRESHOLD):
+    """Convert a dense 0/1 placement matrix stored in a text file, one row per
+    line, into a sparse bundle.
+
+    The text file is read one row at a time, so that the dense matrix is never
+    held in memory as a whole.
+
+    Parameters
+    ----------
+    csv_file : str
+        Path of the file storing the dense matrix
+    bundle_dir : str, optional
+        The directory where the bundle is written. It is created if it does
+        not exist. If not specified, the matrix is only returned
+    delimiter : str, optional
+        The string separating the elements of a row
+    threshold : float, optional
+        Elements greater than or equal to this value are placements, all
+        others are not
+
+    Returns
+    -------
+    placement : PlacementMatrix
+        The placement matrix
+    """
+    indptr = [0]
+    indices = []
+    n_cols = None
+    with open(csv_file, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = np.fromstring(line, sep=delimiter)
+            if n_cols is None:
+                n_cols = len(row)
+            elif len(row) != n_cols:
+                raise ValueError('Row %d of %s has %d columns instead of %d'
+                                 % (len(indptr) - 1, csv_file, len(row),
+                                    n_cols))
+            cols = np.flatnonzero(row >= threshold)
+            indices.append(cols)
+            indptr.append(indptr[-1] + len(cols))
+    indices = np.concatenate(indices) if indices \
+              else np.zeros(0, dtype=np.int64)
+    placement = PlacementMatrix(np.array(indptr, dtype=np.int64),
+                                indices.astype(np.int64),
+                                (len(indptr) - 1, n_cols or 0))
+    if bundle_dir is not None:
+        placement.save(bundle_dir)
+    return placement
+
+
+def load_placement_matrix(bundle_dir, mmap=True):
+    """Load a placement matrix saved by *PlacementMatrix.save* or
+    *convert_placement_matrix*.
+
+    Parameters
+    ----------
+    bundle_dir : str
+        The directory of the bundle
+    mmap : bool, optional
+        If *True*, the arrays of the matrix are memory-mapped read-only instead
+        of being read into memory
+
+    Returns
+    -------
+    placement : PlacementMatrix
+        The placement matrix
+    """
+    mmap_mode = 'r' if mmap else None
+    indptr = np.load(os.path.join(bundle_dir, 'indptr.npy'),
+                     mmap_mode=mmap_mode)
+    indices = np.load(os.path.join(bundle_dir, 'indices.npy'),
+                      mmap_mode=mmap_mode)
+    shape = np.load(os.path.join(bundle_dir, 'shape.npy'))
+    return PlacementMatrix(indptr, indices, shape)
+
+
+def cached_placement_matrix(csv_file, bundle_dir, delimiter=',',
+                            threshold=PLACEMENT_THRESHOLD):
+    """Return the placement matrix stored in a dense text file, converting it
+    into a bundle only the first time it is requested.
+
+    If the bundle already exists, it is memory-mapped. Otherwise the text file
+    is converted and the bundle saved, so that later calls, possibly from
+    other processes, only need to load it. The bundle is written to a
+    temporary directory first and then renamed, so that concurrent readers
+    never see a partially written bundle. If the bundle cannot be written,
+    e.g. because its parent directory is read-only, the converted matrix is
+    still returned.
+
+    Parameters
+    ----------
+    csv_file : str
+        Path of the file storing the dense matrix
+    bundle_dir : str
+        The directory of the bundle
+    delimiter : str, optional
+        The string separating the elements of a row
+    threshold : float, optional
+        Elements greater than or equal to this value are placements, all
+        others are not
+
+    Returns
+    -------
+    placement : PlacementMatrix
+        The placement matrix
+    """
+    if os.path.isdir(bundle_dir):
+        return load_placement_matrix(bundle_dir)
+    placement = convert_placement_matrix(csv_file, delimiter=delimiter,
+                                         threshold=threshold)
+    tmp_dir = '%s.%d.tmp' % (bundle_dir, os.getpid())
+    try:
+        placement.save(tmp_dir)
+        os.rename(tmp_dir, bundle_dir)
+    except EnvironmentError:
+        # Another process may have saved the bundle in the meantime
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return placement
@@ -13,6 +13,7 @@ import scipy.stats as ss
 __all__ = [
        'DiscreteDist',
        'TruncatedZipfDist',
+       'LogHistogram',
        'means_confidence_interval',
        'proportions_confidence_interval',
        'cdf',
@@ -25,6 +26,15 @@ class DiscreteDist(object):
     
     The support must be a finite discrete set of contiguous integers
     {1, ..., N}. This definition of discrete distribution.
+
+    Random values are drawn in O(1) time using the alias method of Walker,
+    with the table construction algorithm of Vose [1]_.
+
+    References
+    ----------
+    .. [1] M. D. Vose, A linear algorithm for generating random numbers with
+           a given distribution, IEEE Transactions on Software Engineering,
+           17(9), 1991
     """
 
     def __init__(self, pdf, seed=None):
@@ -46,6 +56,46 @@ class DiscreteDist(object):
         self._cdf = np.cumsum(self._pdf)
         # set last element of the CDF to 1.0 to avoid rounding errors
         self._cdf[-1] = 1.0
+        self._alias_prob, self._alias = self._alias_table(self._pdf)
+        # Numpy random generator used by rv_batch. It is created on first use
+        # and seeded from the Python random generator, so that seeding the
+        # latter makes batched draws reproducible as well
+        self._np_random = None
+
+    @staticmethod
+    def _alias_table(pdf):
+        """Build the alias table of a distribution with Vose's algorithm
+
+        Parameters
+        ----------
+        pdf : array
+            The probability density function
+
+        Returns
+        -------
+        alias_prob : array
+            The probability of keeping each column of the table
+        alias : array
+            The alias of each column of the table
+        """
+        n = len(pdf)
+        scaled = (np.asarray(pdf, dtype=np.float64)*n).tolist()
+        alias_prob = [1.0]*n
+        alias = range(n)
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            alias_prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+        # Columns left in either list have probability 1 up to rounding errors
+        return np.array(alias_prob), np.array(alias, dtype=np.int64)
 
     def __len__(self):
         """Return the cardinality of the support
@@ -85,10 +135,63 @@ class DiscreteDist(object):
     def rv(self):
         """Get rand value from the distribution
         """
-        rv = random.random()
-        # This operation performs binary search over the CDF to return the
-        # random value. Worst case time complexity is O(log2(n))
-        return int(np.searchsorted(self._cdf, rv) + 1)
+        # A single uniform draw selects both the column of the alias table
+        # (integer part) and whether to keep it or take its alias (fractional
+        # part). Time complexity is O(1)
+        u = random.random()*len(self._pdf)
+        i = int(u)
+        if u - i < self._alias_prob[i]:
+            return i + 1
+        return int(self._alias[i]) + 1
+
+    def rv_batch(self, n):
+        """Get an array of random values from the distribution
+
+        Values are drawn with vectorized operations, hence this is much faster
+        than calling *rv* repeatedly.
+
+        Parameters
+        ----------
+        n : int
+            The number of random values to draw
+
+        Returns
+        -------
+        rv : array
+            Array of *n* random values
+        """
+        if self._np_random is None:
+            self._np_random = np.random.RandomState(random.randint(0, 2**32 - 1))
+        u = self._np_random.random_sample(n)*len(self._pdf)
+        i = u.astype(np.int64)
+        keep = (u - i) < self._alias_prob[i]
+        return np.where(keep, i, self._alias[i]) + 1
+
+    def rv_iter(self, n=None, batch_size=2**16):
+        """Return an iterator over random values from the distribution
+
+        Values are drawn in blocks with *rv_batch*, so that iterating over them
+        is nearly as fast as iterating over a list.
+
+        Parameters
+        ----------
+        n : int, optional
+            The number of random values to draw. If not specified, the iterator
+            is endless
+        batch_size : int, optional
+            The number of random values drawn at a time
+
+        Returns
+        -------
+        rv : iterator
+            Iterator over random values
+        """
+        while n is None or n > 0:
+            size = batch_size if n is None else min(n, batch_size)
+            for rv in self.rv_batch(size).tolist():
+                yield rv
+            if n is not None:
+                n -= size
 
 
 class TruncatedZipfDist(DiscreteDist):
@@ -125,6 +228,159 @@ class TruncatedZipfDist(DiscreteDist):
         return self._alpha
 
 
+class LogHistogram(object):
+    """Histogram of non-negative values with logarithmically sized bins.
+
+    It summarizes a stream of values in memory that does not depend on the
+    number of values, but only on the ratio between the largest and smallest
+    positive values. Mean, count, minimum and maximum are exact, while
+    quantiles and CDF are approximated with a relative error bounded by
+    *precision*. Histograms with the same precision can be merged, e.g. to
+    aggregate the results of several replications of an experiment.
+
+    Each bin *i* holds the values in the interval (g^(i-1), g^i], where
+    g = (1 + precision)/(1 - precision), and values in it are approximated by
+    2*g^i/(g + 1). Zeros are counted separately.
+    """
+
+    def __init__(self, precision=0.01):
+        """Constructor
+
+        Parameters
+        ----------
+        precision : float, optional
+            The maximum relative error of the approximated values, which must
+            be in the interval (0, 1)
+        """
+        if not 0 < precision < 1:
+            raise ValueError('precision must be in the interval (0, 1)')
+        self.precision = precision
+        self._gamma = (1 + precision)/(1 - precision)
+        self._log_gamma = math.log(self._gamma)
+        self._bins = collections.defaultdict(int)
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def __len__(self):
+        """Return the number of values added to the histogram"""
+        return self.count
+
+    def add(self, x, n=1):
+        """Add a value to the histogram
+
+        Parameters
+        ----------
+        x : float
+            The value, which must be non-negative
+        n : int, optional
+            The number of occurrences of the value
+        """
+        if x < 0:
+            raise ValueError('x must be non-negative')
+        if x == 0:
+            self.zero_count += n
+        else:
+            self._bins[int(math.ceil(math.log(x)/self._log_gamma))] += n
+        self.count += n
+        self.sum += x*n
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def merge(self, histogram):
+        """Add all the values of another histogram to this histogram
+
+        Parameters
+        ----------
+        histogram : LogHistogram
+            The histogram to merge, which must have the same precision
+
+        Returns
+        -------
+        histogram : LogHistogram
+            This histogram
+        """
+        if histogram.precision != self.precision:
+            raise ValueError('Histograms with different precision cannot be '
+                             'merged')
+        for i, n in histogram._bins.items():
+            self._bins[i] += n
+        self.zero_count += histogram.zero_count
+        self.count += histogram.count
+        self.sum += histogram.sum
+        self.min = min(self.min, histogram.min)
+        self.max = max(self.max, histogram.max)
+        return self
+
+    @property
+    def mean(self):
+        """Return the mean of the values"""
+        if self.count < 1:
+            raise ValueError('The histogram is empty')
+        return self.sum/self.count
+
+    def _values(self):
+        """Return the approximated values of all non-empty bins, sorted, and
+        their counts"""
+        bins = sorted(self._bins)
+        x = [2*self._gamma**i/(self._gamma + 1) for i in bins]
+        counts = [self._bins[i] for i in bins]
+        if self.zero_count > 0:
+            x.insert(0, 0.0)
+            counts.insert(0, self.zero_count)
+        # Approximations cannot exceed the exact extremes
+        x = np.clip(x, self.min, self.max)
+        return x, np.array(counts)
+
+    def quantile(self, q):
+        """Return a quantile of the values
+
+        Parameters
+        ----------
+        q : float
+            The quantile, in the interval [0, 1], e.g. 0.99 for the 99th
+            percentile
+
+        Returns
+        -------
+        x : float
+            The value of the quantile
+        """
+        if not 0 <= q <= 1:
+            raise ValueError('q must be in the interval [0, 1]')
+        if self.count < 1:
+            raise ValueError('The histogram is empty')
+        # The extremes are known exactly
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+        x, counts = self._values()
+        rank = q*(self.count - 1)
+        return float(x[np.searchsorted(np.cumsum(counts), rank, side='right')])
+
+    def cdf(self):
+        """Return the CDF of the values, in the same format as *cdf*
+
+        Returns
+        -------
+        x : array
+            The approximated values, sorted
+        cdf : array
+            The CDF of the values
+        """
+        if self.count < 1:
+            raise TypeError('The histogram is empty')
+        x, counts = self._values()
+        cdf = np.cumsum(counts)/self.count
+        cdf[-1] = 1.0 # Prevent rounding errors
+        return x, cdf
+
+
 def means_confidence_interval(data, confidence=0.95):
     """Computes the confidence interval for a given set of means.
     
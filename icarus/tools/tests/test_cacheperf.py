@@ -8,6 +8,7 @@ else:
     except ImportError:
         raise ImportError("The unittest2 package is needed to run the tests.") 
 del sys
+import warnings
 
 import numpy as np
 
@@ -54,6 +55,38 @@ class TestNumericCacheHitRatio(unittest.TestCase):
         self.assertLess(np.abs(h - r), 0.01)
 
 
+class TestStackDistanceHitCurve(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        z = stats.TruncatedZipfDist(0.8, 200, seed=1)
+        cls.workload = [z.rv() for _ in range(5000)]
+
+    def test_hit_curve(self):
+        sizes = [1, 5, 20, 50]
+        curve = cacheperf.stack_distance_hit_curve(self.workload, sizes)
+        for size, h in zip(sizes, curve):
+            c = cache.LruCache(size)
+            expected = 0
+            n_warmup = int(0.25*len(self.workload))
+            for i, content in enumerate(self.workload):
+                if c.get(content):
+                    expected += i >= n_warmup
+                else:
+                    c.put(content)
+            expected /= (len(self.workload) - n_warmup)
+            self.assertAlmostEqual(expected, h)
+
+    def test_trace_driven_lru(self):
+        c = cache.LruCache(20)
+        h = cacheperf.trace_driven_cache_hit_ratio(self.workload, c, 0.5)
+        # A single-segment SLRU cache behaves as LRU but is not delegated
+        d = cache.SegmentedLruCache(20, 1)
+        expected = cacheperf.trace_driven_cache_hit_ratio(self.workload, d, 0.5)
+        self.assertAlmostEqual(expected, h)
+        self.assertEqual(d.dump(), c.dump())
+
+
 class TestLaoutarisPerContentCacheHitRatio(unittest.TestCase):
     
     def test_3rd_order_positive_disc(self):
@@ -106,6 +139,41 @@ class TestCheApproximation(unittest.TestCase):
             self.assertGreaterEqual(h, 0)
             self.assertLessEqual(h, 1)
 
+    def test_che_characteristic_time_zipf(self):
+        T = cacheperf.che_characteristic_time(self.pdf, self.cache_size)
+        T_zipf = cacheperf.che_characteristic_time_zipf(0.8, 100, self.cache_size)
+        self.assertEqual(len(T_zipf), 101)
+        np.testing.assert_allclose(T_zipf[1:], np.ravel(T), rtol=1e-7)
+        for target in (1, 37, 100):
+            self.assertAlmostEqual(
+                cacheperf.che_characteristic_time_zipf(0.8, 100, self.cache_size, target),
+                cacheperf.che_characteristic_time(self.pdf, self.cache_size, target)[0],
+                places=5)
+        # Targets out of the population do not exclude any item
+        t = cacheperf.che_characteristic_time(self.pdf, self.cache_size, 0)[0]
+        for target in (0, 101):
+            self.assertAlmostEqual(
+                cacheperf.che_characteristic_time_zipf(0.8, 100, self.cache_size, target),
+                t, places=5)
+        # Results are memoized
+        self.assertIs(T_zipf, cacheperf.che_characteristic_time_zipf(0.8, 100, self.cache_size))
+
+    def test_che_characteristic_time_zipf_large_cache(self):
+        expected = cacheperf.che_characteristic_time_zipf(0.8, 100, 98)
+        for cache_size in (99, 100, 105):
+            with warnings.catch_warnings(record=True) as w:
+                warnings.simplefilter('always')
+                T = cacheperf.che_characteristic_time_zipf(0.8, 100, cache_size)
+            self.assertEqual(1, len(w))
+            self.assertTrue(np.all(np.isfinite(T)))
+            np.testing.assert_array_equal(expected, T)
+
+    def test_che_newton_no_convergence(self):
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            cacheperf._che_newton(self.pdf, self.cache_size, max_iter=1)
+        self.assertTrue(any(issubclass(x.category, RuntimeWarning) for x in w))
+
 
 class TestLaoutarisCacheHitRatio(unittest.TestCase):
     
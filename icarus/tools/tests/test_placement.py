@@ -0,0 +1,73 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.") 
+del sys
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import icarus.tools as placement
+
+
+class TestPlacementMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.matrix = np.array([[0, 1, 0, 0, 1, 1],
+                                [0, 0, 0, 0, 0, 0],
+                                [1, 0, 0, 1, 0, 0]])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def assert_same(self, m):
+        self.assertEqual(m.shape, self.matrix.shape)
+        self.assertEqual(m.nnz, 5)
+        for v in range(self.matrix.shape[0]):
+            for k in range(self.matrix.shape[1]):
+                self.assertEqual(m.node_caches(v, k), self.matrix[v, k] == 1)
+        np.testing.assert_array_equal(m.toarray(), self.matrix)
+
+    def test_from_dense(self):
+        m = placement.PlacementMatrix.from_dense(self.matrix)
+        self.assert_same(m)
+        self.assertEqual(list(m.row(0)), [1, 4, 5])
+        self.assertEqual(list(m.row(1)), [])
+        self.assertRaises(IndexError, m.node_caches, 0, 6)
+
+    def test_convert_load(self):
+        csv_file = os.path.join(self.tmp_dir, 'matrix.csv')
+        np.savetxt(csv_file, self.matrix, delimiter=',')
+        bundle_dir = os.path.join(self.tmp_dir, 'matrix')
+        self.assert_same(placement.convert_placement_matrix(csv_file, bundle_dir))
+        for mmap in (True, False):
+            self.assert_same(placement.load_placement_matrix(bundle_dir, mmap=mmap))
+
+    def test_threshold(self):
+        # Only elements equal to 1, up to rounding errors, are placements
+        matrix = self.matrix + np.where(self.matrix, -1e-12, 0.99)
+        matrix[1, 2] = -1
+        matrix[1, 3] = 0.6
+        self.assert_same(placement.PlacementMatrix.from_dense(matrix))
+        csv_file = os.path.join(self.tmp_dir, 'matrix.csv')
+        np.savetxt(csv_file, matrix, delimiter=',', fmt='%.15f')
+        self.assert_same(placement.convert_placement_matrix(csv_file))
+        half = placement.PlacementMatrix.from_dense(matrix, threshold=0.5)
+        self.assertEqual(self.matrix.size - 1, len(half.indices))
+
+    def test_cached(self):
+        csv_file = os.path.join(self.tmp_dir, 'matrix.csv')
+        np.savetxt(csv_file, self.matrix, delimiter=',')
+        bundle_dir = os.path.join(self.tmp_dir, 'matrix')
+        self.assert_same(placement.cached_placement_matrix(csv_file, bundle_dir))
+        self.assertTrue(os.path.isdir(bundle_dir))
+        # Later calls read the bundle, not the text file
+        os.remove(csv_file)
+        self.assert_same(placement.cached_placement_matrix(csv_file, bundle_dir))
@@ -1,3 +1,4 @@
+from __future__ import division
 import sys
 if sys.version_info[:2] >= (2, 7):
     import unittest
@@ -8,6 +9,7 @@ else:
         raise ImportError("The unittest2 package is needed to run the tests.") 
 del sys
 import collections
+import random
 
 import numpy as np
 
@@ -31,6 +33,32 @@ class TestDiscreteDist(unittest.TestCase):
         pdf_1 = np.array([0.4, 0.6])
         pdf_2 = stats.DiscreteDist(pdf_1).pdf
         self.assertTrue(all(pdf_1[i] == pdf_2[i] for i in range(len(pdf_1))))
+
+    def test_rv(self):
+        pdf = np.array([0.1, 0.0, 0.6, 0.3])
+        dist = stats.DiscreteDist(pdf, seed=1)
+        n = 50000
+        freqs = collections.Counter(dist.rv() for _ in range(n))
+        self.assertNotIn(2, freqs)
+        for i in range(len(pdf)):
+            self.assertAlmostEqual(freqs[i + 1]/n, pdf[i], delta=0.01)
+
+    def test_rv_batch(self):
+        pdf = np.array([0.1, 0.0, 0.6, 0.3])
+        dist = stats.DiscreteDist(pdf, seed=1)
+        n = 50000
+        rv = dist.rv_batch(n)
+        self.assertEqual(len(rv), n)
+        freqs = np.bincount(rv, minlength=len(pdf) + 1)[1:]/n
+        self.assertEqual(freqs[1], 0)
+        np.testing.assert_allclose(freqs, pdf, atol=0.01)
+
+    def test_rv_iter_seed(self):
+        pdf = np.array([0.1, 0.0, 0.6, 0.3])
+        rv_1 = list(stats.DiscreteDist(pdf, seed=1).rv_iter(100, batch_size=7))
+        rv_2 = list(stats.DiscreteDist(pdf, seed=1).rv_iter(100))
+        self.assertEqual(len(rv_1), 100)
+        self.assertEqual(rv_1[:7], rv_2[:7])
         
 class TestTruncatedZipfDist(unittest.TestCase):
 
@@ -39,6 +67,50 @@ class TestTruncatedZipfDist(unittest.TestCase):
         self.assertAlmostEqual(np.sum(p), 1.0)
 
 
+class TestLogHistogram(unittest.TestCase):
+
+    def test_quantile_error(self):
+        random.seed(2)
+        data = [random.expovariate(0.1) for _ in range(5000)] + [0.0]*50
+        hist = stats.LogHistogram(0.01)
+        for x in data:
+            hist.add(x)
+        data.sort()
+        self.assertEqual(len(data), len(hist))
+        self.assertAlmostEqual(np.mean(data), hist.mean)
+        self.assertEqual(0.0, hist.quantile(0))
+        self.assertEqual(data[-1], hist.quantile(1))
+        for q in (0.2, 0.5, 0.95, 0.99):
+            exact = data[int(q*(len(data) - 1))]
+            self.assertLessEqual(abs(hist.quantile(q) - exact), 0.01*exact)
+
+    def test_merge(self):
+        a = stats.LogHistogram()
+        b = stats.LogHistogram()
+        c = stats.LogHistogram()
+        for x in range(1, 101):
+            (a if x % 2 else b).add(x)
+            c.add(x)
+        a.merge(b)
+        self.assertEqual(c.count, a.count)
+        self.assertEqual(c.mean, a.mean)
+        self.assertEqual(1, a.min)
+        self.assertEqual(100, a.max)
+        np.testing.assert_array_equal(c.cdf()[0], a.cdf()[0])
+        np.testing.assert_array_equal(c.cdf()[1], a.cdf()[1])
+        self.assertRaises(ValueError, a.merge, stats.LogHistogram(0.02))
+
+    def test_cdf(self):
+        hist = stats.LogHistogram()
+        for x in (1, 1, 2, 4):
+            hist.add(x)
+        x, cdf = hist.cdf()
+        self.assertEqual(3, len(x))
+        self.assertEqual(1, x[0])
+        self.assertEqual(4, x[-1])
+        np.testing.assert_array_almost_equal([0.5, 0.75, 1.0], cdf)
+
+
 class TestCdf(unittest.TestCase):
 
     def test_cdf_known_input(self):
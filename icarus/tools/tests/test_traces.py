@@ -7,7 +7,12 @@ else:
     except ImportError:
         raise ImportError("The unittest2 package is needed to run the tests.") 
 del sys
+import os
+import gzip
+import bz2
 import random
+import shutil
+import tempfile
 
 import numpy as np
 
@@ -67,3 +72,89 @@ class TestZipfFit(unittest.TestCase):
         self.assertLessEqual(p, p_max)
 
 
+class TestYoutubeTraceBundle(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, name, values):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w') as f:
+            for v in values:
+                f.write('%s\n' % str(v))
+        return path
+
+    def test_convert_load(self):
+        pdf = [0.5, 0.25, 0.25]
+        timestamps = [0.5, 1.25, 3.0, 4.75]
+        reqs = [12, 10, 12, 11]
+        clients = [3, 0, 1, 3]
+        contents = [10, 11, 12]
+        bundle_dir = os.path.join(self.tmp_dir, 'bundle')
+        traces.convert_youtube_trace(bundle_dir,
+                                     self.write('pdf', pdf),
+                                     self.write('reqs', reqs),
+                                     self.write('timestamps', timestamps),
+                                     self.write('clients', clients),
+                                     self.write('contents', contents))
+        trace = traces.load_youtube_trace(bundle_dir)
+        self.assertIsInstance(trace['requests'], np.memmap)
+        self.assertEqual(trace['pdf'].tolist(), pdf)
+        self.assertEqual(trace['timestamps'].tolist(), timestamps)
+        self.assertEqual(trace['requests'].tolist(), reqs)
+        self.assertEqual(trace['clients'].tolist(), clients)
+        self.assertEqual(trace['unique_contents'].tolist(), contents)
+
+    def test_read_invalid(self):
+        files = [self.write('pdf', [0.5, 0.5]),
+                 self.write('reqs', [10, 'x', 11]),
+                 self.write('timestamps', [0.5, 1.25, 3.0]),
+                 self.write('clients', [3, 0, 1]),
+                 self.write('contents', [10, 11])]
+        self.assertRaises(ValueError, traces.read_youtube_trace, *files)
+        files[1] = self.write('reqs', [10, 10.5, 11])
+        self.assertRaises(ValueError, traces.read_youtube_trace, *files)
+        files[1] = self.write('reqs', [10, 10, 11])
+        self.assertEqual([10, 10, 11],
+                         traces.read_youtube_trace(*files)['requests'].tolist())
+
+
+class TestTraceReaders(unittest.TestCase):
+
+    lines = ['b', 'a', '', 'c ', 'a', 'b', 'd']
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, name, opener=open):
+        path = os.path.join(self.tmp_dir, name)
+        f = opener(path, 'wb')
+        f.write('\n'.join(self.lines) + '\n')
+        f.close()
+        return path
+
+    def test_iter_trace_chunks(self):
+        path = self.write('trace')
+        chunks = list(traces.iter_trace_chunks(path, chunk_size=3))
+        self.assertEqual([['b', 'a'], ['c', 'a', 'b'], ['d']], chunks)
+
+    def test_compressed(self):
+        expected = ['b', 'a', 'c', 'a', 'b', 'd']
+        for name, opener in (('trace.gz', gzip.open), ('trace', bz2.BZ2File)):
+            path = self.write(name, opener)
+            lines = [l for c in traces.iter_trace_chunks(path, 2) for l in c]
+            self.assertEqual(expected, lines)
+
+    def test_intern_contents(self):
+        table = {}
+        contents = traces.intern_contents(['b', 'a', 'b'], table)
+        self.assertEqual([1, 2, 1], contents.tolist())
+        contents = traces.intern_contents(['c', 'a'], table)
+        self.assertEqual([3, 2], contents.tolist())
+        self.assertEqual({'b': 1, 'a': 2, 'c': 3}, table)
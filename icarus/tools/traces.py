@@ -1,8 +1,12 @@
 """Functions for importing and analyzing traffic traces"""
 from __future__ import division
 
+import os
 import math
 import collections
+import gzip
+import bz2
+import itertools
 import time
 import dateutil
 
@@ -13,16 +17,132 @@ from icarus.tools import TruncatedZipfDist
 
 
 __all__ = [
+       'open_trace',
+       'iter_trace_chunks',
+       'intern_contents',
        'frequencies',
        'zipf_fit',
        'parse_url_list',
        'parse_wikibench',
        'parse_squid',
        'parse_youtube_umass',
-       'parse_common_log_format'
+       'parse_common_log_format',
+       'read_youtube_trace',
+       'convert_youtube_trace',
+       'load_youtube_trace',
            ]
 
 
+# Arrays of a binary YouTube trace bundle and their data types. Each array is
+# stored in the bundle directory as <name>.npy
+YOUTUBE_TRACE_ARRAYS = collections.OrderedDict([
+        ('pdf',             np.float64),
+        ('timestamps',      np.float64),
+        ('requests',        np.int64),
+        ('clients',         np.int64),
+        ('unique_contents', np.int64),
+                                                ])
+
+# Magic numbers at the beginning of compressed trace files
+_GZIP_MAGIC = '\x1f\x8b'
+_BZ2_MAGIC = 'BZh'
+_XZ_MAGIC = '\xfd7zXZ\x00'
+
+
+def open_trace(path, buffering=-1):
+    """Open a trace file for reading.
+
+    Files compressed with gzip, bzip2 or xz are recognized by their content,
+    regardless of their name, and decompressed on the fly. Reading xz files
+    requires the *lzma* module (or *backports.lzma* on Python 2).
+
+    Parameters
+    ----------
+    path : str
+        The path of the trace file
+    buffering : int, optional
+        The buffer size of uncompressed files, as in the built-in *open*
+
+    Returns
+    -------
+    f : file-like object
+        The file, whose lines can be iterated over
+    """
+    with open(path, 'rb') as f:
+        magic = f.read(len(_XZ_MAGIC))
+    if magic.startswith(_GZIP_MAGIC):
+        return gzip.open(path, 'rb')
+    if magic.startswith(_BZ2_MAGIC):
+        return bz2.BZ2File(path, 'rb')
+    if magic.startswith(_XZ_MAGIC):
+        try:
+            import lzma
+        except ImportError:
+            try:
+                from backports import lzma
+            except ImportError:
+                raise ImportError('Reading xz-compressed traces requires the '
+                                  'lzma or backports.lzma module')
+        return lzma.LZMAFile(path, 'rb')
+    return open(path, 'rb', buffering)
+
+
+def iter_trace_chunks(path, chunk_size=2**16, buffering=-1):
+    """Return an iterator over the lines of a trace file, in chunks.
+
+    Only one chunk is held in memory at a time, hence memory usage does not
+    depend on the length of the trace. Compressed files are supported (see
+    *open_trace*).
+
+    Parameters
+    ----------
+    path : str
+        The path of the trace file
+    chunk_size : int, optional
+        The maximum number of lines per chunk
+    buffering : int, optional
+        The buffer size of uncompressed files, as in the built-in *open*
+
+    Returns
+    -------
+    chunks : iterator
+        Iterator of lists of lines, stripped of leading and trailing
+        whitespace. Empty lines are skipped
+    """
+    with open_trace(path, buffering) as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                return
+            lines = [l for l in (line.strip() for line in lines) if l]
+            if lines:
+                yield lines
+
+
+def intern_contents(names, table):
+    """Map content names to integer content identifiers.
+
+    Each name not yet in the interning table is assigned the next identifier,
+    starting from 1, so that identifiers are contiguous in the order in which
+    names are first seen.
+
+    Parameters
+    ----------
+    names : list
+        The content names, e.g. a chunk returned by *iter_trace_chunks*
+    table : dict
+        The interning table, mapping each name to its identifier. It is
+        updated with the names not yet in it
+
+    Returns
+    -------
+    contents : array of int
+        The identifiers of the contents
+    """
+    return np.fromiter((table.setdefault(name, len(table) + 1)
+                        for name in names), dtype=np.int64, count=len(names))
+
+
 def frequencies(data):
     """Extract frequencies from traces. Returns array of sorted frequencies
     
@@ -290,4 +410,112 @@ def parse_common_log_format(path):
                 bytes=n_bytes
                         )
             yield t, event
-    raise StopIteration()
\ No newline at end of file
+    raise StopIteration()
+
+
+def read_youtube_trace(pdf_file, reqs_file, timestamps_file, clients_file,
+                       unique_contents_file):
+    """Read the text files of a YouTube trace, as read by the YOUTUBETRACE
+    workload, into arrays.
+
+    Each text file contains one value per line. A *ValueError* is raised if
+    any line cannot be parsed.
+
+    Parameters
+    ----------
+    pdf_file : str
+        Path of file containing the probability of each unique content
+    reqs_file : str
+        Path of file containing requested contents
+    timestamps_file : str
+        Path of file containing timestamps of requested contents
+    clients_file : str
+        Path of file containing clients which requested the content
+    unique_contents_file : str
+        Path of file containing the identifiers of unique contents
+
+    Returns
+    -------
+    trace : dict
+        Dictionary mapping the name of each array (pdf, timestamps, requests,
+        clients and unique_contents) to the array
+    """
+    files = {'pdf':             pdf_file,
+             'timestamps':      timestamps_file,
+             'requests':        reqs_file,
+             'clients':         clients_file,
+             'unique_contents': unique_contents_file}
+    return dict((name, _read_values(files[name], dtype))
+                for name, dtype in YOUTUBE_TRACE_ARRAYS.items())
+
+
+def _read_values(path, dtype):
+    """Read a text file containing one value per line into an array, raising
+    a ValueError if any line cannot be parsed"""
+    values = np.fromfile(path, dtype=dtype, sep='\n')
+    # np.fromfile stops silently at the first value it cannot parse
+    with open(path) as f:
+        n_lines = sum(1 for line in f if line.strip())
+    if len(values) != n_lines:
+        raise ValueError('Could not parse value %d of %s as %s'
+                         % (len(values) + 1, path, np.dtype(dtype).name))
+    return values
+
+
+def convert_youtube_trace(bundle_dir, pdf_file, reqs_file, timestamps_file,
+                          clients_file, unique_contents_file):
+    """Convert the text files of a YouTube trace, as read by the YOUTUBETRACE
+    workload, into a bundle of binary arrays.
+
+    Each text file contains one value per line. Each of them is converted into
+    a .npy file in the bundle directory, which can then be memory-mapped by
+    *load_youtube_trace*. Arrays are stored as separate .npy files rather than
+    in a single .npz archive because arrays in .npz archives cannot be
+    memory-mapped.
+
+    Parameters
+    ----------
+    bundle_dir : str
+        The directory where the bundle is written. It is created if it does
+        not exist
+    pdf_file : str
+        Path of file containing the probability of each unique content
+    reqs_file : str
+        Path of file containing requested contents
+    timestamps_file : str
+        Path of file containing timestamps of requested contents
+    clients_file : str
+        Path of file containing clients which requested the content
+    unique_contents_file : str
+        Path of file containing the identifiers of unique contents
+    """
+    trace = read_youtube_trace(pdf_file, reqs_file, timestamps_file,
+                               clients_file, unique_contents_file)
+    if not os.path.isdir(bundle_dir):
+        os.makedirs(bundle_dir)
+    for name, data in trace.items():
+        np.save(os.path.join(bundle_dir, '%s.npy' % name), data)
+
+
+def load_youtube_trace(bundle_dir, mmap=True):
+    """Load a bundle of binary arrays written by *convert_youtube_trace*.
+
+    Parameters
+    ----------
+    bundle_dir : str
+        The directory of the bundle
+    mmap : bool, optional
+        If *True*, arrays are memory-mapped read-only instead of being read
+        into memory. Memory-mapped arrays are backed by the page cache, hence
+        they are shared by all the processes reading the same bundle
+
+    Returns
+    -------
+    trace : dict
+        Dictionary mapping the name of each array (pdf, timestamps, requests,
+        clients and unique_contents) to the array
+    """
+    mmap_mode = 'r' if mmap else None
+    return dict((name, np.load(os.path.join(bundle_dir, '%s.npy' % name),
+                               mmap_mode=mmap_mode))
+                for name in YOUTUBE_TRACE_ARRAYS)